@@ -0,0 +1,2 @@
+// built by 'manage.py build_hand_label_script' from paigow/pghandlabels.py; don't edit.
+var g_hand_labels = {"AA":"teen bo","AB":"4","AC":"gong","AD":"6","AE":"2","AF":"8","AG":"6","AH":"3","AI":"2","AJ":"high nine","AK":"8","AL":"wong","AM":"gong","AN":"high nine","AO":"7","AP":"8","Aa":"teen bo","Ab":"4","Ac":"gong","Ad":"6","Ae":"2","Af":"8","Ag":"6","Ah":"3","Ai":"2","Aj":"high nine","Ak":"8","Al":"wong","Am":"gong","An":"high nine","Ao":"7","Ap":"8","BA":"4","BB":"day bo","BC":"gong","BD":"6","BE":"2","BF":"8","BG":"6","BH":"3","BI":"2","BJ":"high nine","BK":"8","BL":"wong","BM":"gong","BN":"high nine","BO":"7","BP":"8","Ba":"4","Bb":"day bo","Bc":"gong","Bd":"6","Be":"2","Bf":"8","Bg":"6","Bh":"3","Bi":"2","Bj":"high nine","Bk":"8","Bl":"wong","Bm":"gong","Bn":"high nine","Bo":"7","Bp":"8","CA":"gong","CB":"gong","CC":"high eight bo","CD":"2","CE":"8","CF":"4","CG":"2","CH":"9","CI":"8","CJ":"5","CK":"4","CL":"7","CM":"6","CN":"5","CO":"3","CP":"4","Ca":"gong","Cb":"gong","Cc":"high eight bo","Cd":"2","Ce":"8","Cf":"4","Cg":"2","Ch":"9","Ci":"8","Cj":"5","Ck":"4","Cl":"7","Cm":"6","Cn":"5","Co":"3","Cp":"4","DA":"6","DB":"6","DC":"2","DD":"harmony four bo","DE":"4","DF":"0","DG":"8","DH":"5","DI":"4","DJ":"1","DK":"0","DL":"3","DM":"2","DN":"1","DO":"9","DP":"7","Da":"6","Db":"6","Dc":"2","Dd":"harmony four bo","De":"4","Df":"0","Dg":"8","Dh":"5","Di":"4","Dj":"1","Dk":"0","Dl":"3","Dm":"2","Dn":"1","Do":"9","Dp":"7","EA":"2","EB":"2","EC":"8","ED":"4","EE":"high ten bo","EF":"6","EG":"4","EH":"1","EI":"0","EJ":"7","EK":"6","EL":"9","EM":"8","EN":"7","EO":"5","EP":"6","Ea":"2","Eb":"2","Ec":"8","Ed":"4","Ee":"high ten bo","Ef":"6","Eg":"4","Eh":"1","Ei":"0","Ej":"7","Ek":"6","El":"9","Em":"8","En":"7","Eo":"5","Ep":"6","FA":"8","FB":"8","FC":"4","FD":"0","FE":"6","FF":"long six bo","FG":"0","FH":"7","FI":"6","FJ":"3","FK":"2","FL":"5","FM":"4","FN":"3","FO":"1","FP":"9","Fa":"8","Fb":"8","Fc":"4","Fd":"0","Fe":"6","Ff":"long six bo","Fg":"0","Fh":"7","Fi":"6","Fj":"3","Fk":"2","Fl":"5","Fm":"4","Fn":"3","Fo":"1","Fp":"9","GA":"6","GB":"6","GC":"2","GD":"8","GE":"4","GF":"0","GG":"low four bo","GH":"5","GI":"4","GJ":"1","GK":"0","GL":"3","GM":"2","GN":"1","GO":"9","GP":"7","Ga":"6","Gb":"6","Gc":"2","Gd":"8","Ge":"4","Gf":"0","Gg":"low four bo","Gh":"5","Gi":"4","Gj":"1","Gk":"0","Gl":"3","Gm":"2","Gn":"1","Go":"9","Gp":"7","HA":"3","HB":"3","HC":"9","HD":"5","HE":"1","HF":"7","HG":"5","HH":"eleven bo","HI":"1","HJ":"8","HK":"7","HL":"0","HM":"9","HN":"8","HO":"6","HP":"7","Ha":"3","Hb":"3","Hc":"9","Hd":"5","He":"1","Hf":"7","Hg":"5","Hh":"eleven bo","Hi":"1","Hj":"8","Hk":"7","Hl":"0","Hm":"9","Hn":"8","Ho":"6","Hp":"7","IA":"2","IB":"2","IC":"8","ID":"4","IE":"0","IF":"6","IG":"4","IH":"1","II":"low ten bo","IJ":"7","IK":"6","IL":"9","IM":"8","IN":"7","IO":"5","IP":"6","Ia":"2","Ib":"2","Ic":"8","Id":"4","Ie":"0","If":"6","Ig":"4","Ih":"1","Ii":"low ten bo","Ij":"7","Ik":"6","Il":"9","Im":"8","In":"7","Io":"5","Ip":"6","JA":"high nine","JB":"high nine","JC":"5","JD":"1","JE":"7","JF":"3","JG":"1","JH":"8","JI":"7","JJ":"high seven bo","JK":"3","JL":"6","JM":"5","JN":"4","JO":"2","JP":"3","Ja":"high nine","Jb":"high nine","Jc":"5","Jd":"1","Je":"7","Jf":"3","Jg":"1","Jh":"8","Ji":"7","Jj":"high seven bo","Jk":"3","Jl":"6","Jm":"5","Jn":"4","Jo":"2","Jp":"3","KA":"8","KB":"8","KC":"4","KD":"0","KE":"6","KF":"2","KG":"0","KH":"7","KI":"6","KJ":"3","KK":"low six bo","KL":"5","KM":"4","KN":"3","KO":"1","KP":"9","Ka":"8","Kb":"8","Kc":"4","Kd":"0","Ke":"6","Kf":"2","Kg":"0","Kh":"7","Ki":"6","Kj":"3","Kk":"low six bo","Kl":"5","Km":"4","Kn":"3","Ko":"1","Kp":"9","LA":"wong","LB":"wong","LC":"7","LD":"3","LE":"9","LF":"5","LG":"3","LH":"0","LI":"9","LJ":"6","LK":"5","LL":"mixed nine bo","LM":"7","LN":"6","LO":"4","LP":"5","La":"wong","Lb":"wong","Lc":"7","Ld":"3","Le":"9","Lf":"5","Lg":"3","Lh":"0","Li":"9","Lj":"6","Lk":"5","Ll":"mixed nine bo","Lm":"7","Ln":"6","Lo":"4","Lp":"5","MA":"gong","MB":"gong","MC":"6","MD":"2","ME":"8","MF":"4","MG":"2","MH":"9","MI":"8","MJ":"5","MK":"4","ML":"7","MM":"mixed eight bo","MN":"5","MO":"3","MP":"4","Ma":"gong","Mb":"gong","Mc":"6","Md":"2","Me":"8","Mf":"4","Mg":"2","Mh":"9","Mi":"8","Mj":"5","Mk":"4","Ml":"7","Mm":"mixed eight bo","Mn":"5","Mo":"3","Mp":"4","NA":"high nine","NB":"high nine","NC":"5","ND":"1","NE":"7","NF":"3","NG":"1","NH":"8","NI":"7","NJ":"4","NK":"3","NL":"6","NM":"5","NN":"mixed seven bo","NO":"2","NP":"3","Na":"high nine","Nb":"high nine","Nc":"5","Nd":"1","Ne":"7","Nf":"3","Ng":"1","Nh":"8","Ni":"7","Nj":"4","Nk":"3","Nl":"6","Nm":"5","Nn":"mixed seven bo","No":"2","Np":"3","OA":"7","OB":"7","OC":"3","OD":"9","OE":"5","OF":"1","OG":"9","OH":"6","OI":"5","OJ":"2","OK":"1","OL":"4","OM":"3","ON":"2","OO":"mixed five bo","OP":"8","Oa":"7","Ob":"7","Oc":"3","Od":"9","Oe":"5","Of":"1","Og":"9","Oh":"6","Oi":"5","Oj":"2","Ok":"1","Ol":"4","Om":"3","On":"2","Oo":"mixed five bo","Op":"8","PA":"8","PB":"8","PC":"4","PD":"7","PE":"6","PF":"9","PG":"7","PH":"7","PI":"6","PJ":"3","PK":"9","PL":"5","PM":"4","PN":"3","PO":"8","PP":"gee joon","Pa":"8","Pb":"8","Pc":"4","Pd":"7","Pe":"6","Pf":"9","Pg":"7","Ph":"7","Pi":"6","Pj":"3","Pk":"9","Pl":"5","Pm":"4","Pn":"3","Po":"8","Pp":"gee joon","aA":"teen bo","aB":"4","aC":"gong","aD":"6","aE":"2","aF":"8","aG":"6","aH":"3","aI":"2","aJ":"high nine","aK":"8","aL":"wong","aM":"gong","aN":"high nine","aO":"7","aP":"8","aa":"teen bo","ab":"4","ac":"gong","ad":"6","ae":"2","af":"8","ag":"6","ah":"3","ai":"2","aj":"high nine","ak":"8","al":"wong","am":"gong","an":"high nine","ao":"7","ap":"8","bA":"4","bB":"day bo","bC":"gong","bD":"6","bE":"2","bF":"8","bG":"6","bH":"3","bI":"2","bJ":"high nine","bK":"8","bL":"wong","bM":"gong","bN":"high nine","bO":"7","bP":"8","ba":"4","bb":"day bo","bc":"gong","bd":"6","be":"2","bf":"8","bg":"6","bh":"3","bi":"2","bj":"high nine","bk":"8","bl":"wong","bm":"gong","bn":"high nine","bo":"7","bp":"8","cA":"gong","cB":"gong","cC":"high eight bo","cD":"2","cE":"8","cF":"4","cG":"2","cH":"9","cI":"8","cJ":"5","cK":"4","cL":"7","cM":"6","cN":"5","cO":"3","cP":"4","ca":"gong","cb":"gong","cc":"high eight bo","cd":"2","ce":"8","cf":"4","cg":"2","ch":"9","ci":"8","cj":"5","ck":"4","cl":"7","cm":"6","cn":"5","co":"3","cp":"4","dA":"6","dB":"6","dC":"2","dD":"harmony four bo","dE":"4","dF":"0","dG":"8","dH":"5","dI":"4","dJ":"1","dK":"0","dL":"3","dM":"2","dN":"1","dO":"9","dP":"7","da":"6","db":"6","dc":"2","dd":"harmony four bo","de":"4","df":"0","dg":"8","dh":"5","di":"4","dj":"1","dk":"0","dl":"3","dm":"2","dn":"1","do":"9","dp":"7","eA":"2","eB":"2","eC":"8","eD":"4","eE":"high ten bo","eF":"6","eG":"4","eH":"1","eI":"0","eJ":"7","eK":"6","eL":"9","eM":"8","eN":"7","eO":"5","eP":"6","ea":"2","eb":"2","ec":"8","ed":"4","ee":"high ten bo","ef":"6","eg":"4","eh":"1","ei":"0","ej":"7","ek":"6","el":"9","em":"8","en":"7","eo":"5","ep":"6","fA":"8","fB":"8","fC":"4","fD":"0","fE":"6","fF":"long six bo","fG":"0","fH":"7","fI":"6","fJ":"3","fK":"2","fL":"5","fM":"4","fN":"3","fO":"1","fP":"9","fa":"8","fb":"8","fc":"4","fd":"0","fe":"6","ff":"long six bo","fg":"0","fh":"7","fi":"6","fj":"3","fk":"2","fl":"5","fm":"4","fn":"3","fo":"1","fp":"9","gA":"6","gB":"6","gC":"2","gD":"8","gE":"4","gF":"0","gG":"low four bo","gH":"5","gI":"4","gJ":"1","gK":"0","gL":"3","gM":"2","gN":"1","gO":"9","gP":"7","ga":"6","gb":"6","gc":"2","gd":"8","ge":"4","gf":"0","gg":"low four bo","gh":"5","gi":"4","gj":"1","gk":"0","gl":"3","gm":"2","gn":"1","go":"9","gp":"7","hA":"3","hB":"3","hC":"9","hD":"5","hE":"1","hF":"7","hG":"5","hH":"eleven bo","hI":"1","hJ":"8","hK":"7","hL":"0","hM":"9","hN":"8","hO":"6","hP":"7","ha":"3","hb":"3","hc":"9","hd":"5","he":"1","hf":"7","hg":"5","hh":"eleven bo","hi":"1","hj":"8","hk":"7","hl":"0","hm":"9","hn":"8","ho":"6","hp":"7","iA":"2","iB":"2","iC":"8","iD":"4","iE":"0","iF":"6","iG":"4","iH":"1","iI":"low ten bo","iJ":"7","iK":"6","iL":"9","iM":"8","iN":"7","iO":"5","iP":"6","ia":"2","ib":"2","ic":"8","id":"4","ie":"0","if":"6","ig":"4","ih":"1","ii":"low ten bo","ij":"7","ik":"6","il":"9","im":"8","in":"7","io":"5","ip":"6","jA":"high nine","jB":"high nine","jC":"5","jD":"1","jE":"7","jF":"3","jG":"1","jH":"8","jI":"7","jJ":"high seven bo","jK":"3","jL":"6","jM":"5","jN":"4","jO":"2","jP":"3","ja":"high nine","jb":"high nine","jc":"5","jd":"1","je":"7","jf":"3","jg":"1","jh":"8","ji":"7","jj":"high seven bo","jk":"3","jl":"6","jm":"5","jn":"4","jo":"2","jp":"3","kA":"8","kB":"8","kC":"4","kD":"0","kE":"6","kF":"2","kG":"0","kH":"7","kI":"6","kJ":"3","kK":"low six bo","kL":"5","kM":"4","kN":"3","kO":"1","kP":"9","ka":"8","kb":"8","kc":"4","kd":"0","ke":"6","kf":"2","kg":"0","kh":"7","ki":"6","kj":"3","kk":"low six bo","kl":"5","km":"4","kn":"3","ko":"1","kp":"9","lA":"wong","lB":"wong","lC":"7","lD":"3","lE":"9","lF":"5","lG":"3","lH":"0","lI":"9","lJ":"6","lK":"5","lL":"mixed nine bo","lM":"7","lN":"6","lO":"4","lP":"5","la":"wong","lb":"wong","lc":"7","ld":"3","le":"9","lf":"5","lg":"3","lh":"0","li":"9","lj":"6","lk":"5","ll":"mixed nine bo","lm":"7","ln":"6","lo":"4","lp":"5","mA":"gong","mB":"gong","mC":"6","mD":"2","mE":"8","mF":"4","mG":"2","mH":"9","mI":"8","mJ":"5","mK":"4","mL":"7","mM":"mixed eight bo","mN":"5","mO":"3","mP":"4","ma":"gong","mb":"gong","mc":"6","md":"2","me":"8","mf":"4","mg":"2","mh":"9","mi":"8","mj":"5","mk":"4","ml":"7","mm":"mixed eight bo","mn":"5","mo":"3","mp":"4","nA":"high nine","nB":"high nine","nC":"5","nD":"1","nE":"7","nF":"3","nG":"1","nH":"8","nI":"7","nJ":"4","nK":"3","nL":"6","nM":"5","nN":"mixed seven bo","nO":"2","nP":"3","na":"high nine","nb":"high nine","nc":"5","nd":"1","ne":"7","nf":"3","ng":"1","nh":"8","ni":"7","nj":"4","nk":"3","nl":"6","nm":"5","nn":"mixed seven bo","no":"2","np":"3","oA":"7","oB":"7","oC":"3","oD":"9","oE":"5","oF":"1","oG":"9","oH":"6","oI":"5","oJ":"2","oK":"1","oL":"4","oM":"3","oN":"2","oO":"mixed five bo","oP":"8","oa":"7","ob":"7","oc":"3","od":"9","oe":"5","of":"1","og":"9","oh":"6","oi":"5","oj":"2","ok":"1","ol":"4","om":"3","on":"2","oo":"mixed five bo","op":"8","pA":"8","pB":"8","pC":"4","pD":"7","pE":"6","pF":"9","pG":"7","pH":"7","pI":"6","pJ":"3","pK":"9","pL":"5","pM":"4","pN":"3","pO":"8","pP":"gee joon","pa":"8","pb":"8","pc":"4","pd":"7","pe":"6","pf":"9","pg":"7","ph":"7","pi":"6","pj":"3","pk":"9","pl":"5","pm":"4","pn":"3","po":"8","pp":"gee joon"};
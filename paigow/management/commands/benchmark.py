@@ -0,0 +1,92 @@
+# manage.py benchmark [--count N] [--rounds R] [--seed S] [--only NAMES] [--output FILE]
+#                     [--baseline FILE] [--save-baseline] [--tolerance T]
+#
+# Time the engine's hot paths (see pgbenchmark.py) and print ops/sec,
+# latency percentiles and peak memory for each.  The results are
+# compared with the stored baseline, and the command fails if anything
+# got slower than the tolerance allows.  With --save-baseline, the
+# results become the new baseline instead.
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paigow.pgbenchmark import run_benchmarks, save_results, load_baseline, regressions
+from paigow.pgbenchmark import benchmark_names, is_benchmark_name, s_benchmark_baseline_path
+from paigow.pgbenchmark import s_default_count, s_default_rounds, s_default_seed, s_default_tolerance, s_percentiles
+
+class Command( BaseCommand ):
+
+  help = "Benchmark the hand, set and strategy code and check for regressions"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--count',
+      type = 'int',
+      dest = 'count',
+      default = s_default_count,
+      help = "Calls per benchmark" ),
+    make_option( '--rounds',
+      type = 'int',
+      dest = 'rounds',
+      default = s_default_rounds,
+      help = "Rounds per benchmark; the fastest is reported" ),
+    make_option( '--seed',
+      type = 'int',
+      dest = 'seed',
+      default = s_default_seed,
+      help = "Seed for the random workloads" ),
+    make_option( '--only',
+      dest = 'only',
+      default = None,
+      help = "Comma-separated benchmarks to run (default: all of them)" ),
+    make_option( '--output',
+      dest = 'output',
+      default = None,
+      help = "Write the results to this JSON file" ),
+    make_option( '--baseline',
+      dest = 'baseline',
+      default = s_benchmark_baseline_path,
+      help = "The baseline JSON file to compare against" ),
+    make_option( '--save-baseline',
+      action = 'store_true',
+      dest = 'save_baseline',
+      default = False,
+      help = "Save the results as the new baseline instead of comparing" ),
+    make_option( '--tolerance',
+      type = 'float',
+      dest = 'tolerance',
+      default = s_default_tolerance,
+      help = "Fraction of the baseline ops/sec a benchmark may lose before it fails" ),
+  )
+
+  def handle( self, *args, **options ):
+    names = None
+    if options['only']:
+      names = options['only'].split( ',' )
+      for name in names:
+        if not is_benchmark_name( name ):
+          raise CommandError( "Unknown benchmark '" + name + "'; choose from " + ", ".join( benchmark_names() ) + " or engine_<engine name>" )
+    results = run_benchmarks( options['count'], options['seed'], names, options['rounds'] )
+    for name in names or benchmark_names():
+      result = results[name]
+      line = "%-20s %12.0f ops/sec" % ( name, result['ops_per_sec'] )
+      for p in s_percentiles:
+        line += "  p%d %8.1fus" % ( p, result[ 'p' + str( p ) + '_us' ] )
+      line += "  peak %dKB" % result['peak_memory_kb']
+      self.stdout.write( line + "\n" )
+    if options['output']:
+      save_results( results, options['output'] )
+    if options['save_baseline']:
+      save_results( results, options['baseline'] )
+      self.stdout.write( "Saved baseline to " + options['baseline'] + "\n" )
+      return
+    baseline = load_baseline( options['baseline'] )
+    if not baseline:
+      self.stdout.write( "No baseline at " + options['baseline'] + "; run with --save-baseline to make one.\n" )
+      return
+    slower = regressions( results, baseline, options['tolerance'] )
+    for name, baseline_ops, ops in slower:
+      self.stdout.write( "%s: %.0f ops/sec, baseline %.0f\n" % ( name, ops, baseline_ops ) )
+    if slower:
+      raise CommandError( str( len( slower ) ) + " benchmarks regressed by more than " + str( int( options['tolerance'] * 100 ) ) + "%." )
+    self.stdout.write( "No regressions against the baseline.\n" )
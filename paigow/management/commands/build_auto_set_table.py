@@ -0,0 +1,37 @@
+# manage.py build_auto_set_table [--check]
+#
+# Run the auto-set strategies over every distinct set of four tiles and
+# save what they pick in paigow/tables/auto_set.json (see
+# pgautosettable.py).  With --check, don't write anything: just make
+# sure the saved table still agrees with the current strategy code.
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paigow.pgautosettable import PGAutoSetTable, s_auto_set_table_path
+
+class Command( BaseCommand ):
+
+  help = "Build (or check) the table of auto-set arrangements for every distinct set"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--check',
+      action = 'store_true',
+      dest = 'check',
+      default = False,
+      help = "Check the saved table against the current strategy code instead of building it" ),
+  )
+
+  def handle( self, *args, **options ):
+    if options['check']:
+      mismatches = PGAutoSetTable.mismatches( PGAutoSetTable.load() )
+      for strategy_name, key, table_arrangement, live_arrangement in mismatches:
+        self.stdout.write( strategy_name + " " + key + ": table has " + str( table_arrangement ) + ", strategy picks " + live_arrangement + "\n" )
+      if mismatches:
+        raise CommandError( str( len( mismatches ) ) + " sets in the auto-set table don't match the strategy; rebuild it." )
+      self.stdout.write( "Auto-set table matches the strategy.\n" )
+      return
+    table = PGAutoSetTable.build()
+    PGAutoSetTable.save( table )
+    self.stdout.write( "Saved " + str( len( PGAutoSetTable.all_keys() ) ) + " sets to " + s_auto_set_table_path + "\n" )
@@ -0,0 +1,32 @@
+# manage.py build_hand_label_script [--check]
+#
+# Save the labels of every hand as the static script game_play.html
+# loads (see pghandlabels.py), named with a hash of its contents, and
+# remove any older copy.  With --check, don't write anything: just make
+# sure the saved script is the one the current labels make.
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paigow.pghandlabels import script_is_current, script_path, save_script
+
+class Command( BaseCommand ):
+
+  help = "Build (or check) the static script with the label of every hand"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--check',
+      action = 'store_true',
+      dest = 'check',
+      default = False,
+      help = "Check the saved script against the current labels instead of building it" ),
+  )
+
+  def handle( self, *args, **options ):
+    if options['check']:
+      if not script_is_current():
+        raise CommandError( script_path() + " is missing or out of date; rebuild it." )
+      self.stdout.write( "Hand label script matches the labels.\n" )
+      return
+    self.stdout.write( "Saved the hand labels to " + save_script() + "\n" )
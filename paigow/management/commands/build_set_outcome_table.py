@@ -0,0 +1,28 @@
+# manage.py build_set_outcome_table [--processes N]
+#
+# Work out exactly how each split of every distinct set of four tiles
+# does against a random opponent, and save the win/push/loss counts in
+# paigow/tables/set_outcomes.json (see pgsolver.py).
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from paigow.pgsolver import build_table, save_table, s_set_outcome_table_path
+
+class Command( BaseCommand ):
+
+  help = "Build the table of exact win/push/loss counts for every split of every distinct set"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--processes',
+      type = 'int',
+      dest = 'processes',
+      default = None,
+      help = "Number of processes to use (default: one per core)" ),
+  )
+
+  def handle( self, *args, **options ):
+    table = build_table( processes = options['processes'] )
+    save_table( table )
+    self.stdout.write( "Saved " + str( len( table ) ) + " splits to " + s_set_outcome_table_path + "\n" )
@@ -0,0 +1,20 @@
+# manage.py rebuild_player_stats
+#
+# Work out every player's win/loss record, overall and against each
+# opponent (see models/pgstats.py), from the whole game history, and
+# replace the stored records with them.  Needed once for games played
+# before the records were kept, or if they ever drift.
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from paigow.models.pgstats import rebuild_stats
+
+class Command( BaseCommand ):
+
+  help = "Rebuild the players' win/loss records from all the games"
+
+  def handle( self, *args, **options ):
+    with transaction.commit_on_success():
+      num_players, num_pairs = rebuild_stats()
+    self.stdout.write( "Rebuilt the records of " + str( num_players ) + " players and " + str( num_pairs ) + " head-to-head pairs\n" )
@@ -0,0 +1,27 @@
+# manage.py rebuild_scores [GAME_ID ...]
+#
+# Fill in the running scores and per-deal score snapshots (see
+# models/pgscore.py) from the deals' own scores, for the games named or
+# for every game.  Needed once for games played before the running
+# scores existed.
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from paigow.models import PGGame, PGGameScore
+
+class Command( BaseCommand ):
+
+  args = "[game id ...]"
+  help = "Rebuild the running scores of games from their deals"
+
+  def handle( self, *args, **options ):
+    games = PGGame.objects.all()
+    if args:
+      games = games.filter( id__in = [ int( arg ) for arg in args ] )
+    num_games = 0
+    for game in games:
+      with transaction.commit_on_success():
+        PGGameScore.rebuild_for_game( game )
+      num_games += 1
+    self.stdout.write( "Rebuilt the scores of " + str( num_games ) + " games\n" )
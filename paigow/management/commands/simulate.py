@@ -0,0 +1,56 @@
+# manage.py simulate [--games N] [--seed S] [--processes P] [--engines E0,E1] [--json FILE]
+#
+# Play computer-vs-computer games in memory (see pgsimulator.py) and
+# report how fast they went and how the seats and set slots did.  Each
+# seat can use a different strategy engine (see pgengine.py).
+
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paigow.pgsimulator import simulate, report, s_default_engines
+
+class Command( BaseCommand ):
+
+  help = "Play computer-vs-computer games in memory and report the results"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--games', type = 'int', dest = 'games', default = 1000,
+      help = "Number of games to play (default 1000)" ),
+    make_option( '--seed', type = 'int', dest = 'seed', default = 0,
+      help = "Seed for the random streams (default 0)" ),
+    make_option( '--processes', type = 'int', dest = 'processes', default = None,
+      help = "Number of processes (default: one per CPU)" ),
+    make_option( '--engines', dest = 'engines', default = ",".join( s_default_engines ),
+      help = "The strategy engines for seat 0 and seat 1, comma-separated" ),
+    make_option( '--json', dest = 'json', default = None,
+      help = "Also write the results as JSON to this file" ),
+  )
+
+  def handle( self, *args, **options ):
+    engines = options['engines'].split( ',' )
+    if len( engines ) == 1:
+      engines = engines * 2
+    if len( engines ) != 2:
+      raise CommandError( "--engines takes one engine for each of the two seats" )
+    try:
+      totals, seconds = simulate( options['games'], options['seed'], options['processes'], engines = engines )
+    except ValueError, e:
+      raise CommandError( str( e ) )
+    summary = report( totals, seconds )
+    self.stdout.write( "%d games, %d deals in %.2fs: %.1f games/sec\n" % ( summary['games'], summary['deals'], seconds, summary['games_per_second'] ) )
+    self.stdout.write( "deals per game: %.2f\n" % summary['deals_per_game'] )
+    self.stdout.write( "seat 0 wins %.2f%% of games (+/- %.2f%%)\n" % ( 100 * summary['seat0_game_win_rate'], 100 * summary['seat0_game_win_interval'] ) )
+    self.stdout.write( "points per deal: seat 0 %.3f, seat 1 %.3f; seat 0 - seat 1: %.3f (+/- %.3f)\n" % (
+      summary['points_per_deal'][0], summary['points_per_deal'][1],
+      summary['seat0_points_diff_per_deal'], summary['seat0_points_diff_interval'] ) )
+    for slot in summary['slots']:
+      self.stdout.write( "%d-point set: seat 0 %.2f%% (+/- %.2f%%), push %.2f%%, seat 1 %.2f%% (+/- %.2f%%)\n" % (
+        slot['points'],
+        100 * slot['seat0_win_rate'], 100 * slot['seat0_win_interval'],
+        100 * slot['push_rate'],
+        100 * slot['seat1_win_rate'], 100 * slot['seat1_win_interval'] ) )
+    if options['json']:
+      with open( options['json'], 'w' ) as json_file:
+        json.dump( summary, json_file, indent = 2 )
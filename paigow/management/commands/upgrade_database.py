@@ -0,0 +1,50 @@
+# manage.py upgrade_database [--sql]
+#
+# Bring a database from before the engines, seeds, running scores,
+# records and versions up to date (see pgupgrade.py): add the missing
+# columns, make the missing tables, and fill the new tables in from the
+# games already played.  Only what's missing is done, so it's safe to
+# run again.  With --sql, just print the ALTER TABLE statements for the
+# missing columns.
+
+from optparse import make_option
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from paigow.pgupgrade import missing_columns, missing_tables, add_column_sql, add_missing_columns
+from paigow.pgupgrade import set_computer_engines, s_score_models, s_stats_models
+
+class Command( BaseCommand ):
+
+  help = "Add the columns and tables added since the database was made, and fill them in"
+
+  option_list = BaseCommand.option_list + (
+    make_option( '--sql',
+      action = 'store_true',
+      dest = 'sql',
+      default = False,
+      help = "Print the ALTER TABLE statements for the missing columns instead of running them" ),
+  )
+
+  def handle( self, *args, **options ):
+    if options['sql']:
+      for model, field_name in missing_columns():
+        self.stdout.write( add_column_sql( model, field_name ) + "\n" )
+      return
+
+    for statement in add_missing_columns():
+      self.stdout.write( statement + "\n" )
+    if set_computer_engines():
+      self.stdout.write( "The computer player sets its tiles with the table engine\n" )
+
+    # syncdb makes the missing tables; the ones that are new are then
+    # filled in from the games.
+    new_scores = missing_tables( s_score_models )
+    new_stats = missing_tables( s_stats_models )
+    call_command( 'syncdb', interactive = False, verbosity = 0 )
+    if new_scores:
+      call_command( 'rebuild_scores' )
+    if new_stats:
+      call_command( 'rebuild_player_stats' )
+    self.stdout.write( "The database is up to date.\n" )
@@ -14,10 +14,14 @@ from pggame   import PGGame
 from pgplayer import PGPlayer
 from pgdeal   import PGDeal
 from pgplayerindeal import PGPlayerInDeal
+from pgscore  import PGGameScore, PGDealScore
+from pgstats  import PGPlayerStats, PGHeadToHead
 
 from pgtile   import PGTileTest
 from pggame   import PGGameTest
 from pgplayer import PGPlayerTest
 from pgdeal   import PGDealTest
 from pgplayerindeal import PGPlayerInDealTest
+from pgscore  import PGScoreTest
+from pgstats  import PGStatsTest
 
@@ -17,25 +17,54 @@
 # (like the mixed pairs or gee joon tiles) by assuming the first
 # tile is one of them and the second is another, in the order
 # they appear in the deck.
+#
+# If s_compact_decks is set, new deals store the deck as its
+# permutation rank instead (see compact_deck in pgpacked.py): 16 bytes,
+# written as 22 base64 chars.  Both kinds can be read back, told apart
+# by their length, so it can be turned on with deals already stored.
+#
+# A deal never changes once it's dealt, so each one is decoded into its
+# tiles only once and kept in an LRU cache by ( game id, deal number );
+# PGDeal.decoded_tiles gets them without going to the database at all
+# when the deal is in the cache.
+
+import collections
+import threading
 
 from django.db import models
 
 from paigow.models import PGGame
 from pgtile import PGTile
 
+# store new decks as their compact permutation rank
+s_compact_decks = False
+
+# how many decoded deals we keep
+s_decoded_deals_size = 256
+
+# the decoded deals: ( game id, deal number ) -> tuple of 32 PGTiles,
+# least recently used first
+s_decoded_deals = collections.OrderedDict()
+s_decoded_deals_lock = threading.Lock()
+
 class PGDeal( models.Model ):
   
   # make sure the DB table name is what we want
   class Meta:
     app_label = 'paigow'
   
-  # This 32-character hex string defines the deal
+  # This 32-character string defines the deal (or 22 characters, if
+  # it's compact)
   deck = models.CharField( max_length = 32 )
   
   # it's always part of some game, and some deal number
   game = models.ForeignKey( PGGame )
   deal_number = models.PositiveSmallIntegerField()
   
+  # goes up every time a player's state or score in this deal changes
+  # (see PGGame.bump_version)
+  version = models.PositiveIntegerField( default = 0 )
+  
   # The deal shows as the ordering
   def __unicode__( self ):
     return "Deal " + str( self.deal_number ) + "in game " + str( self.game )
@@ -44,13 +73,86 @@ class PGDeal( models.Model ):
   # Create it with an array of tiles and the game/deal#
   @classmethod
   def create( cls, tiles, game, deal_number ):
-    from pgtile import PGTile
+    from paigow.pgpacked import deck_from_tile_chars
     deck_vals = ""
     for tile in tiles:
       deck_vals += tile.tile_char
+    return cls.create_with_deck( deck_from_tile_chars( deck_vals ), game, deal_number )
+  
+  
+  # Create it with a deck of tile indices (see pgdealer.py)
+  @classmethod
+  def create_with_deck( cls, deck, game, deal_number ):
+    from paigow.pgpacked import tile_chars_from_deck, compact_deck
+    if s_compact_decks:
+      deck_vals = compact_deck( deck )
+    else:
+      deck_vals = tile_chars_from_deck( deck )
     return cls( deck = deck_vals, game = game, deal_number = deal_number )
   
   
+  # the deck as a bytearray of tile indices, whichever way it's stored
+  def deck_indices( self ):
+    from paigow.pgpacked import deck_from_tile_chars, deck_from_compact, s_num_tiles
+    if len( self.deck ) == s_num_tiles:
+      return deck_from_tile_chars( self.deck )
+    return deck_from_compact( self.deck )
+  
+  
+  # the deck's tiles, decoded once and cached
+  def tiles( self ):
+    key = ( self.game_id, self.deal_number )
+    tiles = cached_decoded_deal( key )
+    if tiles is not None:
+      return tiles
+    from paigow.pgpacked import s_tile_chars
+    from paigow.pgtileregistry import PGTileRegistry
+    tiles = tuple( [ PGTileRegistry.with_char( s_tile_chars[index] ) for index in self.deck_indices() ] )
+    remember_decoded_deal( key, tiles )
+    return tiles
+  
+  
+  # the tiles for a game's deal, from the cache if we can, or None if
+  # there's no such deal
+  @classmethod
+  def decoded_tiles( cls, game, deal_number ):
+    tiles = cached_decoded_deal( ( game.id, deal_number ) )
+    if tiles is not None:
+      return tiles
+    deal = game.deal( deal_number )
+    if deal is None:
+      return None
+    return deal.tiles()
+  
+  
+  # forget whatever was cached for a newly saved deal's game and deal
+  # number (the ids of a deleted game's rows can come back).  Saving
+  # leaves the version alone, like PGGame.save.
+  def save( self, *args, **kwargs ):
+    from django.db.models import F
+    if self.pk is None:
+      super( PGDeal, self ).save( *args, **kwargs )
+    else:
+      version = self.version
+      self.version = F( 'version' )
+      try:
+        super( PGDeal, self ).save( *args, **kwargs )
+      finally:
+        self.version = version
+    with s_decoded_deals_lock:
+      s_decoded_deals.pop( ( self.game_id, self.deal_number ), None )
+  
+  
+  # ( game version, deal version ) for a deal in one query, or None if
+  # there's no such deal
+  @classmethod
+  def versions( cls, game_id, deal_number ):
+    versions = list( PGDeal.objects.filter( game = game_id, deal_number = deal_number ).values_list( 'game__version', 'version' )[:1] )
+    if versions:
+      return versions[0]
+    return None
+  
+  
   # return the tile for any given offset
   def tile( self, offset ):
     
@@ -58,8 +160,24 @@ class PGDeal( models.Model ):
     if ( offset < 0 or offset > 31 ):
       return None
     
-    # return the appropriate number
-    return PGTile.with_char( self.deck[offset] )
+    # return the appropriate tile
+    return self.tiles()[offset]
+
+
+# the cached tiles for ( game id, deal number ), or None; a hit makes
+# it the most recently used.
+def cached_decoded_deal( key ):
+  with s_decoded_deals_lock:
+    tiles = s_decoded_deals.pop( key, None )
+    if tiles is not None:
+      s_decoded_deals[key] = tiles
+    return tiles
+
+def remember_decoded_deal( key, tiles ):
+  with s_decoded_deals_lock:
+    s_decoded_deals[key] = tiles
+    while len( s_decoded_deals ) > s_decoded_deals_size:
+      s_decoded_deals.popitem( last = False )
 
 
 # ----------------------------------------------------
@@ -110,6 +228,38 @@ class PGDealTest( TestCase ):
     for i in range(32):
       self.assertIsNotNone( deals[0].tile(i) )
 
+  def test_decoded_tiles_are_cached( self ):
+    
+    from pggame import PGGame
+    
+    game = PGGame.create( 'test for deal' )
+    game.save()
+    deal = PGDeal.create( PGTile.objects.all(), game, 1 )
+    deal.save()
+    tiles = PGDeal.decoded_tiles( game, 1 )
+    self.assertEqual( "".join( [ tile.tile_char for tile in tiles ] ), deal.deck )
+    with self.assertNumQueries( 0 ):
+      self.assertIs( PGDeal.decoded_tiles( game, 1 ), tiles )
+    self.assertIsNone( PGDeal.decoded_tiles( game, 2 ) )
+
+  def test_compact_decks( self ):
+    
+    global s_compact_decks
+    from pggame import PGGame
+    from paigow.pgpacked import s_tile_chars
+    
+    game = PGGame.create( 'test for deal' )
+    game.save()
+    s_compact_decks = True
+    try:
+      deal = PGDeal.create( PGTile.objects.all().order_by( '-id' ), game, 1 )
+      deal.save()
+    finally:
+      s_compact_decks = False
+    self.assertEqual( len( deal.deck ), 22 )
+    deal = PGDeal.objects.get( game = game, deal_number = 1 )
+    self.assertEqual( "".join( [ tile.tile_char for tile in deal.tiles() ] ), s_tile_chars[::-1] )
+
 # run the test when invoked as a test (this is boilerplate
 # code at the bottom of every python file that has unit
 # tests in it).
@@ -61,15 +61,32 @@ class PGGame( models.Model ):
     max_length = 2,
     choices = GAME_STATE_CHOICES,
     default = ABOUT_TO_DEAL )
+  
+  # the strategy engine (see pgengine.py) computer players use in this
+  # game; if it's blank, each computer player uses its own.
+  strategy_engine = models.CharField( max_length = 20, blank = True, default = '' )
+
+  # the seed every deal in this game is shuffled from (see pgdealer.py),
+  # so any deal can be dealt again from the seed and its deal number.
+  # Games from before there were seeds get one at their next deal.
+  deal_seed = models.BigIntegerField( null = True )
+
+  # goes up every time the game's state changes: a player's state or
+  # score in one of its deals, or the game finishing (see bump_version).
+  # Each deal has its own too (PGDeal.version).  The polling views use
+  # them as ETags (see pgversion.py).
+  version = models.PositiveIntegerField( default = 0 )
 
   # allow creation with default fields
   @classmethod
   def create( cls, name ):
+    from paigow.pgdealer import new_game_seed
     return cls( 
       name = name,
       start_date = timezone.now(),
       game_state = PGGame.ABOUT_TO_DEAL,
-      current_deal_number = 0 )
+      current_deal_number = 0,
+      deal_seed = new_game_seed() )
 
   # If the Game is in the middle of a deal when the players have to pause,
   # then in order to resume we need to save enough information that they
@@ -105,6 +122,36 @@ class PGGame( models.Model ):
   def state( self ):
     return self.game_state
   
+  # only bump_version moves the version: saving a copy of the game that
+  # was read before a bump mustn't put the old version back.
+  def save( self, *args, **kwargs ):
+    from django.db.models import F
+    if self.pk is None:
+      super( PGGame, self ).save( *args, **kwargs )
+      return
+    version = self.version
+    self.version = F( 'version' )
+    try:
+      super( PGGame, self ).save( *args, **kwargs )
+    finally:
+      self.version = version
+  
+  # the state of this deal of the game changed; call it once the change
+  # is saved.  Anybody waiting on the deal (see pgnotify.py) is told.
+  @classmethod
+  def bump_version( cls, game_id, deal_number ):
+    from django.db.models import F
+    from pgdeal import PGDeal
+    from paigow.pgnotify import PGNotify
+    PGGame.objects.filter( id = game_id ).update( version = F( 'version' ) + 1 )
+    PGDeal.objects.filter( game = game_id, deal_number = deal_number ).update( version = F( 'version' ) + 1 )
+    PGNotify.changed( game_id, deal_number )
+  
+  # the strategy engine a computer player sets its tiles with in this game
+  def engine_for_player( self, player ):
+    from paigow.pgengine import engine_named
+    return engine_named( self.strategy_engine or player.strategy_engine )
+  
   # Return the all the players for this single game.  Always order them by
   # player IDs to make sure the list is already returned in the same order.
   def players( self ):
@@ -118,21 +165,39 @@ class PGGame( models.Model ):
       players.append( pgpid_player.player )
     return players
   
-  # Add a player to this game
+  # Add a player to this game.  The player's seat and the records that
+  # count the game (see pgstats.py) are made in one transaction.
   def add_player( self, player ):
+    from django.db import transaction
     from pgplayer import PGPlayer
     from pgplayerindeal import PGPlayerInDeal
     
-    # we can only add players when we have a deal.  If there hasn't been any deal,
-    # make one now.  This should only happen when adding the first player.
-    if ( self.current_deal_number == 0 ):
-      self.deal_tiles()
-    
-    # We can only add players during the first deal.
-    if ( self.current_deal_number != 1 ):
-      raise RuntimeError
+    with transaction.commit_on_success():
+      
+      # we can only add players when we have a deal.  If there hasn't been any deal,
+      # make one now.  This should only happen when adding the first player.
+      if ( self.current_deal_number == 0 ):
+        self.deal_tiles()
+      
+      # We can only add players during the first deal.
+      if ( self.current_deal_number != 1 ):
+        raise RuntimeError
+      
+      is_new_player = not self.player_in_deal( player, self.current_deal_number )
+      pgpid_player = self.assure_player_in_deal( player, self.current_deal_number )
+      
+      # once the second player is here the game counts in their records
+      if is_new_player:
+        opponent = player.opponent_for_game( self )
+        if opponent:
+          from pgstats import game_started
+          game_started( player, opponent )
     
-    pgpid_player = self.assure_player_in_deal( player, self.current_deal_number )
+    # the new seat was told about inside the transaction, before anybody
+    # else could see it; tell them again now they can.
+    if is_new_player:
+      from paigow.pgnotify import PGNotify
+      PGNotify.changed( self.id, self.current_deal_number )
   
   
   # Get the deal given the deal number
@@ -160,21 +225,23 @@ class PGGame( models.Model ):
   # shuffle the deck and save it as the current deal
   def deal_tiles( self ):
     
-    from pgtile import PGTile
     from pgdeal import PGDeal
+    from paigow.pgdealer import new_game_seed, deck_for_deal
     
     # We had better be about to deal
     if ( self.game_state != PGGame.ABOUT_TO_DEAL ):
       raise Exception( 'Trying to deal in wrong state!' )
     
-    # get a shuffled set of tiles
-    tiles = PGTile.get_shuffled_tiles()
-    
     # it's a new deal number
     self.current_deal_number += 1
     
+    # shuffle the deck for this deal from the game's seed
+    if self.deal_seed is None:
+      self.deal_seed = new_game_seed()
+    deck = deck_for_deal( self.deal_seed, self.current_deal_number )
+    
     # remember this deal
-    deal = PGDeal.create( tiles, self, self.current_deal_number )
+    deal = PGDeal.create_with_deck( deck, self, self.current_deal_number )
     deal.save()
     
     # game is not about to deal anymore
@@ -187,7 +254,7 @@ class PGGame( models.Model ):
   def assure_player_in_deal( self, player, deal_number ):
     from pgplayerindeal import PGPlayerInDeal
     from paigow.pgset import PGSet
-    from paigow.pgstrategy import PGStrategy
+    from paigow.pgtrace import PGTrace
     
     pgpid_player = self.player_in_deal( player, deal_number )
     
@@ -206,13 +273,14 @@ class PGGame( models.Model ):
         index = 1
       
       # Create the hands and fill them.
-      deal = self.deal( deal_number )
+      from pgdeal import PGDeal
+      tiles = PGDeal.decoded_tiles( self, deal_number )
       sets = []
       for i in range(3):
-        set = PGSet.create( [ deal.tile( index ),
-                              deal.tile( index + 2 ),
-                              deal.tile( index + 4 ),
-                              deal.tile( index + 6 ),
+        set = PGSet.create( [ tiles[index],
+                              tiles[index + 2],
+                              tiles[index + 4],
+                              tiles[index + 6],
                             ]
                           )
         #from paigow.pgstrategy import auto_set_numerical
@@ -221,8 +289,12 @@ class PGGame( models.Model ):
         index += 8
       
       # if the player is a computer, then set the tiles.
-      if player.name == "computer":
-        sets = PGStrategy.auto_set( sets )
+      if player.is_computer():
+        if PGTrace.enabled:
+          PGTrace.begin_deal( self.id, deal_number )
+        sets = self.engine_for_player( player ).auto_set( sets )
+        if PGTrace.enabled:
+          PGTrace.end_deal()
       
       # remember what hands were dealt; when it comes time for
       # the player to say how they set, we want to verify that
@@ -233,9 +305,11 @@ class PGGame( models.Model ):
       pgpid_player.save()
       
       # the computer is done right away, always.
-      if player.name == "computer":
+      if player.is_computer():
         pgpid_player.player_is_ready( sets[0].tile_chars(), sets[1].tile_chars(), sets[2].tile_chars() )
         pgpid_player.save()
+      else:
+        PGGame.bump_version( self.id, deal_number )
     
     return pgpid_player
 
@@ -298,17 +372,15 @@ class PGGame( models.Model ):
     for player in players:
       self.assure_player_in_deal( player, self.current_deal_number)
   
+  # the player's score before this deal; the running scores are kept
+  # up to date as deals are scored (see pgscore.py)
   def score_as_of_deal_for_player( self, player, deal_number ):
-    from pgplayerindeal import PGPlayerInDeal
-    pgpids = PGPlayerInDeal.objects.filter( game = self, player = player )
-    score = 0
-    for pgpid in pgpids:
-      if ( pgpid.deal_number < deal_number ):
-        score = score + pgpid.score()
-    return score
+    from pgscore import PGGameScore
+    return PGGameScore.score_as_of_deal_for_player( self, player, deal_number )
   
   def score_for_player( self, player ):
-    return self.score_as_of_deal_for_player( player, self.current_deal_number + 1 )
+    from pgscore import PGGameScore
+    return PGGameScore.score_for_player( self, player )
   
   def winner( self ):
     winner = None
@@ -352,7 +424,7 @@ class PGGame( models.Model ):
     # other play may be about to be in the deal.
     pgpid_opponent = self.player_in_deal( player.opponent_for_deal( self, deal_number ), deal_number )
     if not pgpid_opponent:
-      if player.name == "computer":
+      if player.is_computer():
         return
       else:
         raise ValueError
@@ -371,12 +443,21 @@ class PGGame( models.Model ):
     self.check_game_over()
   
   def check_game_over( self ):
+    if ( self.game_state == PGGame.GAME_OVER ):
+      return True
+    scores = {}
+    for player in self.players():
+      scores[player.id] = self.score_for_player( player )
+    return self.check_game_over_for_scores( scores )
+  
+  # check_game_over, for callers that already have the players' game
+  # scores, as { player id: score }
+  def check_game_over_for_scores( self, scores ):
     if ( self.game_state == PGGame.GAME_OVER ):
       return True
     winning_score = 0
     num_with_max_score = 0
-    for player in self.players():
-      player_score = self.score_for_player( player )
+    for player_score in scores.values():
       if player_score >= s_game_goal:
         if player_score > winning_score:
           num_with_max_score = 1
@@ -384,11 +465,30 @@ class PGGame( models.Model ):
         elif player_score == winning_score:
           num_with_max_score = num_with_max_score + 1
     if num_with_max_score == 1:
-      self.finish_date = timezone.now()
-      self.game_state = PGGame.GAME_OVER
-      self.save()
+      self.finish_game()
       return True
     return False
+  
+  # the game is over: mark it so, and count it in the players' records
+  # (see pgstats.py).  Only the request that actually changes the state
+  # counts it, even if two get here at once.
+  def finish_game( self ):
+    from django.db import transaction
+    from pgstats import game_finished
+    self.finish_date = timezone.now()
+    with transaction.commit_on_success():
+      finished = PGGame.objects.filter( id = self.id ).exclude( game_state = PGGame.GAME_OVER ).update(
+        game_state = PGGame.GAME_OVER, finish_date = self.finish_date )
+      self.game_state = PGGame.GAME_OVER
+      self.save()
+      players = self.players()
+      if finished and len( players ) == 2:
+        if self.score_for_player( players[0] ) > self.score_for_player( players[1] ):
+          game_finished( players[0], players[1] )
+        else:
+          game_finished( players[1], players[0] )
+    if finished:
+      PGGame.bump_version( self.id, self.current_deal_number )
 
 # ----------------------------------------------------
 # Test PGGame class
@@ -17,6 +17,10 @@ class PGPlayer( models.Model ):
   email = models.CharField( max_length = 100 )
   password = models.CharField( max_length = 100 )
   
+  # the strategy engine (see pgengine.py) this player sets its tiles
+  # with; only computer players have one.
+  strategy_engine = models.CharField( max_length = 20, blank = True, default = '' )
+  
   # This will make the object return value print out as
   # the name of the tile.
   def __unicode__( self ):
@@ -38,6 +42,12 @@ class PGPlayer( models.Model ):
     else:
       return None
   
+  # computer players set their own tiles with a strategy engine.  The
+  # player named "computer" always is one, even in a database from before
+  # there were engines (it gets the default engine, see pgengine.py).
+  def is_computer( self ):
+    return bool( self.strategy_engine ) or self.name == "computer"
+  
   # convenience to get all players except this id (i.e. all possible opponents).
   def all_possible_opponents( self ):
     return PGPlayer.objects.exclude( id = self.id )
@@ -62,15 +72,11 @@ class PGPlayer( models.Model ):
     for pgpig in pgpigs:
       yield pgpig.game
 
-  # return all the opponents this player has or is playing against.
+  # return all the opponents this player has or is playing against, in
+  # the order they first played (see pgstats.py).
   def all_opponents_in_all_games( self ):
-    opponents = []
-    games = self.games()
-    for game in games:
-      opponent = self.opponent_for_game( game )
-      if not opponent in opponents:
-        opponents.append( opponent )
-    return opponents
+    from pgstats import PGHeadToHead
+    return PGHeadToHead.opponents_of_player( self )
   
   # return all the games for a given opponent
   def games_against_opponent( self, opponent ):
@@ -80,28 +86,15 @@ class PGPlayer( models.Model ):
         games.append( game )
     return games
   
+  # ( wins, losses, in progress ) against this opponent
   def record_against_opponent( self, opponent ):
-    wins = 0
-    losses = 0
-    in_progress = 0
-    games = self.games_against_opponent( opponent )
-    for game in games:
-      winner = game.winner()
-      if not winner:
-        in_progress += 1
-      elif winner == self:
-        wins += 1
-      else:
-        losses += 1
-    return wins, losses, in_progress
+    from pgstats import PGHeadToHead
+    return PGHeadToHead.record_against_opponent( self, opponent )
   
+  # ( wins, losses ) against everybody
   def overall_record( self ):
-    wins, losses = 0, 0
-    for opponent in self.all_opponents_in_all_games():
-      o_wins, o_losses, o_in_progress = self.record_against_opponent( opponent )
-      wins += o_wins
-      losses += o_losses
-      
+    from pgstats import PGPlayerStats
+    wins, losses, in_progress = PGPlayerStats.record_for_player( self )
     return wins, losses
 
 # ----------------------------------------------------
@@ -139,6 +132,22 @@ class PGPlayerTest( TestCase ):
   def test_with_id( self ):
     self.assertEqual( PGPlayer.with_id( self.test_player.id ), self.test_player )
   
+  def test_is_computer( self ):
+    from paigow.pgengine import PGTableEngine, PGSolverEngine
+    computer = PGPlayer.objects.get( name = 'computer' )
+    self.assertTrue( computer.is_computer() )
+    self.assertFalse( self.test_player.is_computer() )
+    game = self.create_game_for_test()
+    self.assertEqual( game.engine_for_player( computer ), PGTableEngine )
+    game.strategy_engine = 'solver'
+    self.assertEqual( game.engine_for_player( computer ), PGSolverEngine )
+  
+    # the computer from before there were engines
+    computer.strategy_engine = ''
+    self.assertTrue( computer.is_computer() )
+    game.strategy_engine = ''
+    self.assertEqual( game.engine_for_player( computer ), PGTableEngine )
+  
   def test_all_possible_opponents( self ):
     self.assertEqual( len(self.test_player.all_possible_opponents()), 1 ) # computer should be there
     other_guy = PGPlayer.create( "other_guy", "foo@bar.com", "xxx" )
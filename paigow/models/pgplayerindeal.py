@@ -82,9 +82,21 @@ class PGPlayerInDeal(models.Model):
   def score( self ):
     return self.player_score
   
+  # add points to this deal's score, and to the player's running score
+  # in the game (see pgscore.py), together; it's a new version of the
+  # game and deal (see pgversion.py).
   def add_to_score( self, new_points ):
+    from django.db import transaction
+    with transaction.commit_on_success():
+      self.add_points_to_score( new_points )
+    PGGame.bump_version( self.game_id, self.deal_number )
+  
+  # add_to_score, for callers that are already in a transaction
+  def add_points_to_score( self, new_points ):
+    from pgscore import PGGameScore
     self.player_score += new_points
     self.save()
+    PGGameScore.add_points( self.game, self.player, self.deal_number, new_points )
   
   def state( self ):
     return self.deal_state
@@ -126,18 +138,27 @@ class PGPlayerInDeal(models.Model):
       raise ValueError
     return PGSet.create_with_tile_chars( pgset )
   
+  # this player's state changed: it's a new version of the game and
+  # deal (see pgversion.py), and anybody waiting on the deal (see
+  # pgnotify.py) wants to know.
+  def state_changed( self ):
+    PGGame.bump_version( self.game_id, self.deal_number )
+  
   def player_is_previewing_hands( self ):
     self.deal_state = PGPlayerInDeal.PREVIEW_HANDS
     self.save()
+    self.state_changed()
     
   def player_has_unpreviewed_hands( self ):
     self.deal_state = PGPlayerInDeal.SETTING_TILES
     self.save()
+    self.state_changed()
     
   def tiles_were_requested( self ):
     if ( self.deal_state == PGPlayerInDeal.NOT_READY ):
       self.deal_state = PGPlayerInDeal.SETTING_TILES
       self.save()
+      self.state_changed()
   
   def which_set_is_this( self, test_set_chars ):
     from paigow.pgset import PGSet
@@ -162,40 +183,47 @@ class PGPlayerInDeal(models.Model):
       self.set3 = set3_chars
       self.deal_state = PGPlayerInDeal.READY
       self.save()
+      
+      # score the deal (and maybe finish the game) before telling
+      # anybody, so what they read is the deal after it
       self.game.player_has_set_his_tiles( self.player, self.deal_number )
+      self.state_changed()
     else:
       #print "Player " + str( self.player) + " is ready in game " + str( self.game ) + " but the sets do not compute!"
       raise ValueError
   
   def tile_dots( self, pgtile_size ):
-    from paigow.pgset import PGSet
     import json
-    ret_val = []
-    sets = self.sets()
-    for pgset in sets:
-      set_val = []
-      for tile in pgset.tiles:
-        dot_dicts = []
-        dots = tile.dots()
-        for dot in dots:
-          dot_dicts.append( dot.dict() )
-        set_val.append( dot_dicts )
-      ret_val.append( set_val )
-    return json.dumps( ret_val )
+    return json.dumps( self.tile_dot_dicts( pgtile_size ) )
+  
+  # the dots of every tile of every set, as lists of dicts for tiles of
+  # this size.  The dicts are shared (see the dot payloads in pgdot.py).
+  def tile_dot_dicts( self, pgtile_size ):
+    from paigow.pgdot import tile_dot_payload
+    return [ [ tile_dot_payload( tile_char, pgtile_size ) for tile_char in set_chars ]
+             for set_chars in ( self.set1, self.set2, self.set3 ) ]
+  
+  # the tile chars of all three sets, for the compact reveal (see
+  # pgsnapshot.py)
+  def tile_chars( self ):
+    return self.set1 + self.set2 + self.set3
   
   def win_lose_string_against( self, pgpid_opponent ):
     # only do it if both are ready.
     if ( self.state() != PGPlayerInDeal.READY or pgpid_opponent.state() != PGPlayerInDeal.READY ):
       print "Asking for win-lose string when both players aren't ready.  Player state " + str(self.state()) + " opponent_state: " + str(opponent.state()) + "\n"
       raise ValueError
-    # for each set, return W for win, . for push and L for loss
+    # for each set, return W for win, . for push and L for loss.  Compare
+    # them packed (see pgpacked.py), no need to build the sets.
+    from paigow.pgpacked import packed_from_tile_chars, compare_sets
     ret_val = ""
-    player_sets = self.sets()
-    opponent_sets = pgpid_opponent.sets()
+    player_sets = ( self.set1, self.set2, self.set3 )
+    opponent_sets = ( pgpid_opponent.set1, pgpid_opponent.set2, pgpid_opponent.set3 )
     for player_set, opponent_set in zip(player_sets, opponent_sets):
-      if ( player_set > opponent_set ):
+      result = compare_sets( packed_from_tile_chars( player_set ), packed_from_tile_chars( opponent_set ) )
+      if ( result > 0 ):
         ret_val += "W"
-      elif ( player_set < opponent_set):
+      elif ( result < 0 ):
         ret_val += "L"
       else:
         ret_val += "."
@@ -203,18 +231,26 @@ class PGPlayerInDeal(models.Model):
   
   def record_score_char_for_set( self, pgpid_opponent, ch, num_points ):
     if ch == 'W':
-      self.add_to_score( num_points )
+      self.add_points_to_score( num_points )
     elif ch == 'L':
-      pgpid_opponent.add_to_score( num_points )
+      pgpid_opponent.add_points_to_score( num_points )
   
+  # score the deal; both players' deal and running scores change in one
+  # transaction.
   def record_scores_against( self, pgpid_opponent ):
-    wl_str = self.win_lose_string_against( pgpid_opponent )
-    num_points = 3
-    for ch in wl_str:
-      self.record_score_char_for_set( pgpid_opponent, ch, num_points )
-      num_points = num_points - 1
-    self.save()
-    pgpid_opponent.save()
+    from django.db import transaction
+    with transaction.commit_on_success():
+      wl_str = self.win_lose_string_against( pgpid_opponent )
+      num_points = 3
+      for ch in wl_str:
+        self.record_score_char_for_set( pgpid_opponent, ch, num_points )
+        num_points = num_points - 1
+      
+      # make sure both have a snapshot for this deal, even if they
+      # didn't score
+      from pgscore import PGGameScore
+      PGGameScore.ensure_snapshot( self.game, self.player, self.deal_number )
+      PGGameScore.ensure_snapshot( pgpid_opponent.game, pgpid_opponent.player, pgpid_opponent.deal_number )
 
 # ----------------------------------------------------
 # Test PGPlayerInDeal class
@@ -266,6 +302,16 @@ class PGPlayerInDealTest( TestCase ):
     self.assertEqual( pid.which_set_is_this( self.set3.tile_chars() ), 3 )
     self.assertEqual( pid.which_set_is_this( self.set4.tile_chars() ), 0 )
 
+  def test_win_lose_string( self ):
+    from paigow.pgset import PGSet
+    pid = PGPlayerInDeal.create( self.game, self.player, 0 )
+    pid.set_dealt_sets( [ PGSet.create_with_tile_chars( chars ) for chars in ( "AbLn", "FgOj", "CcDd" ) ] )
+    pid.deal_state = PGPlayerInDeal.READY
+    pido = PGPlayerInDeal.create( self.game, self.player, 0 )
+    pido.set_dealt_sets( [ PGSet.create_with_tile_chars( chars ) for chars in ( "FgOj", "AbLn", "CcDd" ) ] )
+    pido.deal_state = PGPlayerInDeal.READY
+    self.assertEqual( pid.win_lose_string_against( pido ), "WL." )
+  
   def test_player_is_ready( self ):
     from paigow.pgset import PGSet
     pid = PGPlayerInDeal.create( self.game, self.player, 0 )
@@ -0,0 +1,179 @@
+# This file defines the running scores of the players in a game, kept
+# alongside the per-deal scores in PGPlayerInDeal so that reading a
+# score is one indexed lookup instead of adding up every deal.
+#
+#   PGGameScore   each player's total score in the game so far
+#   PGDealScore   each player's total score as of the end of each deal
+#                 (including that deal), for showing the score as it
+#                 was at some earlier deal
+#
+# Both are only changed by PGPlayerInDeal.add_to_score (and
+# record_scores_against), in the same transaction as the deal's own
+# score, so they always agree with the sum of the deals.  'manage.py
+# rebuild_scores' fills them in from PGPlayerInDeal for games played
+# before they existed.
+
+from django.db import models
+from django.db.models import F
+
+from pggame   import PGGame
+from pgplayer import PGPlayer
+
+class PGGameScore( models.Model ):
+
+  # make sure the DB table name is what we want
+  class Meta:
+    app_label = 'paigow'
+    unique_together = ( ( 'game', 'player' ), )
+
+  game = models.ForeignKey( PGGame )
+  player = models.ForeignKey( PGPlayer )
+  score = models.IntegerField( default = 0 )
+
+  def __unicode__( self ):
+    return "PGGameScore: " + str( self.score ) + " for player " + str( self.player ) + " in " + str( self.game )
+
+  # the player's score in the game so far
+  @classmethod
+  def score_for_player( cls, game, player ):
+    scores = list( PGGameScore.objects.filter( game = game, player = player ).values_list( 'score', flat = True ) )
+    if scores:
+      return scores[0]
+    return 0
+
+  # the player's score as of the start of this deal (i.e. through the
+  # deal before it)
+  @classmethod
+  def score_as_of_deal_for_player( cls, game, player, deal_number ):
+    scores = list( PGDealScore.objects.filter( game = game, player = player, deal_number__lt = deal_number )
+                     .order_by( '-deal_number' ).values_list( 'score', flat = True )[:1] )
+    if scores:
+      return scores[0]
+    return 0
+
+  # make sure the player has a running score in the game and a snapshot
+  # for this deal (starting from the one before it), even if they
+  # haven't scored.  Call this inside a transaction: get_or_create then
+  # uses a savepoint, so if two requests create the same row at once
+  # the loser just reads the winner's row.
+  @classmethod
+  def ensure_snapshot( cls, game, player, deal_number ):
+    game_score, created = PGGameScore.objects.get_or_create( game = game, player = player )
+    if not PGDealScore.objects.filter( game = game, player = player, deal_number = deal_number ).exists():
+      PGDealScore.objects.get_or_create( game = game, player = player, deal_number = deal_number,
+                                         defaults = { 'score': cls.score_as_of_deal_for_player( game, player, deal_number ) } )
+    return game_score
+
+  # add points the player scored in a deal to the running score and to
+  # the snapshots of this deal and any after it.  Call this inside the
+  # transaction that changes the deal's score; if there isn't one, it
+  # makes its own.
+  @classmethod
+  def add_points( cls, game, player, deal_number, points ):
+    from django.db import transaction
+    if not transaction.is_managed():
+      with transaction.commit_on_success():
+        return cls.add_points( game, player, deal_number, points )
+
+    game_score = cls.ensure_snapshot( game, player, deal_number )
+    if points:
+      PGGameScore.objects.filter( pk = game_score.pk ).update( score = F( 'score' ) + points )
+      PGDealScore.objects.filter( game = game, player = player, deal_number__gte = deal_number ).update( score = F( 'score' ) + points )
+
+  # fill in the running scores and snapshots of a game from its deals
+  @classmethod
+  def rebuild_for_game( cls, game ):
+    from pgplayerindeal import PGPlayerInDeal
+    PGGameScore.objects.filter( game = game ).delete()
+    PGDealScore.objects.filter( game = game ).delete()
+    totals = {}
+    for pgpid in PGPlayerInDeal.objects.filter( game = game ).order_by( 'deal_number' ):
+      totals[pgpid.player_id] = totals.get( pgpid.player_id, 0 ) + pgpid.score()
+      PGDealScore.objects.create( game = game, player_id = pgpid.player_id, deal_number = pgpid.deal_number,
+                                  score = totals[pgpid.player_id] )
+    for player_id, score in totals.items():
+      PGGameScore.objects.create( game = game, player_id = player_id, score = score )
+
+
+class PGDealScore( models.Model ):
+
+  # make sure the DB table name is what we want
+  class Meta:
+    app_label = 'paigow'
+    unique_together = ( ( 'game', 'player', 'deal_number' ), )
+
+  game = models.ForeignKey( PGGame )
+  player = models.ForeignKey( PGPlayer )
+  deal_number = models.PositiveSmallIntegerField()
+
+  # the player's total score in the game through this deal
+  score = models.IntegerField( default = 0 )
+
+  def __unicode__( self ):
+    return "PGDealScore: " + str( self.score ) + " after deal " + str( self.deal_number ) + " for player " + str( self.player ) + " in " + str( self.game )
+
+
+# ----------------------------------------------------
+# Test PGGameScore class
+
+from django.test import TestCase
+
+class PGScoreTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    self.game = PGGame.create( "score test" )
+    self.game.save()
+    self.player1 = PGPlayer.create( "scorer1", "a@b.com", "xxx" )
+    self.player1.save()
+    self.player2 = PGPlayer.create( "scorer2", "c@d.com", "xxx" )
+    self.player2.save()
+
+  def play_deal( self, deal_number, points1, points2 ):
+    from pgplayerindeal import PGPlayerInDeal
+    for player, points in ( ( self.player1, points1 ), ( self.player2, points2 ) ):
+      pgpid = PGPlayerInDeal.create( self.game, player, deal_number )
+      pgpid.save()
+      pgpid.add_to_score( points )
+
+  # the old way: add up the deals
+  def summed_score( self, player, deal_number ):
+    from pgplayerindeal import PGPlayerInDeal
+    return sum( [ pgpid.score() for pgpid in PGPlayerInDeal.objects.filter( game = self.game, player = player, deal_number__lt = deal_number ) ] )
+
+  def test_running_scores( self ):
+    self.play_deal( 1, 3, 3 )
+    self.play_deal( 2, 0, 6 )
+    self.play_deal( 4, 5, 1 )
+    self.assertEqual( PGGameScore.score_for_player( self.game, self.player1 ), 8 )
+    self.assertEqual( PGGameScore.score_for_player( self.game, self.player2 ), 10 )
+    for deal_number in range( 6 ):
+      for player in ( self.player1, self.player2 ):
+        self.assertEqual( PGGameScore.score_as_of_deal_for_player( self.game, player, deal_number ),
+                          self.summed_score( player, deal_number ) )
+    with self.assertNumQueries( 1 ):
+      self.assertEqual( self.game.score_as_of_deal_for_player( self.player2, 3 ), 9 )
+
+  def test_ensure_snapshot( self ):
+    self.play_deal( 1, 3, 0 )
+    PGGameScore.ensure_snapshot( self.game, self.player1, 2 )
+    PGGameScore.ensure_snapshot( self.game, self.player1, 2 )
+    self.assertEqual( list( PGDealScore.objects.filter( game = self.game, player = self.player1, deal_number = 2 ).values_list( 'score', flat = True ) ), [ 3 ] )
+    self.assertEqual( PGGameScore.score_for_player( self.game, self.player1 ), 3 )
+
+  def test_rebuild( self ):
+    self.play_deal( 1, 3, 3 )
+    self.play_deal( 2, 1, 5 )
+    PGGameScore.objects.all().delete()
+    PGDealScore.objects.all().delete()
+    PGGameScore.rebuild_for_game( self.game )
+    self.assertEqual( PGGameScore.score_for_player( self.game, self.player2 ), 8 )
+    self.assertEqual( PGGameScore.score_as_of_deal_for_player( self.game, self.player1, 2 ), 3 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
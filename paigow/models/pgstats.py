@@ -0,0 +1,208 @@
+# This file defines the players' win/loss records, kept up to date as
+# games start and finish so the home page doesn't have to work them out
+# from every game the player has been in.
+#
+#   PGPlayerStats   each player's games won, lost and still going
+#   PGHeadToHead    the same, for each player against each opponent
+#                   (one row each way)
+#
+# A game counts as in progress from when its second player joins
+# (PGGame.add_player) and as won or lost from when it reaches GAME_OVER
+# (PGGame.check_game_over).  'manage.py rebuild_player_stats' works
+# them all out again from the games themselves.
+
+from django.db import models
+from django.db.models import F
+
+from pggame   import PGGame
+from pgplayer import PGPlayer
+
+class PGPlayerStats( models.Model ):
+
+  # make sure the DB table name is what we want
+  class Meta:
+    app_label = 'paigow'
+
+  player = models.ForeignKey( PGPlayer, unique = True )
+  wins = models.IntegerField( default = 0 )
+  losses = models.IntegerField( default = 0 )
+  in_progress = models.IntegerField( default = 0 )
+
+  def __unicode__( self ):
+    return "PGPlayerStats: " + str( self.wins ) + " - " + str( self.losses ) + " for player " + str( self.player )
+
+  # the player's ( wins, losses, in progress )
+  @classmethod
+  def record_for_player( cls, player ):
+    records = list( PGPlayerStats.objects.filter( player = player ).values_list( 'wins', 'losses', 'in_progress' ) )
+    if records:
+      return records[0]
+    return 0, 0, 0
+
+  # add to the player's counts
+  @classmethod
+  def add( cls, player, wins = 0, losses = 0, in_progress = 0 ):
+    stats, created = PGPlayerStats.objects.get_or_create( player = player )
+    PGPlayerStats.objects.filter( pk = stats.pk ).update(
+      wins = F( 'wins' ) + wins, losses = F( 'losses' ) + losses, in_progress = F( 'in_progress' ) + in_progress )
+
+
+class PGHeadToHead( models.Model ):
+
+  # make sure the DB table name is what we want
+  class Meta:
+    app_label = 'paigow'
+    unique_together = ( ( 'player', 'opponent' ), )
+
+  player = models.ForeignKey( PGPlayer, related_name = 'head_to_head_records' )
+  opponent = models.ForeignKey( PGPlayer, related_name = '+' )
+  wins = models.IntegerField( default = 0 )
+  losses = models.IntegerField( default = 0 )
+  in_progress = models.IntegerField( default = 0 )
+
+  def __unicode__( self ):
+    return "PGHeadToHead: " + str( self.wins ) + " - " + str( self.losses ) + " for player " + str( self.player ) + " against " + str( self.opponent )
+
+  # the player's ( wins, losses, in progress ) against the opponent
+  @classmethod
+  def record_against_opponent( cls, player, opponent ):
+    records = list( PGHeadToHead.objects.filter( player = player, opponent = opponent ).values_list( 'wins', 'losses', 'in_progress' ) )
+    if records:
+      return records[0]
+    return 0, 0, 0
+
+  # everybody the player has played, in the order they first played
+  @classmethod
+  def opponents_of_player( cls, player ):
+    return [ record.opponent for record in PGHeadToHead.objects.filter( player = player ).select_related( 'opponent' ).order_by( 'id' ) ]
+
+  @classmethod
+  def add( cls, player, opponent, wins = 0, losses = 0, in_progress = 0 ):
+    record, created = PGHeadToHead.objects.get_or_create( player = player, opponent = opponent )
+    PGHeadToHead.objects.filter( pk = record.pk ).update(
+      wins = F( 'wins' ) + wins, losses = F( 'losses' ) + losses, in_progress = F( 'in_progress' ) + in_progress )
+
+
+# ----------------------------------------------------
+# keeping them up to date; call these inside the transaction that
+# changes the game.
+
+# a game's second player has joined
+def game_started( player, opponent ):
+  for one, other in ( ( player, opponent ), ( opponent, player ) ):
+    PGPlayerStats.add( one, in_progress = 1 )
+    PGHeadToHead.add( one, other, in_progress = 1 )
+
+# a game in progress is over
+def game_finished( winner, loser ):
+  PGPlayerStats.add( winner, wins = 1, in_progress = -1 )
+  PGPlayerStats.add( loser, losses = 1, in_progress = -1 )
+  PGHeadToHead.add( winner, loser, wins = 1, in_progress = -1 )
+  PGHeadToHead.add( loser, winner, losses = 1, in_progress = -1 )
+
+# work out every record again from the games, a few queries over the
+# whole history streamed in id order rather than a query per game, and
+# replace what's in the tables with them.
+def rebuild_stats():
+  from django.db.models import Sum
+  from pgplayerindeal import PGPlayerInDeal
+
+  # the players in each two-player game, and their final scores
+  players = {}
+  for game_id, player_id in PGPlayerInDeal.objects.filter( deal_number = 1 ).order_by( 'game', 'id' ).values_list( 'game', 'player' ).iterator():
+    players.setdefault( game_id, [] ).append( player_id )
+  scores = {}
+  for row in PGPlayerInDeal.objects.values( 'game', 'player' ).annotate( total = Sum( 'player_score' ) ).order_by().iterator():
+    scores[( row['game'], row['player'] )] = row['total']
+
+  # ( wins, losses, in progress ) by player, and by ( player, opponent )
+  # in the order they first played
+  stats = {}
+  head_to_head = {}
+  head_to_head_order = []
+  def add( key, table, outcome ):
+    if key not in table:
+      table[key] = [ 0, 0, 0 ]
+      if table is head_to_head:
+        head_to_head_order.append( key )
+    table[key][outcome] += 1
+  for game_id, game_state in PGGame.objects.order_by( 'id' ).values_list( 'id', 'game_state' ).iterator():
+    game_players = players.get( game_id, [] )
+    if len( game_players ) != 2:
+      continue
+    player_id, opponent_id = game_players
+    if game_state == PGGame.GAME_OVER:
+      if scores.get( ( game_id, player_id ), 0 ) > scores.get( ( game_id, opponent_id ), 0 ):
+        outcomes = ( ( player_id, opponent_id, 0 ), ( opponent_id, player_id, 1 ) )
+      else:
+        outcomes = ( ( player_id, opponent_id, 1 ), ( opponent_id, player_id, 0 ) )
+    else:
+      outcomes = ( ( player_id, opponent_id, 2 ), ( opponent_id, player_id, 2 ) )
+    for one, other, outcome in outcomes:
+      add( one, stats, outcome )
+      add( ( one, other ), head_to_head, outcome )
+
+  PGHeadToHead.objects.all().delete()
+  PGPlayerStats.objects.all().delete()
+  PGPlayerStats.objects.bulk_create( [ PGPlayerStats( player_id = player_id, wins = record[0], losses = record[1], in_progress = record[2] )
+                                       for player_id, record in sorted( stats.items() ) ] )
+  PGHeadToHead.objects.bulk_create( [ PGHeadToHead( player_id = key[0], opponent_id = key[1], wins = head_to_head[key][0],
+                                                    losses = head_to_head[key][1], in_progress = head_to_head[key][2] )
+                                      for key in head_to_head_order ] )
+  return len( stats ), len( head_to_head )
+
+
+# ----------------------------------------------------
+# Test the player stats
+
+from django.test import TestCase
+
+class PGStatsTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    self.player1 = PGPlayer.create( "stats1", "a@b.com", "xxx" )
+    self.player1.save()
+    self.player2 = PGPlayer.create( "stats2", "c@d.com", "xxx" )
+    self.player2.save()
+    self.player3 = PGPlayer.create( "stats3", "e@f.com", "xxx" )
+    self.player3.save()
+
+  def play_game( self, player, opponent, finish = True ):
+    from pggame import s_game_goal
+    game = PGGame.create( "stats test" )
+    game.save()
+    game.add_player( player )
+    game.add_player( opponent )
+    if finish:
+      game.player_in_deal( player, 1 ).add_to_score( s_game_goal )
+      self.assertTrue( game.check_game_over() )
+      self.assertTrue( game.check_game_over() )
+    return game
+
+  def records( self ):
+    return ( [ PGPlayerStats.record_for_player( player ) for player in ( self.player1, self.player2, self.player3 ) ],
+             PGHeadToHead.record_against_opponent( self.player1, self.player2 ),
+             PGHeadToHead.record_against_opponent( self.player2, self.player1 ),
+             PGHeadToHead.opponents_of_player( self.player1 ) )
+
+  def test_records( self ):
+    self.play_game( self.player1, self.player2 )
+    self.play_game( self.player2, self.player1 )
+    self.play_game( self.player1, self.player2 )
+    self.play_game( self.player1, self.player3, finish = False )
+    self.assertEqual( self.player1.overall_record(), ( 2, 1 ) )
+    self.assertEqual( self.player1.record_against_opponent( self.player2 ), ( 2, 1, 0 ) )
+    self.assertEqual( self.player3.record_against_opponent( self.player1 ), ( 0, 0, 1 ) )
+    self.assertEqual( self.player1.all_opponents_in_all_games(), [ self.player2, self.player3 ] )
+    records = self.records()
+    self.assertEqual( rebuild_stats(), ( 3, 4 ) )
+    self.assertEqual( self.records(), records )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
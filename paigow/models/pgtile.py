@@ -101,15 +101,19 @@ class PGTile( models.Model ):
   #   return ret_val
   
   # return the tile with the given rank, taking into account whether
-  # or not it's the first one.
+  # or not it's the first one.  The tiles never change, so this (and
+  # the other with_xxx calls) come from the in-memory registry rather
+  # than the database.
   @classmethod
   def with_rank( cls, rank, is_first = True ):
-    return cls.get_tiles_matching( { 'tile_rank': rank }, is_first )
+    from paigow.pgtileregistry import PGTileRegistry
+    return PGTileRegistry.with_rank( rank, is_first )
   
   # return the tile with the given char
   @classmethod
   def with_char( cls, tile_char ):
-    return cls.objects.get( tile_char__exact = tile_char )
+    from paigow.pgtileregistry import PGTileRegistry
+    return PGTileRegistry.with_char( tile_char )
   
   # return a blank tile (not saved in database)
   @classmethod
@@ -129,7 +133,8 @@ class PGTile( models.Model ):
   # * 'i' prefix means case-insensitive
   @classmethod
   def with_name( cls, name, is_first = True ):
-    return cls.get_tiles_matching( { 'name__iexact': name }, is_first )
+    from paigow.pgtileregistry import PGTileRegistry
+    return PGTileRegistry.with_name( name, is_first )
   
   def is_teen_or_day( self ):
     return self.name == "teen" or self.name == "day"
@@ -172,14 +177,14 @@ class PGTile( models.Model ):
   #     return self.tile_rank > other.tile_rank
   
   
+  # a freshly shuffled deck, from a new seed (games deal from their own
+  # seeds; see pgdealer.py)
   @classmethod
   def get_shuffled_tiles( self ):
-    import random
-    all_tiles = list(PGTile.objects.all())
-    random.shuffle( all_tiles )
-    random.shuffle( all_tiles )
-    random.shuffle( all_tiles )
-    return all_tiles
+    from paigow.pgdealer import new_game_seed, shuffled_deck
+    from paigow.pgpacked import tile_chars_from_deck
+    from paigow.pgtileregistry import PGTileRegistry
+    return [ PGTileRegistry.with_char( ch ) for ch in tile_chars_from_deck( shuffled_deck( new_game_seed(), 1 ) ) ]
   
   
 # ----------------------------------------------------
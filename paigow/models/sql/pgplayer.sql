@@ -1 +1 @@
-INSERT INTO paigow_pgplayer (name, email, password) VALUES ( 'computer', 'computer@null.com', '3yeNhJgzxQ' );
+INSERT INTO paigow_pgplayer (name, email, password, strategy_engine) VALUES ( 'computer', 'computer@null.com', '3yeNhJgzxQ', 'table' );
@@ -0,0 +1,202 @@
+# This file defines the PGAutoSetTable python class.  Setting a set of
+# four tiles only depends on which tiles they are, not what order they
+# were dealt in, and there are only a few thousand distinct sets (by
+# tile rank).  So instead of running the strategy every time the
+# computer sets its tiles, we run it once for every distinct set and
+# remember the arrangement it picked.
+#
+# The table is built by 'manage.py build_auto_set_table' and saved as
+# JSON in paigow/tables.  It maps the set's key (its tile chars, lower-
+# cased and sorted, e.g. "abhp") to the four tile chars in the order
+# the strategy arranged them: high hand, then low hand, each high tile
+# first.  There's one such map for each way of auto-setting.
+
+import json
+import os
+
+from pgtileregistry import PGTileRegistry
+from pgset import PGSet
+
+s_auto_set_table_path = os.path.join( os.path.dirname( __file__ ), 'tables', 'auto_set.json' )
+
+# the names of the ways we can auto-set, as stored in the table
+HEURISTIC = 'heuristic'
+NUMERICAL = 'numerical'
+
+class PGAutoSetTable:
+
+  # the loaded table; None until first use, empty if there's no table file.
+  s_table = None
+
+  # the live strategy function for each way of auto-setting
+  @classmethod
+  def strategy_functions( cls ):
+    from paigow.pgstrategy import auto_set_heuristic, auto_set_numerical
+    return { HEURISTIC: auto_set_heuristic, NUMERICAL: auto_set_numerical }
+
+  # the key for a set of tile chars: lower-cased and sorted.  Since the
+  # tile chars go 'a' (teen) down to 'o' (mixed five) and then 'p' (gee
+  # joon), sorting them puts them in order of tile rank, highest first.
+  @classmethod
+  def key_for_tile_chars( cls, tile_chars ):
+    return PGSet.sort_tile_chars( tile_chars.lower() )
+
+  @classmethod
+  def key_for_set( cls, set ):
+    return cls.key_for_tile_chars( set.tile_chars() )
+
+  # every distinct set of four tiles, as keys: each of the sixteen ranks
+  # can be there at most twice.
+  @classmethod
+  def all_keys( cls ):
+    chars = "abcdefghijklmnop"
+    keys = []
+    def add_keys( start, key ):
+      if len( key ) == 4:
+        keys.append( key )
+        return
+      for index in range( start, len( chars ) ):
+        if key.count( chars[index] ) < 2:
+          add_keys( index, key + chars[index] )
+    add_keys( 0, "" )
+    return keys
+
+  # the (real) tiles for a key: the first of a kind is the upper-case
+  # tile, the second of a kind the lower-case tile.
+  @classmethod
+  def tiles_for_key( cls, key ):
+    tiles = []
+    for index, ch in enumerate( key ):
+      if ch in key[:index]:
+        tiles.append( PGTileRegistry.with_char( ch ) )
+      else:
+        tiles.append( PGTileRegistry.with_char( ch.upper() ) )
+    return tiles
+
+  # run the live strategy for one key and return the arrangement it
+  # picked.  The strategy returns the ordering relative to the tiles it
+  # was given (but may shuffle the set it was given along the way), so
+  # we give it its own copy and then arrange the original tiles.
+  @classmethod
+  def live_arrangement_for_key( cls, key, strategy_name ):
+    from paigow.pgstrategy import reorder_hands_for_setting
+    tiles = cls.tiles_for_key( key )
+    ordering = cls.strategy_functions()[strategy_name]( PGSet.create( list( tiles ) ) )
+    arranged = PGSet.create( list( tiles ) )
+    reorder_hands_for_setting( arranged, ordering )
+    return arranged.tile_chars().lower()
+
+  # run the live strategies over every distinct set
+  @classmethod
+  def build( cls ):
+    table = {}
+    keys = cls.all_keys()
+    for strategy_name in cls.strategy_functions():
+      arrangements = {}
+      for key in keys:
+        arrangements[key] = cls.live_arrangement_for_key( key, strategy_name )
+      table[strategy_name] = arrangements
+    return table
+
+  # return the list of ( strategy name, key, table arrangement, live arrangement )
+  # for every key where the table doesn't agree with the current code.
+  @classmethod
+  def mismatches( cls, table, keys = None ):
+    if keys is None:
+      keys = cls.all_keys()
+    ret_val = []
+    for strategy_name in cls.strategy_functions():
+      arrangements = table.get( strategy_name, {} )
+      for key in keys:
+        live = cls.live_arrangement_for_key( key, strategy_name )
+        if arrangements.get( key ) != live:
+          ret_val.append( ( strategy_name, key, arrangements.get( key ), live ) )
+    return ret_val
+
+  @classmethod
+  def save( cls, table, path = s_auto_set_table_path ):
+    with open( path, 'w' ) as table_file:
+      json.dump( table, table_file, sort_keys = True, indent = 0, separators = ( ',', ':' ) )
+
+  @classmethod
+  def load( cls, path = s_auto_set_table_path ):
+    if not os.path.exists( path ):
+      return {}
+    with open( path ) as table_file:
+      return json.load( table_file )
+
+  @classmethod
+  def table( cls ):
+    if cls.s_table is None:
+      cls.s_table = cls.load()
+    return cls.s_table
+
+  # the arrangement for this set, or None if it's not in the table
+  @classmethod
+  def arrangement_for_set( cls, set, strategy_name ):
+    arrangements = cls.table().get( strategy_name )
+    if not arrangements:
+      return None
+    return arrangements.get( cls.key_for_set( set ) )
+
+  # re-arrange the tiles in the set (in place, the way the strategy
+  # does) to match the arrangement; return the ordering, relative to
+  # the tiles as they were, that this arrangement represents.
+  @classmethod
+  def apply_arrangement( cls, set, arrangement ):
+    tiles = set.tiles
+    unused = list( tiles )
+    arranged = []
+    for ch in arrangement:
+      for tile in unused:
+        if tile.char().lower() == ch:
+          unused.remove( tile )
+          arranged.append( tile )
+          break
+    if len( arranged ) != 4:
+      return None
+    first_index = arranged.index( tiles[0] )
+    partner = arranged[ first_index ^ 1 ]
+    ordering = tiles.index( partner )
+    tiles[:] = arranged
+    return ordering
+
+
+# ----------------------------------------------------
+# Test PGAutoSetTable class
+
+from django.test import TestCase
+
+class PGAutoSetTableTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_all_keys( self ):
+    keys = PGAutoSetTable.all_keys()
+    self.assertEqual( len( keys ), 3620 )
+    self.assertIn( "aabb", keys )
+    self.assertNotIn( "aaab", keys )
+
+  def test_table_covers_all_keys( self ):
+    table = PGAutoSetTable.table()
+    for strategy_name in ( HEURISTIC, NUMERICAL ):
+      self.assertEqual( sorted( table[strategy_name].keys() ), sorted( PGAutoSetTable.all_keys() ) )
+
+  def test_table_matches_live_code( self ):
+    # the full check is 'manage.py build_auto_set_table --check'; here
+    # just check every twentieth set.
+    keys = PGAutoSetTable.all_keys()[::20]
+    self.assertEqual( PGAutoSetTable.mismatches( PGAutoSetTable.table(), keys ), [] )
+
+  def test_apply_arrangement( self ):
+    set = PGSet.create_with_tile_chars( "aHbP" )
+    ordering = PGAutoSetTable.apply_arrangement( set, "bhap" )
+    self.assertEqual( ordering, 3 )
+    self.assertEqual( set.tile_chars(), "bHaP" )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
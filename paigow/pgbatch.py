@@ -0,0 +1,268 @@
+# This file evaluates hands and sets in bulk with NumPy.  Everything
+# takes arrays of compact tile indices (see pgpacked.py): shape (N, 2)
+# for hands, (N, 4) for sets, tiles 0/1 and 2/3 being the two hands of
+# a set just like PGSet.
+#
+# There are only 32 x 32 possible hands, so on first use we ask PGHand
+# about every one of them and keep the answers in 32 x 32 tables; the
+# batch calls are then just table lookups, and give the same answers
+# as the one-at-a-time code by construction.
+
+import numpy
+
+from pgtileregistry import PGTileRegistry
+from pgpacked import s_tile_chars, s_num_tiles
+
+# hand class codes, in order of how good they are
+PLAIN = 0
+HIGH_NINE = 1
+GONG = 2
+WONG = 3
+PAIR = 4
+GEE_JOON = 5
+
+# the lookup tables, indexed [tile index 1, tile index 2]; None until first use.
+s_values = None          # PGHand.numerical_value()
+s_classes = None         # one of the codes above
+s_rankings = None        # PGHand.ranking()
+s_strengths = None       # PGHand.strength()
+s_labels = None          # PGHand.label()
+s_first_is_high = None   # true if the first tile is the hand's high tile
+
+def hand_class( hand ):
+  if hand.is_gee_joon():
+    return GEE_JOON
+  if hand.is_pair():
+    return PAIR
+  if hand.is_wong():
+    return WONG
+  if hand.is_gong():
+    return GONG
+  if hand.is_high_nine():
+    return HIGH_NINE
+  return PLAIN
+
+def load_tables():
+  global s_values, s_classes, s_rankings, s_strengths, s_labels, s_first_is_high
+  if s_values is not None:
+    return
+  from paigow.pghand import PGHand
+  shape = ( s_num_tiles, s_num_tiles )
+  values = numpy.zeros( shape, dtype = numpy.int8 )
+  classes = numpy.zeros( shape, dtype = numpy.int8 )
+  rankings = numpy.zeros( shape, dtype = numpy.int16 )
+  strengths = numpy.zeros( shape, dtype = numpy.int16 )
+  labels = numpy.empty( shape, dtype = object )
+  first_is_high = numpy.zeros( shape, dtype = bool )
+  tiles = [ PGTileRegistry.with_char( ch ) for ch in s_tile_chars ]
+  for index1 in range( s_num_tiles ):
+    for index2 in range( s_num_tiles ):
+      hand = PGHand.create( tiles[index1], tiles[index2] )
+      values[index1, index2] = hand.numerical_value()
+      classes[index1, index2] = hand_class( hand )
+      rankings[index1, index2] = hand.ranking()
+      strengths[index1, index2] = hand.strength()
+      labels[index1, index2] = hand.label()
+      first_is_high[index1, index2] = hand.high_tile is tiles[index1]
+  s_values, s_classes, s_rankings = values, classes, rankings
+  s_strengths, s_labels, s_first_is_high = strengths, labels, first_is_high
+
+# internal: look up a (N, 2) array of hands in one of the tables
+def lookup( table, hands ):
+  hands = numpy.asarray( hands )
+  return table[ hands[:, 0], hands[:, 1] ]
+
+# ----------------------------------------------------
+# hands: (N, 2) arrays of tile indices
+
+def hand_values( hands ):
+  load_tables()
+  return lookup( s_values, hands )
+
+def hand_classes( hands ):
+  load_tables()
+  return lookup( s_classes, hands )
+
+def hand_rankings( hands ):
+  load_tables()
+  return lookup( s_rankings, hands )
+
+def hand_strengths( hands ):
+  load_tables()
+  return lookup( s_strengths, hands )
+
+def hand_labels( hands ):
+  load_tables()
+  return lookup( s_labels, hands )
+
+# the hands with the high tile first, the way PGHand holds them
+def ordered_hands( hands ):
+  load_tables()
+  hands = numpy.asarray( hands )
+  first_is_high = lookup( s_first_is_high, hands )
+  return numpy.where( first_is_high[:, numpy.newaxis], hands, hands[:, ::-1] )
+
+# ----------------------------------------------------
+# sets: (N, 4) arrays of tile indices
+
+# return the (N, 2) high hands and (N, 2) low hands, each with its high
+# tile first, like PGSet.high_and_low_hands.
+def high_and_low_hands( sets ):
+  load_tables()
+  sets = numpy.asarray( sets )
+  hands1 = sets[:, 0:2]
+  hands2 = sets[:, 2:4]
+  switch = ( lookup( s_strengths, hands2 ) > lookup( s_strengths, hands1 ) )[:, numpy.newaxis]
+  high_hands = numpy.where( switch, hands2, hands1 )
+  low_hands = numpy.where( switch, hands1, hands2 )
+  return ordered_hands( high_hands ), ordered_hands( low_hands )
+
+# the strengths of the high and low hands
+def high_and_low_strengths( sets ):
+  load_tables()
+  sets = numpy.asarray( sets )
+  strengths1 = lookup( s_strengths, sets[:, 0:2] )
+  strengths2 = lookup( s_strengths, sets[:, 2:4] )
+  return numpy.maximum( strengths1, strengths2 ), numpy.minimum( strengths1, strengths2 )
+
+# PGSet.sum_and_diff for every set: the sum and difference of the high
+# and low hands' rankings.
+def sums_and_diffs( sets ):
+  load_tables()
+  high_hands, low_hands = high_and_low_hands( sets )
+  high_rankings = lookup( s_rankings, high_hands ).astype( numpy.int32 )
+  low_rankings = lookup( s_rankings, low_hands ).astype( numpy.int32 )
+  return high_rankings + low_rankings, high_rankings - low_rankings
+
+
+# ----------------------------------------------------
+# comparing sets
+
+# (N, 4) tile indices for either (N, 4) tile indices or (N,) packed sets
+# (see pgpacked.py).
+def set_indices( sets ):
+  sets = numpy.asarray( sets )
+  if sets.ndim == 2:
+    return sets
+  return numpy.column_stack( [ ( sets >> shift ) & 31 for shift in ( 0, 5, 10, 15 ) ] )
+
+# compare sets1[n] against sets2[n] the way PGSet does: +1 if the first
+# set wins (both its hands beat the other's), -1 if it loses, 0 for a
+# push.  Either array may be (N, 4) tile indices or (N,) packed sets.
+def compare_sets( sets1, sets2 ):
+  high1, low1 = high_and_low_strengths( set_indices( sets1 ) )
+  high2, low2 = high_and_low_strengths( set_indices( sets2 ) )
+  results = numpy.zeros( len( high1 ), dtype = numpy.int8 )
+  results[ ( high1 > high2 ) & ( low1 > low2 ) ] = 1
+  results[ ( high2 > high1 ) & ( low2 > low1 ) ] = -1
+  return results
+
+# the points for each of the three sets, best first, as in
+# PGPlayerInDeal.record_scores_against
+s_set_points = numpy.array( [ 3, 2, 1 ] )
+
+# score deals: players[n] and opponents[n] are the three sets of each
+# side in deal n, best first, as (N, 3, 4) tile indices or (N, 3)
+# packed sets.  Returns the (N, 3) compare_sets results and the points
+# each side scored in each deal.
+def score_deals( players, opponents ):
+  players = numpy.asarray( players )
+  opponents = numpy.asarray( opponents )
+  num_deals = players.shape[0]
+  if players.ndim == 3:
+    players = players.reshape( num_deals * 3, 4 )
+    opponents = opponents.reshape( num_deals * 3, 4 )
+  else:
+    players = players.reshape( num_deals * 3 )
+    opponents = opponents.reshape( num_deals * 3 )
+  results = compare_sets( players, opponents ).reshape( num_deals, 3 )
+  player_points = ( ( results == 1 ) * s_set_points ).sum( axis = 1 )
+  opponent_points = ( ( results == -1 ) * s_set_points ).sum( axis = 1 )
+  return results, player_points, opponent_points
+
+
+# ----------------------------------------------------
+# Test the batch evaluator against PGHand and PGSet
+
+from django.test import TestCase
+
+class PGBatchTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def all_hands( self ):
+    return numpy.array( [ ( i, j ) for i in range( s_num_tiles ) for j in range( s_num_tiles ) if i != j ] )
+
+  def random_sets( self, count ):
+    import random
+    rng = random.Random( 321 )
+    return numpy.array( [ rng.sample( range( s_num_tiles ), 4 ) for i in range( count ) ] )
+
+  def test_hands_match_pghand( self ):
+    from paigow.pghand import PGHand
+    hands = self.all_hands()
+    values = hand_values( hands )
+    classes = hand_classes( hands )
+    rankings = hand_rankings( hands )
+    labels = hand_labels( hands )
+    ordered = ordered_hands( hands )
+    for n, ( i, j ) in enumerate( hands ):
+      hand = PGHand.create_with_indices( i, j )
+      self.assertEqual( values[n], hand.numerical_value() )
+      self.assertEqual( classes[n], hand_class( hand ) )
+      self.assertEqual( rankings[n], hand.ranking() )
+      self.assertEqual( labels[n], hand.label() )
+      self.assertEqual( tuple( ordered[n] ), hand.indices() )
+
+  def test_classes( self ):
+    from paigow.pgpacked import indices_from_tile_chars
+    hands = numpy.array( [ indices_from_tile_chars( chars ) for chars in ( "Pp", "Aa", "AL", "bM", "AN", "AO" ) ] )
+    self.assertEqual( list( hand_classes( hands ) ), [ GEE_JOON, PAIR, WONG, GONG, HIGH_NINE, PLAIN ] )
+
+  def test_sets_match_pgset( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgpacked import tile_chars_from_indices
+    sets = self.random_sets( 300 )
+    high_hands, low_hands = high_and_low_hands( sets )
+    sums, diffs = sums_and_diffs( sets )
+    for n in range( len( sets ) ):
+      set = PGSet.create_with_tile_chars( tile_chars_from_indices( sets[n] ) )
+      high_hand, low_hand = set.high_and_low_hands()
+      self.assertEqual( tuple( high_hands[n] ), high_hand.indices() )
+      self.assertEqual( tuple( low_hands[n] ), low_hand.indices() )
+      self.assertEqual( ( sums[n], diffs[n] ), set.sum_and_diff() )
+
+  def test_compare_matches_pgset( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgpacked import tile_chars_from_indices, pack_set
+    sets = self.random_sets( 400 )
+    sets1, sets2 = sets[:200], sets[200:]
+    results = compare_sets( sets1, sets2 )
+    packed_results = compare_sets( [ pack_set( s ) for s in sets1 ], [ pack_set( s ) for s in sets2 ] )
+    self.assertEqual( list( results ), list( packed_results ) )
+    self.assertEqual( results.dtype, numpy.int8 )
+    for n in range( len( sets1 ) ):
+      set1 = PGSet.create_with_tile_chars( tile_chars_from_indices( sets1[n] ) )
+      set2 = PGSet.create_with_tile_chars( tile_chars_from_indices( sets2[n] ) )
+      if set1 > set2:
+        self.assertEqual( results[n], 1 )
+      elif set1 < set2:
+        self.assertEqual( results[n], -1 )
+      else:
+        self.assertEqual( results[n], 0 )
+
+  def test_score_deals( self ):
+    from paigow.pgpacked import indices_from_tile_chars
+    players = numpy.array( [ [ indices_from_tile_chars( chars ) for chars in ( "AbLn", "FgOj", "CcDd" ) ] ] )
+    opponents = numpy.array( [ [ indices_from_tile_chars( chars ) for chars in ( "FgOj", "AbLn", "HIJK" ) ] ] )
+    results, player_points, opponent_points = score_deals( players, opponents )
+    self.assertEqual( list( results[0] ), [ 1, -1, 1 ] )
+    self.assertEqual( list( player_points ), [ 4 ] )
+    self.assertEqual( list( opponent_points ), [ 2 ] )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,282 @@
+# This file times the engine's hot paths -- hand comparison and labels,
+# set comparison and analysis, the auto-set strategies and the strategy
+# engines (see pgengine.py) -- over seeded random workloads, so we can
+# tell when a change makes them slower.  'manage.py benchmark' runs it,
+# writes the results as JSON, and compares them with a stored baseline.
+#
+# Each benchmark builds all its arguments before the clock starts (the
+# strategies re-arrange the sets they're given, so each call gets its
+# own), then times the whole run for ops/sec and every call separately
+# for latencies, with the garbage collector off the way timeit does it.
+# The timer's own overhead is taken off the latencies, and each
+# benchmark runs a few rounds on the same workload, keeping the
+# fastest, to damp out noise from the machine.  Peak memory is the
+# process's maximum resident size after the benchmark, from the
+# resource module.
+
+import gc
+import json
+import os
+import random
+import resource
+import timeit
+
+from pgpacked import s_tile_chars, s_num_tiles
+
+s_benchmark_baseline_path = os.path.join( os.path.dirname( __file__ ), 'tables', 'benchmark_baseline.json' )
+
+# calls per benchmark, and the seed for the workloads
+s_default_count = 2000
+s_default_seed = 1
+
+# rounds per benchmark; the fastest round is the one reported
+s_default_rounds = 3
+
+# how much slower than the baseline (as a fraction of its ops/sec) a
+# benchmark can be before it counts as a regression
+s_default_tolerance = 0.25
+
+# the latency percentiles we report
+s_percentiles = ( 50, 90, 99 )
+
+# ----------------------------------------------------
+# workloads: each takes the random stream and the number of calls and
+# returns ( the function to time, the list of argument tuples ).
+
+def random_tiles( rng, count ):
+  from paigow.pgtileregistry import PGTileRegistry
+  return [ PGTileRegistry.with_char( s_tile_chars[index] ) for index in rng.sample( range( s_num_tiles ), count ) ]
+
+def random_hand( rng ):
+  from paigow.pghand import PGHand
+  tiles = random_tiles( rng, 2 )
+  return PGHand.create( tiles[0], tiles[1] )
+
+def random_set( rng ):
+  from paigow.pgset import PGSet
+  return PGSet.create( random_tiles( rng, 4 ) )
+
+# three sets dealt from one deck, as a player would get them
+def random_deal_sets( rng ):
+  from paigow.pgset import PGSet
+  tiles = random_tiles( rng, 12 )
+  return [ PGSet.create( tiles[i:i + 4] ) for i in range( 0, 12, 4 ) ]
+
+def hand_beats_workload( rng, count ):
+  return ( lambda hand1, hand2: hand1.beats( hand2 ),
+           [ ( random_hand( rng ), random_hand( rng ) ) for i in range( count ) ] )
+
+def hand_label_workload( rng, count ):
+  return ( lambda hand: hand.label(), [ ( random_hand( rng ), ) for i in range( count ) ] )
+
+def set_compare_workload( rng, count ):
+  return ( lambda set1, set2: set1 > set2,
+           [ ( random_set( rng ), random_set( rng ) ) for i in range( count ) ] )
+
+def sum_and_diff_workload( rng, count ):
+  return ( lambda set: set.sum_and_diff(), [ ( random_set( rng ), ) for i in range( count ) ] )
+
+def auto_set_heuristic_workload( rng, count ):
+  from paigow.pgstrategy import auto_set_heuristic
+  return ( auto_set_heuristic, [ ( random_set( rng ), ) for i in range( count ) ] )
+
+def auto_set_numerical_workload( rng, count ):
+  from paigow.pgstrategy import auto_set_numerical
+  return ( auto_set_numerical, [ ( random_set( rng ), ) for i in range( count ) ] )
+
+def strategy_auto_set_workload( rng, count ):
+  from paigow.pgstrategy import PGStrategy
+  return ( PGStrategy.auto_set, [ ( random_deal_sets( rng ), ) for i in range( count ) ] )
+
+# a strategy engine's batch interface, on whole deals of packed sets
+def engine_workload( engine_name ):
+  def workload( rng, count ):
+    from paigow.pgengine import engine_named
+    return ( engine_named( engine_name ).auto_set_packed,
+             [ ( [ set.packed() for set in random_deal_sets( rng ) ], ) for i in range( count ) ] )
+  return workload
+
+# the benchmarks, in the order we run them.  Any other engine can be
+# benchmarked by asking for 'engine_<name>'.
+s_benchmarks = (
+  ( 'hand_beats', hand_beats_workload ),
+  ( 'hand_label', hand_label_workload ),
+  ( 'set_compare', set_compare_workload ),
+  ( 'sum_and_diff', sum_and_diff_workload ),
+  ( 'auto_set_heuristic', auto_set_heuristic_workload ),
+  ( 'auto_set_numerical', auto_set_numerical_workload ),
+  ( 'strategy_auto_set', strategy_auto_set_workload ),
+  ( 'engine_table', engine_workload( 'table' ) ),
+  ( 'engine_solver', engine_workload( 'solver' ) ),
+)
+
+s_engine_prefix = 'engine_'
+
+def benchmark_names():
+  return [ name for name, workload in s_benchmarks ]
+
+def is_benchmark_name( name ):
+  from paigow.pgengine import engine_names
+  return name in benchmark_names() or ( name.startswith( s_engine_prefix ) and name[len( s_engine_prefix ):] in engine_names() )
+
+# the benchmarks to run: all the standard ones, or the ones named
+def benchmarks_named( names ):
+  if not names:
+    return list( s_benchmarks )
+  workloads = dict( s_benchmarks )
+  return [ ( name, workloads.get( name ) or engine_workload( name[len( s_engine_prefix ):] ) ) for name in names ]
+
+# ----------------------------------------------------
+# timing
+
+# the cost of reading the timer twice, which we take off every call
+def timer_overhead( samples = 1000 ):
+  timer = timeit.default_timer
+  overheads = []
+  for i in range( samples ):
+    start = timer()
+    overheads.append( timer() - start )
+  overheads.sort()
+  return overheads[ len( overheads ) // 2 ]
+
+# the p'th percentile of a sorted list
+def percentile( sorted_values, p ):
+  if not sorted_values:
+    return 0.0
+  index = int( round( ( len( sorted_values ) - 1 ) * p / 100.0 ) )
+  return sorted_values[index]
+
+# peak resident memory of this process so far, in KB (Linux reports
+# ru_maxrss in KB)
+def peak_memory_kb():
+  return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+
+# time function( *args ) over the argument list and summarize: ops/sec
+# from one timed pass over all the calls (timing single calls of a few
+# microseconds is too coarse to add up), and latency percentiles from a
+# second pass timing each call.  Arguments that get changed by the call
+# need a second copy for the second pass.
+def time_calls( function, arg_list, overhead, latency_arg_list = None ):
+  timer = timeit.default_timer
+  if latency_arg_list is None:
+    latency_arg_list = arg_list
+  latencies = []
+  gc_was_enabled = gc.isenabled()
+  gc.disable()
+  try:
+    start = timer()
+    for args in arg_list:
+      function( *args )
+    total = timer() - start
+    for args in latency_arg_list:
+      start = timer()
+      function( *args )
+      latencies.append( max( timer() - start - overhead, 0.0 ) )
+  finally:
+    if gc_was_enabled:
+      gc.enable()
+  latencies.sort()
+  result = {
+    'calls': len( arg_list ),
+    'seconds': total,
+    'ops_per_sec': len( arg_list ) / total if total > 0 else 0.0,
+  }
+  for p in s_percentiles:
+    result[ 'p' + str( p ) + '_us' ] = percentile( latencies, p ) * 1e6
+  return result
+
+# run the benchmarks (all of them, or those named); return the results
+# by name.
+def run_benchmarks( count = s_default_count, seed = s_default_seed, names = None, rounds = s_default_rounds ):
+  from paigow.pgtileregistry import PGTileRegistry
+  PGTileRegistry.load()
+  overhead = timer_overhead()
+  results = {}
+  for name, workload in benchmarks_named( names ):
+    # one untimed call so lazily-built tables aren't charged to the benchmark
+    function, arg_list = workload( random.Random( seed ), 1 )
+    function( *arg_list[0] )
+    best = None
+    for round_num in range( rounds ):
+      function, arg_list = workload( random.Random( seed ), count )
+      function, latency_arg_list = workload( random.Random( seed ), count )
+      result = time_calls( function, arg_list, overhead, latency_arg_list )
+      if best is None or result['ops_per_sec'] > best['ops_per_sec']:
+        best = result
+    best['peak_memory_kb'] = peak_memory_kb()
+    results[name] = best
+  return results
+
+# ----------------------------------------------------
+# baselines
+
+def save_results( results, path ):
+  with open( path, 'w' ) as results_file:
+    json.dump( results, results_file, sort_keys = True, indent = 2 )
+
+def load_baseline( path = s_benchmark_baseline_path ):
+  if not os.path.exists( path ):
+    return {}
+  with open( path ) as baseline_file:
+    return json.load( baseline_file )
+
+# return the list of ( name, baseline ops/sec, ops/sec ) for every
+# benchmark that's more than 'tolerance' slower than the baseline.
+def regressions( results, baseline, tolerance = s_default_tolerance ):
+  ret_val = []
+  for name in sorted( results ):
+    if name not in baseline:
+      continue
+    baseline_ops = baseline[name]['ops_per_sec']
+    ops = results[name]['ops_per_sec']
+    if ops < baseline_ops * ( 1.0 - tolerance ):
+      ret_val.append( ( name, baseline_ops, ops ) )
+  return ret_val
+
+
+# ----------------------------------------------------
+# Test the benchmarks
+
+from django.test import TestCase
+
+class PGBenchmarkTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_run_benchmarks( self ):
+    results = run_benchmarks( count = 20, rounds = 1 )
+    self.assertEqual( sorted( results.keys() ), sorted( benchmark_names() ) )
+    for name, result in results.items():
+      self.assertEqual( result['calls'], 20 )
+      self.assertTrue( result['p50_us'] <= result['p99_us'] )
+      self.assertTrue( result['peak_memory_kb'] > 0 )
+
+  def test_engine_benchmarks( self ):
+    self.assertTrue( is_benchmark_name( 'engine_search' ) )
+    self.assertFalse( is_benchmark_name( 'engine_nonsense' ) )
+    results = run_benchmarks( count = 2, names = [ 'engine_numerical' ], rounds = 1 )
+    self.assertEqual( results.keys(), [ 'engine_numerical' ] )
+
+  def test_workloads_are_seeded( self ):
+    function, args1 = set_compare_workload( random.Random( 5 ), 10 )
+    function, args2 = set_compare_workload( random.Random( 5 ), 10 )
+    self.assertEqual( [ ( a.tile_chars(), b.tile_chars() ) for a, b in args1 ],
+                      [ ( a.tile_chars(), b.tile_chars() ) for a, b in args2 ] )
+
+  def test_regressions( self ):
+    baseline = { 'hand_beats': { 'ops_per_sec': 1000.0 }, 'hand_label': { 'ops_per_sec': 1000.0 } }
+    results = { 'hand_beats': { 'ops_per_sec': 900.0 }, 'hand_label': { 'ops_per_sec': 500.0 },
+                'set_compare': { 'ops_per_sec': 1.0 } }
+    self.assertEqual( regressions( results, baseline ), [ ( 'hand_label', 1000.0, 500.0 ) ] )
+
+  def test_percentile( self ):
+    self.assertEqual( percentile( [ 1, 2, 3, 4, 5 ], 50 ), 3 )
+    self.assertEqual( percentile( [ 1, 2, 3, 4, 5 ], 99 ), 5 )
+    self.assertEqual( percentile( [], 50 ), 0.0 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,179 @@
+# This file deals the tiles.  Each game has its own seed (PGGame's
+# deal_seed), and each deal's deck is shuffled from a random stream
+# derived from that seed and the deal number, so any deal can be dealt
+# again exactly -- for audits, replays, or checking a bug report --
+# from just ( game seed, deal number ).
+#
+# A deck is a 32-byte bytearray of tile indices (see pgpacked.py),
+# shuffled in memory; nothing comes from the database.  PGDeal stores
+# it as its tile chars.
+#
+# Shuffling a deck takes a few tens of microseconds, but if dealing is
+# ever on a hot path, the deal pool can shuffle each game's next deck
+# in a background thread right after its current one is dealt, so it's
+# ready when it's asked for.  It's off unless s_use_deal_pool is set;
+# either way the decks are the same.
+
+import collections
+import random
+import threading
+import Queue
+
+from pgpacked import s_tile_chars, s_num_tiles, tile_chars_from_deck
+
+# whether to shuffle the next deck of each game ahead of time
+s_use_deal_pool = False
+
+# how many shuffled decks the pool keeps, across all games
+s_deal_pool_size = 1000
+
+# the number of bits in a game seed (it's stored in a signed 64-bit
+# column)
+s_seed_bits = 62
+
+# a new seed for a game, from the OS's random source
+def new_game_seed():
+  return random.SystemRandom().getrandbits( s_seed_bits )
+
+# the random stream for one deal of a game
+def rng_for_deal( game_seed, deal_number ):
+  return random.Random( game_seed * 65536 + deal_number )
+
+# the deck for one deal of a game, shuffled from its stream
+def shuffled_deck( game_seed, deal_number ):
+  deck = bytearray( range( s_num_tiles ) )
+  rng_for_deal( game_seed, deal_number ).shuffle( deck )
+  return deck
+
+# ----------------------------------------------------
+# the deal pool
+
+class PGDealPool:
+
+  # the shuffled decks, by ( game seed, deal number ), oldest first
+  s_decks = collections.OrderedDict()
+  s_decks_lock = threading.Lock()
+
+  # the decks the worker still has to shuffle, and the worker
+  s_requests = Queue.Queue()
+  s_worker = None
+
+  # take the deck for this deal out of the pool, if it's there
+  @classmethod
+  def take( cls, game_seed, deal_number ):
+    with cls.s_decks_lock:
+      return cls.s_decks.pop( ( game_seed, deal_number ), None )
+
+  # ask for this deal's deck to be shuffled in the background
+  @classmethod
+  def prepare( cls, game_seed, deal_number ):
+    cls.start()
+    cls.s_requests.put( ( game_seed, deal_number ) )
+
+  @classmethod
+  def start( cls ):
+    with cls.s_decks_lock:
+      if cls.s_worker is not None:
+        return
+      cls.s_worker = threading.Thread( target = cls.refill, name = 'PGDealPool' )
+      cls.s_worker.daemon = True
+      cls.s_worker.start()
+
+  # the worker: shuffle the decks asked for, dropping the oldest ones
+  # when the pool is full (their games have probably ended)
+  @classmethod
+  def refill( cls ):
+    while True:
+      key = cls.s_requests.get()
+      deck = shuffled_deck( *key )
+      with cls.s_decks_lock:
+        cls.s_decks.pop( key, None )
+        while len( cls.s_decks ) >= s_deal_pool_size:
+          cls.s_decks.popitem( last = False )
+        cls.s_decks[key] = deck
+      cls.s_requests.task_done()
+
+  # wait for the worker to catch up (for tests)
+  @classmethod
+  def wait( cls ):
+    cls.s_requests.join()
+
+  @classmethod
+  def clear( cls ):
+    with cls.s_decks_lock:
+      cls.s_decks.clear()
+
+# the deck for one deal of a game: from the pool if it's on and has it,
+# otherwise shuffled now.
+def deck_for_deal( game_seed, deal_number ):
+  deck = None
+  if s_use_deal_pool:
+    deck = PGDealPool.take( game_seed, deal_number )
+    PGDealPool.prepare( game_seed, deal_number + 1 )
+  if deck is None:
+    deck = shuffled_deck( game_seed, deal_number )
+  return deck
+
+
+# ----------------------------------------------------
+# Test the dealer
+
+from django.test import TestCase
+
+class PGDealerTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_deals_are_reproducible( self ):
+    deck = shuffled_deck( 12345, 3 )
+    self.assertEqual( len( deck ), s_num_tiles )
+    self.assertEqual( sorted( deck ), range( s_num_tiles ) )
+    self.assertEqual( deck, shuffled_deck( 12345, 3 ) )
+    self.assertNotEqual( deck, shuffled_deck( 12345, 4 ) )
+    self.assertNotEqual( deck, shuffled_deck( 12346, 3 ) )
+    self.assertEqual( sorted( tile_chars_from_deck( deck ) ), sorted( s_tile_chars ) )
+
+  def test_pool_gives_the_same_decks( self ):
+    global s_use_deal_pool
+    s_use_deal_pool = True
+    try:
+      PGDealPool.clear()
+      first = deck_for_deal( 777, 1 )
+      PGDealPool.wait()
+      self.assertEqual( PGDealPool.s_decks.get( ( 777, 2 ) ), shuffled_deck( 777, 2 ) )
+      self.assertEqual( deck_for_deal( 777, 2 ), shuffled_deck( 777, 2 ) )
+      self.assertEqual( first, shuffled_deck( 777, 1 ) )
+    finally:
+      s_use_deal_pool = False
+      PGDealPool.wait()
+      PGDealPool.clear()
+
+  def test_full_pool_drops_the_oldest( self ):
+    global s_deal_pool_size
+    pool_size = s_deal_pool_size
+    s_deal_pool_size = 3
+    try:
+      PGDealPool.clear()
+      for deal_number in range( 1, 6 ):
+        PGDealPool.prepare( 888, deal_number )
+      PGDealPool.wait()
+      self.assertEqual( PGDealPool.s_decks.keys(), [ ( 888, 3 ), ( 888, 4 ), ( 888, 5 ) ] )
+    finally:
+      s_deal_pool_size = pool_size
+      PGDealPool.clear()
+
+  def test_game_deals_from_its_seed( self ):
+    from paigow.models import PGGame, PGDeal
+    game = PGGame.create( "Test for PGDealer" )
+    game.save()
+    self.assertIsNotNone( game.deal_seed )
+    game.deal_tiles()
+    deal = PGDeal.objects.get( game = game, deal_number = 1 )
+    self.assertEqual( deal.deck, tile_chars_from_deck( shuffled_deck( game.deal_seed, 1 ) ) )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -86,11 +86,56 @@ s_dot_locations = [
   [104, 28 ],
 ]
 
-class PGDot:
+# ----------------------------------------------------
+# The dots never change, so there's only one PGDot for each index and
+# color, made here at import, and each half and each whole dot
+# sequence is one shared tuple of them: nothing is allocated when a
+# tile's dots are asked for.  They're immutable.
+#
+# Where the dots go on each size of tile is one table per size, an
+# (index, [top, left]) array scaled from s_dot_locations (which is for
+# medium tiles), and the diameter of the dots on it.  From those, each
+# ( dot sequence, tile size ) has its dots ready to render, both as
+# PGDotPlacements for the templates and as dicts for JSON:
+#
+#   { 'index': 3, 'color': 'white', 'top': 4, 'left': 28, 'size': 16 }
+
+import collections
+
+import numpy
+
+# how big each tile size is next to the medium tiles s_dot_locations is for
+s_tile_size_scales = { 'small': 0.5, 'medium': 1.0, 'large': 2.0 }
+
+# the diameter of a dot on a medium tile
+s_dot_diameter = 16
+
+# tile size -> (index, [top, left]) array, and the dots' diameter
+s_dot_coordinates = dict( ( pgtile_size, ( numpy.array( s_dot_locations ) * scale ).astype( int ) )
+                          for pgtile_size, scale in s_tile_size_scales.items() )
+s_dot_diameters = dict( ( pgtile_size, int( s_dot_diameter * scale ) ) for pgtile_size, scale in s_tile_size_scales.items() )
+
+class PGDot( object ):
+
+  __slots__ = ( 'index', 'color' )
+
+  # ( index, color ) -> the one PGDot for it
+  s_dots = {}
 
   def __init__( self, index, color ):
-    self.index = index
-    self.color = color
+    object.__setattr__( self, 'index', index )
+    object.__setattr__( self, 'color', color )
+
+  def __setattr__( self, name, value ):
+    raise AttributeError( "PGDots are shared, they can't be changed" )
+
+  # the one dot with this index and color
+  @classmethod
+  def dot( cls, index, color ):
+    key = ( index, color )
+    if key not in cls.s_dots:
+      cls.s_dots[key] = PGDot( index, color )
+    return cls.s_dots[key]
 
   @classmethod
   def sequence( cls, ch_code, color ):
@@ -101,24 +146,75 @@ class PGDot:
 
   @classmethod
   def half_dots( cls, ch_code ):
-    ret = []
-    red_sequence = PGDot.sequence( ch_code, 'red' )
-    white_sequence = PGDot.sequence( ch_code, 'white' )
-    for code in red_sequence:
-      ret.append( PGDot( code, 'red' ) )
-    for code in white_sequence:
-      ret.append( PGDot( code, 'white' ) )
-    return ret
+    return s_half_dots[ch_code]
 
   @classmethod
   def all_dots( cls, ch_chars ):
-    seq0 = PGDot.half_dots( ch_chars[0] )
-    seq1 = PGDot.half_dots( ch_chars[1] )
-    return seq0 + seq1
+    return s_sequence_dots[ch_chars]
 
   def dict( self ):
     return { 'index': self.index, 'color': self.color }
 
+
+# a dot where it goes on a tile of some size (a tuple, so it's
+# immutable and has no __dict__ either)
+class PGDotPlacement( collections.namedtuple( 'PGDotPlacement', 'index color top left size' ) ):
+
+  __slots__ = ()
+
+  def dict( self ):
+    return { 'index': self.index, 'color': self.color, 'top': self.top, 'left': self.left, 'size': self.size }
+
+def build_half_dots():
+  half_dots = {}
+  for ch_code in s_dot_codes:
+    half_dots[ch_code] = tuple( [ PGDot.dot( index, 'red' ) for index in PGDot.sequence( ch_code, 'red' ) ] +
+                                [ PGDot.dot( index, 'white' ) for index in PGDot.sequence( ch_code, 'white' ) ] )
+  return half_dots
+
+# dot code -> tuple of PGDots, and two dot codes -> tuple of PGDots
+s_half_dots = build_half_dots()
+s_sequence_dots = dict( ( code0 + code1, s_half_dots[code0] + s_half_dots[code1] )
+                        for code0 in s_half_dots for code1 in s_half_dots )
+
+def build_dot_placements():
+  placements = {}
+  for pgtile_size, coordinates in s_dot_coordinates.items():
+    size = s_dot_diameters[pgtile_size]
+    for dot_sequence, dots in s_sequence_dots.items():
+      placements[( dot_sequence, pgtile_size )] = tuple( PGDotPlacement( dot.index, dot.color, int( coordinates[dot.index, 0] ), int( coordinates[dot.index, 1] ), size )
+                                                         for dot in dots )
+  return placements
+
+# ( dot sequence, tile size ) -> tuple of PGDotPlacements, and the same
+# as a list of dicts
+s_dot_placements = build_dot_placements()
+s_dot_payloads = dict( ( key, [ placement.dict() for placement in placements ] )
+                       for key, placements in s_dot_placements.items() )
+
+# the tile chars' dots, as JSON, by tile size; filled in on first use
+s_tile_dots_json = {}
+
+def dot_placements( dot_sequence, pgtile_size ):
+  return s_dot_placements[( dot_sequence, pgtile_size )]
+
+def dot_payload( dot_sequence, pgtile_size ):
+  return s_dot_payloads[( dot_sequence, pgtile_size )]
+
+def tile_dot_payload( tile_char, pgtile_size ):
+  from paigow.pgtileregistry import PGTileRegistry
+  return dot_payload( PGTileRegistry.with_char( tile_char ).dot_sequence, pgtile_size )
+
+# the dots of every tile char, as a JSON object, for the page to expand
+# the opponent's tile chars with (see the compact reveal in pgsnapshot.py)
+def tile_dots_json( pgtile_size ):
+  import json
+  if pgtile_size not in s_tile_dots_json:
+    from paigow.pgtileregistry import PGTileRegistry
+    dots = dict( ( tile.tile_char, dot_payload( tile.dot_sequence, pgtile_size ) ) for tile in PGTileRegistry.all() )
+    s_tile_dots_json[pgtile_size] = json.dumps( dots, sort_keys = True, separators = ( ',', ':' ) )
+  return s_tile_dots_json[pgtile_size]
+
 from django.test import TestCase
 
 class PGDotTest( TestCase ):
@@ -135,3 +231,25 @@ class PGDotTest( TestCase ):
   def test_all_dots( self ):
     dots = PGDot.all_dots( 'gn' )
     self.assertEqual( len(dots), 12 )
+
+  def test_dots_are_shared( self ):
+    self.assertIs( PGDot.all_dots( 'gn' ), PGDot.all_dots( 'gn' ) )
+    self.assertIs( PGDot.all_dots( 'gn' )[0], PGDot.half_dots( 'g' )[0] )
+    self.assertIs( PGDot.dot( 1, 'red' ), PGDot.half_dots( 'b' )[0] )
+    self.assertRaises( AttributeError, setattr, PGDot.dot( 1, 'red' ), 'color', 'white' )
+    self.assertFalse( hasattr( PGDot.dot( 1, 'red' ), '__dict__' ) )
+
+  def test_dot_placements( self ):
+    placements = dot_placements( 'cj', 'small' )
+    self.assertIs( placements, dot_placements( 'cj', 'small' ) )
+    self.assertEqual( [ ( dot.index, dot.top, dot.left, dot.size ) for dot in placements ],
+                      [ ( 1, 2, 3, 8 ), ( 3, 2, 14, 8 ), ( 18, 52, 3, 8 ), ( 20, 52, 14, 8 ) ] )
+    self.assertEqual( s_dot_coordinates['large'].shape, ( len( s_dot_locations ), 2 ) )
+
+  def test_dot_payload( self ):
+    import json
+    dots = dot_payload( 'cj', 'medium' )
+    self.assertEqual( dots[0], { 'index': 1, 'color': 'white', 'top': 4, 'left': 6, 'size': 16 } )
+    self.assertEqual( dot_payload( 'cj', 'large' )[3], { 'index': 20, 'color': 'white', 'top': 208, 'left': 56, 'size': 32 } )
+    self.assertIs( tile_dot_payload( 'A', 'small' ), tile_dot_payload( 'A', 'small' ) )
+    self.assertEqual( json.loads( tile_dots_json( 'small' ) )['A'], tile_dot_payload( 'A', 'small' ) )
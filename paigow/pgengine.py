@@ -0,0 +1,272 @@
+# This file defines the strategy engines: the different ways the
+# computer can set and order its tiles, each registered under a name so
+# a game or a computer player can say which one it uses (see
+# PGGame.engine_for_player).
+#
+#   heuristic   the hand-written rules: special hands, then numerical
+#               (auto_set_heuristic), ordered with first_set_is_better
+#   numerical   auto_set_numerical, ordered the same way
+#   table       the heuristic rules looked up in the precomputed
+#               auto-set table, ordered by expected points (this is
+#               PGStrategy.auto_set)
+#   solver      each set split the way the exact solver says does best
+#               against a random opponent, ordered by expected points
+#   search      a time-bounded search over all 162 ways to split and
+#               order the deal, against sampled opponent deals from the
+#               tiles we can't see, set by the table engine
+#
+# Every engine has the same batch interface, on packed sets (see
+# pgpacked.py): auto_set_packed( three packed sets ) returns them set
+# and ordered best first, and auto_set_deals does a list of those.
+# auto_set does the same for PGSets, for the game itself.
+
+import random
+import time
+
+from pgpacked import unpack_set, pack_set, s_num_tiles
+from pgtrace import PGTrace
+
+# the engines, by name
+s_engines = {}
+
+# the engine used when neither the game nor the player picks one
+s_default_engine = 'table'
+
+def register_engine( engine ):
+  s_engines[engine.name] = engine
+  return engine
+
+def engine_names():
+  return sorted( s_engines.keys() )
+
+# the engine registered under this name; raises ValueError if there
+# isn't one.
+def engine_named( name ):
+  if not name:
+    name = s_default_engine
+  if name not in s_engines:
+    raise ValueError( "No strategy engine named '" + str( name ) + "'" )
+  return s_engines[name]
+
+# put the high hand first and each hand's high tile first, the way
+# reorder_hands_for_setting leaves a PGSet.
+def orient_indices( indices ):
+  from paigow import pgpacked
+  pgpacked.load_tables()
+  ranks = pgpacked.s_tile_ranks
+  hand_strength = pgpacked.hand_strength
+  i0, i1, i2, i3 = indices
+  if hand_strength( i2, i3 ) > hand_strength( i0, i1 ):
+    i0, i1, i2, i3 = i2, i3, i0, i1
+  if ranks[i1] > ranks[i0]:
+    i0, i1 = i1, i0
+  if ranks[i3] > ranks[i2]:
+    i2, i3 = i3, i2
+  return ( i0, i1, i2, i3 )
+
+class PGEngine:
+
+  name = None
+
+  # set one packed set: return it with its tiles re-arranged.  Unless an
+  # engine says otherwise, sets are looked up in the auto-set table.
+  @classmethod
+  def set_packed( cls, packed ):
+    from paigow.pgstrategy import auto_set_packed
+    return auto_set_packed( packed )
+
+  # order three set packed sets, best first
+  @classmethod
+  def order_packed( cls, packed_sets ):
+    from paigow.pgordering import order_packed
+    return order_packed( packed_sets )
+
+  # set and order a player's three packed sets
+  @classmethod
+  def auto_set_packed( cls, packed_sets ):
+    return cls.order_packed( [ cls.set_packed( packed ) for packed in packed_sets ] )
+
+  # auto_set_packed for a list of deals
+  @classmethod
+  def auto_set_deals( cls, deals ):
+    return [ cls.auto_set_packed( packed_sets ) for packed_sets in deals ]
+
+  # auto_set_packed for PGSets; returns new PGSets
+  @classmethod
+  def auto_set( cls, sets ):
+    from paigow.pgset import PGSet
+    return [ PGSet.create_with_packed( packed ) for packed in cls.auto_set_packed( [ set.packed() for set in sets ] ) ]
+
+
+# the live strategy code, one PGSet at a time.
+class PGRulesEngine( PGEngine ):
+
+  # the strategy function: takes a PGSet, returns the ordering.  Unless
+  # an engine says otherwise, it's the hand-written rules.
+  @classmethod
+  def strategy( cls, set ):
+    from paigow.pgstrategy import auto_set_heuristic
+    return auto_set_heuristic( set )
+
+  # the strategy may shuffle the set it's given, so give it a copy and
+  # then arrange the original the way it picked (see pgautosettable.py)
+  @classmethod
+  def set_packed( cls, packed ):
+    from paigow.pgset import PGSet
+    from paigow.pgstrategy import reorder_hands_for_setting
+    ordering = cls.strategy( PGSet.create_with_packed( packed ) )
+    set = PGSet.create_with_packed( packed )
+    reorder_hands_for_setting( set, ordering )
+    return set.packed()
+
+  @classmethod
+  def order_packed( cls, packed_sets ):
+    from paigow.pgset import PGSet
+    from paigow.pgstrategy import PGStrategy
+    sets = PGStrategy.order_sets_by_rules( [ PGSet.create_with_packed( packed ) for packed in packed_sets ] )
+    return [ set.packed() for set in sets ]
+
+class PGHeuristicEngine( PGRulesEngine ):
+
+  name = 'heuristic'
+
+class PGNumericalEngine( PGRulesEngine ):
+
+  name = 'numerical'
+
+  @classmethod
+  def strategy( cls, set ):
+    from paigow.pgstrategy import auto_set_numerical
+    return auto_set_numerical( set )
+
+class PGTableEngine( PGEngine ):
+
+  name = 'table'
+
+class PGSolverEngine( PGEngine ):
+
+  name = 'solver'
+
+  @classmethod
+  def set_packed( cls, packed ):
+    from paigow.pgsolver import best_split, s_splits
+    indices = unpack_set( packed )
+    split = s_splits[ best_split( indices ) ]
+    return pack_set( orient_indices( [ indices[position] for position in split ] ) )
+
+class PGSearchEngine( PGEngine ):
+
+  name = 'search'
+
+  # stop after this long, or this many sampled opponent deals
+  s_seconds = 0.05
+  s_max_samples = 400
+
+  @classmethod
+  def auto_set_packed( cls, packed_sets ):
+    from itertools import permutations, product
+    from paigow.pgsolver import s_splits
+    from paigow.pgpacked import compare_sets
+    from paigow.pgordering import s_slot_points
+
+    # every way to split each of our sets
+    sets_indices = [ unpack_set( packed ) for packed in packed_sets ]
+    options = [ [ pack_set( orient_indices( [ indices[position] for position in split ] ) ) for split in s_splits ]
+                for indices in sets_indices ]
+
+    # sample the opponent's deal from the tiles we can't see, have the
+    # table engine set it, and add up how each of our options does in
+    # each slot: results[set][split][slot]
+    ours = set( [ index for indices in sets_indices for index in indices ] )
+    unseen = [ index for index in range( s_num_tiles ) if index not in ours ]
+    rng = random.Random( sum( packed_sets ) )
+    results = [ [ [ 0, 0, 0 ] for split in s_splits ] for packed in packed_sets ]
+    deadline = time.time() + cls.s_seconds
+    samples = 0
+    sampled = PGTrace.pause()
+    try:
+      while samples < cls.s_max_samples and ( samples == 0 or time.time() < deadline ):
+        tiles = rng.sample( unseen, 12 )
+        opponent = PGTableEngine.auto_set_packed( [ pack_set( tiles[i:i + 4] ) for i in range( 0, 12, 4 ) ] )
+        for set_num in range( 3 ):
+          for split_num in range( 3 ):
+            for slot in range( 3 ):
+              results[set_num][split_num][slot] += compare_sets( options[set_num][split_num], opponent[slot] )
+        samples += 1
+    finally:
+      PGTrace.resume( sampled )
+
+    # the best split for each set and order of sets
+    best_points = None
+    best_sets = None
+    for splits in product( range( 3 ), repeat = 3 ):
+      for permutation in permutations( range( 3 ) ):
+        points = 0.0
+        for slot, set_num in enumerate( permutation ):
+          points += s_slot_points[slot] * results[set_num][splits[set_num]][slot]
+        if best_points is None or points > best_points:
+          best_points = points
+          best_sets = [ options[set_num][splits[set_num]] for set_num in permutation ]
+    return best_sets
+
+for engine in ( PGHeuristicEngine, PGNumericalEngine, PGTableEngine, PGSolverEngine, PGSearchEngine ):
+  register_engine( engine )
+
+
+# ----------------------------------------------------
+# Test the engines
+
+from django.test import TestCase
+
+class PGEngineTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_registry( self ):
+    self.assertEqual( engine_names(), [ 'heuristic', 'numerical', 'search', 'solver', 'table' ] )
+    self.assertEqual( engine_named( 'solver' ), PGSolverEngine )
+    self.assertEqual( engine_named( None ), engine_named( s_default_engine ) )
+    self.assertRaises( ValueError, engine_named, 'nonsense' )
+
+  def test_engines_keep_the_tiles( self ):
+    from paigow.pgpacked import packed_from_tile_chars, set_mask
+    packed_sets = [ packed_from_tile_chars( chars ) for chars in ( "AHbL", "aBcC", "dDeE" ) ]
+    masks = sorted( [ set_mask( packed ) for packed in packed_sets ] )
+    PGSearchEngine.s_max_samples = 20
+    try:
+      for name in engine_names():
+        result = engine_named( name ).auto_set_packed( packed_sets )
+        self.assertEqual( sorted( [ set_mask( packed ) for packed in result ] ), masks, name )
+    finally:
+      PGSearchEngine.s_max_samples = 400
+
+  def test_table_engine_matches_strategy( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgstrategy import PGStrategy
+    chars = ( "LCAa", "bdPp", "HhEe" )
+    expected = [ set.tile_chars() for set in PGStrategy.auto_set( [ PGSet.create_with_tile_chars( c ) for c in chars ] ) ]
+    sets = PGTableEngine.auto_set( [ PGSet.create_with_tile_chars( c ) for c in chars ] )
+    self.assertEqual( [ set.tile_chars() for set in sets ], expected )
+
+  def test_solver_engine_splits( self ):
+    from paigow.pgpacked import packed_from_tile_chars, tile_chars_from_packed
+    from paigow.pgsolver import split_key
+    packed = packed_from_tile_chars( "AHbL" )
+    arranged = PGSolverEngine.set_packed( packed )
+    self.assertEqual( split_key( unpack_set( arranged ) ), "al|bh" )
+    self.assertEqual( tile_chars_from_packed( arranged ), "ALbH" )
+
+  def test_rules_engines_match_strategy( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgstrategy import auto_set_numerical, reorder_hands_for_setting
+    from paigow.pgpacked import packed_from_tile_chars
+    set = PGSet.create_with_tile_chars( "bLiF" )
+    reorder_hands_for_setting( set, auto_set_numerical( PGSet.create_with_tile_chars( "bLiF" ) ) )
+    self.assertEqual( PGNumericalEngine.set_packed( packed_from_tile_chars( "bLiF" ) ), set.packed() )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -4,6 +4,7 @@
 
 
 from models.pgtile import PGTile
+from pgtileregistry import PGTileRegistry
 
 class PGHand:
   
@@ -16,6 +17,8 @@ class PGHand:
   
   # these are rankings; however, the zeros are all in a bunch to try to
   # avoid those, since they all compare the same and a 1 is much better.
+  # ranking() now uses a table generated from the rules (see
+  # build_ranking_table); this is kept to check that against.
   s_hand_rankings = {
     'hl': 0, # eleven / mixed nine
     'gk': 0, # low four / low six
@@ -185,14 +188,31 @@ class PGHand:
   # convenience method for creation
   @classmethod
   def create_with_tile_chars( cls, tile1_char, tile2_char ):
-    return PGHand.create( PGTile.with_char( tile1_char ), PGTile.with_char( tile2_char ) )
+    return PGHand.create( PGTileRegistry.with_char( tile1_char ), PGTileRegistry.with_char( tile2_char ) )
   @classmethod
   def create_with_tile_names( cls, tile1_name, tile2_name ):
-    return PGHand.create( PGTile.with_name( tile1_name ), PGTile.with_name( tile2_name ) )
+    return PGHand.create( PGTileRegistry.with_name( tile1_name ), PGTileRegistry.with_name( tile2_name ) )
+  
+  # convenience method for creation from compact tile indices (see pgpacked.py)
+  @classmethod
+  def create_with_indices( cls, index1, index2 ):
+    from paigow.pgpacked import char_for_index
+    return PGHand.create_with_tile_chars( char_for_index( index1 ), char_for_index( index2 ) )
+  
+  # the strength of the hand made of two compact tile indices, without
+  # creating the hand.
+  @classmethod
+  def strength_of_indices( cls, index1, index2 ):
+    from paigow.pgpacked import hand_strength
+    return hand_strength( index1, index2 )
   
   def tile_chars( self ):
     return str(self.high_tile.char()) + str(self.low_tile.char())
   
+  def indices( self ):
+    from paigow.pgpacked import index_for_char
+    return index_for_char( self.high_tile.char() ), index_for_char( self.low_tile.char() )
+  
   # return the label for this hand
   def label( self ):
     if self.is_gee_joon():
@@ -208,7 +228,7 @@ class PGHand:
     return str(self.numerical_value())
   
   def ranking( self ):
-    return PGHand.s_hand_rankings[self.tile_chars().lower()]
+    return PGHand.hand_ranking( self.high_tile.tile_rank, self.low_tile.tile_rank )
   
   # convenience functions for  naming and comparisons.
   def is_gee_joon( self ):
@@ -237,7 +257,10 @@ class PGHand:
   def high_tile_beats( self, other ):
     return self.high_tile.beats( other.high_tile )
   
-  def beats( self, other ):
+  # the rules for one hand beating another.  This is the long way
+  # around; it's only used to build the strength table below, and
+  # 'beats' et al use that table.
+  def beats_by_rules( self, other ):
     
     # check gee joon...
     if self.is_gee_joon():
@@ -291,11 +314,103 @@ class PGHand:
     else:
       return self.numerical_value() > other.numerical_value()  # different values, compare values
   
+  # Every hand is two tile ranks, and whether one hand beats another
+  # depends only on those ranks; so we walk the rules once for every
+  # possible hand and give each one an integer strength: the number of
+  # hands it beats.  Then comparing hands is comparing integers.  Hands
+  # that copy each other (e.g. all the zeroes) get the same strength.
+  #
+  # Indexed by [high tile rank][low tile rank]; built on first use.
+  s_hand_strengths = None
+  
+  # all the distinct hands, one per (high rank, low rank)
+  @classmethod
+  def all_distinct_hands( cls ):
+    hands = []
+    for high_rank in range( 16 ):
+      for low_rank in range( high_rank + 1 ):
+        hands.append( PGHand.create( PGTileRegistry.with_rank( high_rank, True ),
+                                     PGTileRegistry.with_rank( low_rank, high_rank != low_rank ) ) )
+    return hands
+  
+  @classmethod
+  def build_strength_table( cls ):
+    hands = cls.all_distinct_hands()
+    strengths = [ [ None ] * 16 for rank in range( 16 ) ]
+    for hand in hands:
+      strength = 0
+      for other in hands:
+        if hand.beats_by_rules( other ):
+          strength += 1
+      strengths[hand.high_tile.tile_rank][hand.low_tile.tile_rank] = strength
+    return strengths
+  
+  @classmethod
+  def hand_strength( cls, high_rank, low_rank ):
+    if cls.s_hand_strengths is None:
+      cls.s_hand_strengths = cls.build_strength_table()
+    return cls.s_hand_strengths[high_rank][low_rank]
+  
+  # The rankings used for sums and diffs (see PGSet.sum_and_diff) come
+  # from the strengths too: hands are numbered in order of strength,
+  # copies getting the same number, except that the hands that beat
+  # nothing (the zeroes) are 0 and the rest start at 5, leaving a gap
+  # so a 1 counts for much more than a 0.
+  #
+  # Indexed by [tile rank][tile rank], either way round; built on first use.
+  s_zero_ranking_gap = 4
+  s_hand_ranking_table = None
+  
+  @classmethod
+  def build_ranking_table( cls ):
+    strengths = [ cls.hand_strength( high_rank, low_rank ) for high_rank in range( 16 ) for low_rank in range( high_rank + 1 ) ]
+    ordered = sorted( set( strengths ) )
+    rankings = [ [ None ] * 16 for rank in range( 16 ) ]
+    for high_rank in range( 16 ):
+      for low_rank in range( high_rank + 1 ):
+        ranking = ordered.index( cls.hand_strength( high_rank, low_rank ) )
+        if ranking > 0:
+          ranking += cls.s_zero_ranking_gap
+        rankings[high_rank][low_rank] = ranking
+        rankings[low_rank][high_rank] = ranking
+    return rankings
+  
+  @classmethod
+  def hand_ranking( cls, rank1, rank2 ):
+    if cls.s_hand_ranking_table is None:
+      cls.s_hand_ranking_table = cls.build_ranking_table()
+    return cls.s_hand_ranking_table[rank1][rank2]
+  
+  # check the generated rankings against s_hand_rankings: return the
+  # list of ( tile chars, s_hand_rankings value, generated value ) for
+  # every hand where they differ.
+  @classmethod
+  def ranking_mismatches( cls ):
+    mismatches = []
+    for tile_chars in sorted( cls.s_hand_rankings ):
+      expected = cls.s_hand_rankings[tile_chars]
+      generated = cls.hand_ranking( PGTileRegistry.with_char( tile_chars[0] ).tile_rank,
+                                    PGTileRegistry.with_char( tile_chars[1] ).tile_rank )
+      if generated != expected:
+        mismatches.append( ( tile_chars, expected, generated ) )
+    return mismatches
+  
+  # the integer strength of this hand: higher beats lower, equal copies.
+  def strength( self ):
+    try:
+      return self.strength_key
+    except AttributeError:
+      self.strength_key = PGHand.hand_strength( self.high_tile.tile_rank, self.low_tile.tile_rank )
+      return self.strength_key
+  
+  def beats( self, other ):
+    return self.strength() > other.strength()
+  
   def is_beaten_by( self, other ):
-    return other.beats( self )
+    return self.strength() < other.strength()
   
   def copies( self, other ):
-    return ( not self.beats( other ) ) and ( not other.beats( self ) )
+    return self.strength() == other.strength()
   
 
 # ----------------------------------------------------
@@ -371,6 +486,30 @@ class PGHandTest( TestCase ):
     else:
       return 0
   
+  def test_strength_matches_rules( self ):
+    hands = PGHand.all_distinct_hands()
+    for hand1 in hands:
+      for hand2 in hands:
+        # gee joon 'beats' itself by the rules, but there's only one of them
+        if hand1.is_gee_joon() and hand2.is_gee_joon():
+          continue
+        self.assertEqual( hand1.beats( hand2 ), hand1.beats_by_rules( hand2 ) )
+        self.assertEqual( hand1.copies( hand2 ),
+                          not hand1.beats_by_rules( hand2 ) and not hand2.beats_by_rules( hand1 ) )
+  
+  def test_zeroes_copy( self ):
+    hand1 = PGHand.create_with_tile_names( "long six", "low four" )
+    hand2 = PGHand.create_with_tile_names( "high ten", "low ten" )
+    self.assertTrue( hand1.copies( hand2 ) )
+    self.assertFalse( hand1.beats( hand2 ) )
+    self.assertFalse( hand2.beats( hand1 ) )
+  
+  def test_ranking_matches_table( self ):
+    self.assertEqual( PGHand.ranking_mismatches(), [] )
+    hand = PGHand.create_with_tile_names( "low six", "mixed five" )
+    self.assertEqual( hand.ranking(), 5 )
+    self.assertEqual( PGHand.hand_ranking( hand.low_tile.tile_rank, hand.high_tile.tile_rank ), 5 )
+  
   def test_ranking( self ):
     hand1 = PGHand.create_with_tile_names( "gee joon", "low four" )
     self.assertEqual( hand1.ranking(), 61 )
@@ -0,0 +1,145 @@
+# This file defines the labels of every hand, for the page and for the
+# server.  A hand's label only depends on its two tiles, and there are
+# only 32 x 32 of those, so instead of asking the server for the labels
+# every time a tile is dragged, game_play.html gets all of them up
+# front in a small static script:
+#
+#   var g_hand_labels = { "AB": "wong", ... };
+#
+# keyed by the two tile chars in the order they're dragged into.  The
+# script is built by 'manage.py build_hand_label_script' and saved in
+# the site's static js directory with a hash of its contents in the
+# name (hand_labels.<hash>.js), so it can be cached forever: if the
+# labels ever change, so does the name.  The page is told the name by
+# the view, which works out the same hash from the same labels.
+#
+# The /paigow/data/player/hands endpoint stays for pages loaded without
+# the script; it answers from the same table, kept in memory.
+
+import hashlib
+import json
+import os
+
+from pgpacked import s_tile_chars
+
+s_static_dir = os.path.join( os.path.dirname( os.path.dirname( os.path.realpath( __file__ ) ) ), 'mainsite', 'static' )
+s_script_prefix = 'js/hand_labels.'
+
+# the labels by pair of tile chars, and the script and its name; None
+# until first use.
+s_hand_labels = None
+s_script_source = None
+s_script_name = None
+
+def hand_labels():
+  global s_hand_labels
+  if s_hand_labels is None:
+    from paigow.pghand import PGHand
+    labels = {}
+    for char1 in s_tile_chars:
+      for char2 in s_tile_chars:
+        labels[char1 + char2] = PGHand.create_with_tile_chars( char1, char2 ).label()
+    s_hand_labels = labels
+  return s_hand_labels
+
+# the labels of the two hands in four tile chars, "high|low" the way
+# data_hand_label answers.
+def labels_for_tile_chars( tile_chars ):
+  labels = hand_labels()
+  return labels[tile_chars[0:2]] + "|" + labels[tile_chars[2:4]]
+
+def script_source():
+  global s_script_source
+  if s_script_source is None:
+    s_script_source = ( "// built by 'manage.py build_hand_label_script' from paigow/pghandlabels.py; don't edit.\n" +
+                        "var g_hand_labels = " + json.dumps( hand_labels(), sort_keys = True, separators = ( ',', ':' ) ) + ";\n" )
+  return s_script_source
+
+# the script's name under the static directory, with its hash
+def script_name():
+  global s_script_name
+  if s_script_name is None:
+    s_script_name = s_script_prefix + hashlib.md5( script_source() ).hexdigest()[:12] + '.js'
+  return s_script_name
+
+def script_path( static_dir = s_static_dir ):
+  return os.path.join( static_dir, script_name() )
+
+# whether the saved script is the one the current labels make
+def script_is_current( static_dir = s_static_dir ):
+  path = script_path( static_dir )
+  if not os.path.exists( path ):
+    return False
+  with open( path ) as script_file:
+    return script_file.read() == script_source()
+
+# save the script, and remove any older ones; return its path.
+def save_script( static_dir = s_static_dir ):
+  path = script_path( static_dir )
+  script_dir = os.path.dirname( path )
+  if not os.path.isdir( script_dir ):
+    os.makedirs( script_dir )
+  prefix = os.path.basename( s_script_prefix )
+  for name in os.listdir( script_dir ):
+    if name.startswith( prefix ) and name.endswith( '.js' ) and name != os.path.basename( path ):
+      os.remove( os.path.join( script_dir, name ) )
+  with open( path, 'w' ) as script_file:
+    script_file.write( script_source() )
+  return path
+
+
+# ----------------------------------------------------
+# Test the hand labels
+
+from django.test import TestCase
+
+class PGHandLabelsTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_labels( self ):
+    from paigow.pghand import PGHand
+    self.assertEqual( len( hand_labels() ), 32 * 32 )
+    self.assertEqual( labels_for_tile_chars( "AbLn" ),
+                      PGHand.create_with_tile_chars( "A", "b" ).label() + "|" + PGHand.create_with_tile_chars( "L", "n" ).label() )
+    self.assertEqual( hand_labels()["Pp"], "gee joon" )
+
+  def test_script_is_current( self ):
+    # if this fails, run 'manage.py build_hand_label_script'
+    self.assertTrue( script_is_current(), script_path() + " is missing or out of date" )
+
+  def test_save_script( self ):
+    import shutil
+    import tempfile
+    static_dir = tempfile.mkdtemp()
+    try:
+      os.makedirs( os.path.join( static_dir, 'js' ) )
+      stale = os.path.join( static_dir, 'js', 'hand_labels.0123456789ab.js' )
+      open( stale, 'w' ).close()
+      self.assertFalse( script_is_current( static_dir ) )
+      save_script( static_dir )
+      self.assertTrue( script_is_current( static_dir ) )
+      self.assertFalse( os.path.exists( stale ) )
+    finally:
+      shutil.rmtree( static_dir )
+
+  def test_view_uses_table( self ):
+    with self.assertNumQueries( 0 ):
+      response = self.client.get( '/paigow/data/player/hands', { 'hand': 'AbLn' } )
+    self.assertEqual( response.content, labels_for_tile_chars( "AbLn" ) )
+
+  def test_page_loads_script( self ):
+    from django.conf import settings
+    from paigow.pgtestutils import log_in, two_player_game
+    game, player, opponent = two_player_game( "labels" )
+    log_in( self.client, player )
+    response = self.client.get( '/paigow/game/' + str( game.id ) + '/1', HTTP_USER_AGENT = 'test' )
+    self.assertEqual( response.status_code, 200 )
+    self.assertIn( settings.STATIC_URL + script_name(), response.content )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
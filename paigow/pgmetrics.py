@@ -0,0 +1,247 @@
+# This file keeps per-view request metrics -- how many database queries
+# each request made, how long they took, how long the whole request
+# took and how big the response was -- and exports them as Prometheus
+# histograms at /paigow/metrics.
+#
+# PGMetricsMiddleware does the measuring.  To count queries without
+# Django's DEBUG query log (which keeps the text of every query), it
+# gives each thread's database connection a cursor wrapper that just
+# adds up the count and time; the usual cursor is still underneath, so
+# connection.queries keeps working when DEBUG is on.
+#
+# The histograms are held in this process only, so each server process
+# reports its own; Prometheus sums them across processes.
+#
+# /paigow/metrics is only shown when DEBUG is on, or to the addresses
+# in settings.PAIGOW_METRICS_ALLOWED_IPS (s_metrics_allowed_ips if it's
+# not set), i.e. the Prometheus server.
+
+import threading
+import time
+
+from django.db import connections
+from django.db.backends.util import CursorWrapper
+
+# the histograms we keep: name, help text, and bucket upper bounds
+s_metrics = (
+  ( 'paigow_view_queries', "Database queries per request",
+    ( 0, 1, 2, 5, 10, 20, 50, 100, 200 ) ),
+  ( 'paigow_view_query_seconds', "Time spent in database queries per request",
+    ( 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5 ) ),
+  ( 'paigow_view_seconds', "Wall time per request",
+    ( 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0 ) ),
+  ( 'paigow_view_response_bytes', "Response size per request",
+    ( 128, 512, 1024, 4096, 16384, 65536, 262144, 1048576 ) ),
+)
+
+# who may see /paigow/metrics when DEBUG is off
+s_metrics_allowed_ips = ( '127.0.0.1', )
+
+s_buckets = dict( ( name, buckets ) for name, help, buckets in s_metrics )
+
+# the histograms, by ( metric name, view name ): a list of the count in
+# each bucket (not cumulative; the last one is +Inf), then the sum.
+s_histograms = {}
+s_histograms_lock = threading.Lock()
+
+# the running totals for the request each thread is handling
+s_request = threading.local()
+
+# ----------------------------------------------------
+# counting queries
+
+class PGMetricsCursorWrapper( CursorWrapper ):
+
+  def execute( self, sql, params = () ):
+    start = time.time()
+    try:
+      return self.cursor.execute( sql, params )
+    finally:
+      count_query( time.time() - start )
+
+  def executemany( self, sql, param_list ):
+    start = time.time()
+    try:
+      return self.cursor.executemany( sql, param_list )
+    finally:
+      count_query( time.time() - start )
+
+def count_query( seconds ):
+  if getattr( s_request, 'collecting', False ):
+    s_request.queries += 1
+    s_request.query_seconds += seconds
+
+# give the connection our cursor wrapper (once per connection object;
+# Django keeps one per thread).  It goes around whatever cursor the
+# connection would have made, so the debug cursor (and the query log
+# that DEBUG and assertNumQueries use) still works underneath it.
+def install_cursor_wrapper( connection ):
+  if getattr( connection, 'pgmetrics_installed', False ):
+    return
+  make_cursor = connection.cursor
+  def cursor():
+    return PGMetricsCursorWrapper( make_cursor(), connection )
+  connection.cursor = cursor
+  connection.pgmetrics_installed = True
+
+# ----------------------------------------------------
+# histograms
+
+def observe( metric, view, value ):
+  buckets = s_buckets[metric]
+  index = len( buckets )
+  for bucket_num, bound in enumerate( buckets ):
+    if value <= bound:
+      index = bucket_num
+      break
+  key = ( metric, view )
+  with s_histograms_lock:
+    histogram = s_histograms.get( key )
+    if histogram is None:
+      histogram = [ 0 ] * ( len( buckets ) + 1 ) + [ 0 ]
+      s_histograms[key] = histogram
+    histogram[index] += 1
+    histogram[-1] += value
+
+def reset():
+  with s_histograms_lock:
+    s_histograms.clear()
+
+# the name we record a view under
+def view_name( view_func ):
+  return getattr( view_func, '__module__', '' ) + "." + getattr( view_func, '__name__', repr( view_func ) )
+
+def format_bound( bound ):
+  if isinstance( bound, float ):
+    return repr( bound )
+  return str( bound )
+
+def format_label( value ):
+  return value.replace( '\\', '\\\\' ).replace( '"', '\\"' ).replace( '\n', '\\n' )
+
+# all the histograms in the Prometheus text exposition format
+def prometheus_text():
+  with s_histograms_lock:
+    histograms = dict( ( key, list( value ) ) for key, value in s_histograms.items() )
+  lines = []
+  for metric, help, buckets in s_metrics:
+    lines.append( "# HELP " + metric + " " + help )
+    lines.append( "# TYPE " + metric + " histogram" )
+    for key in sorted( histograms ):
+      if key[0] != metric:
+        continue
+      histogram = histograms[key]
+      label = 'view="' + format_label( key[1] ) + '"'
+      cumulative = 0
+      for bucket_num, bound in enumerate( buckets ):
+        cumulative += histogram[bucket_num]
+        lines.append( metric + '_bucket{' + label + ',le="' + format_bound( bound ) + '"} ' + str( cumulative ) )
+      cumulative += histogram[len( buckets )]
+      lines.append( metric + '_bucket{' + label + ',le="+Inf"} ' + str( cumulative ) )
+      lines.append( metric + '_sum{' + label + '} ' + repr( float( histogram[-1] ) ) )
+      lines.append( metric + '_count{' + label + '} ' + str( cumulative ) )
+  return "\n".join( lines ) + "\n"
+
+# whether this request may see the metrics
+def metrics_allowed( request ):
+  from django.conf import settings
+  if settings.DEBUG:
+    return True
+  allowed_ips = getattr( settings, 'PAIGOW_METRICS_ALLOWED_IPS', s_metrics_allowed_ips )
+  return request.META.get( 'REMOTE_ADDR' ) in allowed_ips
+
+# ----------------------------------------------------
+# the middleware
+
+class PGMetricsMiddleware( object ):
+
+  def process_request( self, request ):
+    for alias in connections:
+      install_cursor_wrapper( connections[alias] )
+    s_request.collecting = True
+    s_request.queries = 0
+    s_request.query_seconds = 0.0
+    s_request.view = None
+    s_request.start = time.time()
+
+  def process_view( self, request, view_func, view_args, view_kwargs ):
+    s_request.view = view_name( view_func )
+
+  def process_response( self, request, response ):
+    if not getattr( s_request, 'collecting', False ):
+      return response
+    s_request.collecting = False
+    view = s_request.view
+    if view is None:
+      return response
+    # don't read the content of a response made from an iterator: that
+    # would use it up.  Without a Content-Length its size isn't counted.
+    size = response.get( 'Content-Length' )
+    if size is None and not response._base_content_is_iter:
+      size = len( response.content )
+    observe( 'paigow_view_queries', view, s_request.queries )
+    observe( 'paigow_view_query_seconds', view, s_request.query_seconds )
+    observe( 'paigow_view_seconds', view, time.time() - s_request.start )
+    if size is not None:
+      observe( 'paigow_view_response_bytes', view, int( size ) )
+    return response
+
+
+# ----------------------------------------------------
+# Test the metrics
+
+from django.test import TestCase
+
+class PGMetricsTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_histogram( self ):
+    reset()
+    observe( 'paigow_view_queries', 'v', 1 )
+    observe( 'paigow_view_queries', 'v', 3 )
+    observe( 'paigow_view_queries', 'v', 1000 )
+    text = prometheus_text()
+    self.assertIn( 'paigow_view_queries_bucket{view="v",le="1"} 1\n', text )
+    self.assertIn( 'paigow_view_queries_bucket{view="v",le="5"} 2\n', text )
+    self.assertIn( 'paigow_view_queries_bucket{view="v",le="+Inf"} 3\n', text )
+    self.assertIn( 'paigow_view_queries_sum{view="v"} 1004.0\n', text )
+    self.assertIn( 'paigow_view_queries_count{view="v"} 3\n', text )
+    self.assertIn( '# TYPE paigow_view_seconds histogram\n', text )
+
+  def test_middleware_counts_queries( self ):
+    reset()
+    response = self.client.get( '/paigow/data/player/hands', { 'hand': 'AbLn' } )
+    self.assertEqual( response.status_code, 200 )
+    response = self.client.get( '/paigow/metrics' )
+    self.assertEqual( response.status_code, 200 )
+    self.assertTrue( response['Content-Type'].startswith( 'text/plain' ) )
+    key = ( 'paigow_view_queries', 'paigow.views.data_hand_label' )
+    self.assertEqual( sum( s_histograms[key][:-1] ), 1 )
+    self.assertEqual( s_histograms[key][-1], 0 )
+    self.assertIn( 'paigow_view_response_bytes_count{view="paigow.views.data_hand_label"} 1', response.content )
+
+  def test_metrics_are_private( self ):
+    response = self.client.get( '/paigow/metrics', REMOTE_ADDR = '10.1.2.3' )
+    self.assertEqual( response.status_code, 403 )
+
+  def test_iterator_response_is_left_alone( self ):
+    from django.http import HttpResponse
+    reset()
+    middleware = PGMetricsMiddleware()
+    middleware.process_request( None )
+    middleware.process_view( None, iterator_view, (), {} )
+    response = middleware.process_response( None, HttpResponse( iter( [ "a", "b" ] ) ) )
+    self.assertEqual( response.content, "ab" )
+    self.assertNotIn( ( 'paigow_view_response_bytes', view_name( iterator_view ) ), s_histograms )
+
+# a view for test_iterator_response_is_left_alone
+def iterator_view( request ):
+  pass
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
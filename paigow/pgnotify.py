@@ -0,0 +1,261 @@
+# This file defines the PGNotify python class, the in-process bus that
+# tells waiting browsers when a deal changes, so game_play.html can
+# long-poll for its opponent's state instead of asking every few
+# seconds.
+#
+# The version a browser waits past is the deal's version in the
+# database (PGDeal.version, the same one the ETags use, see
+# pgversion.py), which goes up every time the deal's state changes
+# (PGGame.bump_version).  The bus only carries a wake-up: bump_version
+# calls changed() once the new version is saved, and a request waiting
+# on the deal reads the version from the database again.  A request
+# waits until the version is past the one it last saw, or until it
+# times out.
+#
+# The bus only knows about changes made in this process.  If the
+# server runs several processes, a change made in another one is only
+# seen when the wait times out and reads the database again, so
+# nothing is missed; it's just slower.
+#
+# Every waiting request holds one of the server's threads for up to
+# s_long_poll_seconds, one for each open game page.  The Procfile's
+# 'runserver' is a single process with a thread per request, so at
+# most s_max_waiters (settings.PAIGOW_MAX_LONG_POLLS, if it's set) wait
+# at once.  Past that, a request is answered right away with the
+# current version, and the page asks again a few seconds later, the
+# way it polled before there was a bus.  A site with more games open
+# at once needs a server with enough threads for them, and a higher
+# PAIGOW_MAX_LONG_POLLS.
+
+import threading
+
+# how long a long-poll request waits for a change before answering
+# anyway, in seconds (less than the usual 30-second proxy timeout)
+s_long_poll_seconds = 25
+
+# how many requests may wait at once (see above)
+s_max_waiters = 50
+
+# deals we count wake-ups for; the oldest are dropped past this
+s_max_deals = 10000
+
+class PGNotify:
+
+  s_condition = threading.Condition()
+
+  # ( game id, deal number ) -> how many times it changed in this process
+  s_deals = {}
+
+  # how many requests are waiting
+  s_waiters = 0
+
+  # the deal changed: wake up everybody waiting on it.
+  @classmethod
+  def changed( cls, game_id, deal_number ):
+    key = ( int( game_id ), int( deal_number ) )
+    with cls.s_condition:
+      if key not in cls.s_deals and len( cls.s_deals ) >= s_max_deals:
+        del cls.s_deals[ min( cls.s_deals ) ]
+      cls.s_deals[key] = cls.s_deals.get( key, 0 ) + 1
+      cls.s_condition.notify_all()
+
+  # how many times the deal changed in this process
+  @classmethod
+  def current( cls, game_id, deal_number ):
+    with cls.s_condition:
+      return cls.s_deals.get( ( int( game_id ), int( deal_number ) ), 0 )
+
+  # the deal's version in the database, or None if there's no such deal
+  @classmethod
+  def deal_version( cls, game_id, deal_number ):
+    from paigow.models import PGDeal
+    versions = PGDeal.versions( game_id, deal_number )
+    if versions is None:
+      return None
+    return versions[1]
+
+  # count a request as waiting, unless too many already are; return
+  # whether it may wait.
+  @classmethod
+  def start_waiting( cls ):
+    from django.conf import settings
+    max_waiters = getattr( settings, 'PAIGOW_MAX_LONG_POLLS', s_max_waiters )
+    with cls.s_condition:
+      if cls.s_waiters >= max_waiters:
+        return False
+      cls.s_waiters += 1
+      return True
+
+  @classmethod
+  def stop_waiting( cls ):
+    with cls.s_condition:
+      cls.s_waiters -= 1
+
+  # wait until the deal's version is past 'since' or the time is up;
+  # return the deal's version then (None if there's no such deal).  If
+  # too many requests are waiting already, return it right away.
+  @classmethod
+  def wait( cls, game_id, deal_number, since, seconds = s_long_poll_seconds ):
+    if not cls.start_waiting():
+      return cls.deal_version( game_id, deal_number )
+    try:
+      return cls.wait_for_change( game_id, deal_number, since, seconds )
+    finally:
+      cls.stop_waiting()
+
+  @classmethod
+  def wait_for_change( cls, game_id, deal_number, since, seconds ):
+    import time
+    key = ( int( game_id ), int( deal_number ) )
+    deadline = time.time() + seconds
+    while True:
+      # note the wake-ups before reading the version, so a change saved
+      # in between still wakes us
+      with cls.s_condition:
+        changes = cls.s_deals.get( key, 0 )
+      version = cls.deal_version( game_id, deal_number )
+      if version is None or version > since or time.time() >= deadline:
+        return version
+      with cls.s_condition:
+        while cls.s_deals.get( key, 0 ) == changes:
+          remaining = deadline - time.time()
+          if remaining <= 0:
+            break
+          cls.s_condition.wait( remaining )
+
+  @classmethod
+  def clear( cls ):
+    with cls.s_condition:
+      cls.s_deals.clear()
+
+
+# ----------------------------------------------------
+# Test PGNotify class
+
+from django.test import TestCase
+
+# versions kept in a dict instead of the database, so another thread
+# can change them (the test database is only seen by this one)
+class PGTestNotify( PGNotify ):
+
+  s_versions = {}
+
+  @classmethod
+  def deal_version( cls, game_id, deal_number ):
+    return cls.s_versions.get( ( int( game_id ), int( deal_number ) ) )
+
+  @classmethod
+  def bump( cls, game_id, deal_number ):
+    cls.s_versions[ ( game_id, deal_number ) ] += 1
+    cls.changed( game_id, deal_number )
+
+class PGNotifyTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    PGNotify.clear()
+
+  def test_wait_returns_on_change( self ):
+    PGTestNotify.s_versions = { ( 1, 1 ): 3 }
+    self.assertEqual( PGTestNotify.wait( 1, 1, 3, 0.01 ), 3 )
+    self.assertEqual( PGTestNotify.wait( 1, 2, 3, 5 ), None )
+    timer = threading.Timer( 0.05, PGTestNotify.bump, ( 1, 1 ) )
+    timer.start()
+    version = PGTestNotify.wait( 1, 1, 3, 5 )
+    timer.join()
+    self.assertEqual( version, 4 )
+    self.assertEqual( PGTestNotify.wait( 1, 1, 3, 5 ), 4 )
+    self.assertEqual( PGNotify.current( 1, 1 ), 1 )
+
+    # a wake-up that isn't a new version (say, not committed yet) goes
+    # back to waiting
+    timer = threading.Timer( 0.05, PGTestNotify.changed, ( 1, 1 ) )
+    timer.start()
+    self.assertEqual( PGTestNotify.wait( 1, 1, 4, 0.2 ), 4 )
+    timer.join()
+    self.assertEqual( PGNotify.current( 1, 1 ), 2 )
+
+  def test_player_states_notify( self ):
+    from paigow.pgtestutils import two_player_game
+    game, player, opponent = two_player_game( "notify" )
+    pgpid = game.player_in_deal( player, 1 )
+    changes = PGNotify.current( game.id, 1 )
+    version = PGNotify.deal_version( game.id, 1 )
+    pgpid.player_is_previewing_hands()
+    self.assertEqual( PGNotify.current( game.id, 1 ), changes + 1 )
+    self.assertTrue( PGNotify.deal_version( game.id, 1 ) > version )
+    pgpid.player_has_unpreviewed_hands()
+    self.assertEqual( PGNotify.current( game.id, 1 ), changes + 2 )
+
+  def test_long_poll_view( self ):
+    from paigow.pgtestutils import log_in, two_player_game
+    game, player, opponent = two_player_game( "notify view" )
+    log_in( self.client, player )
+    url = '/paigow/data/game/' + str( game.id ) + '/1/opponent_state/wait'
+    version = PGNotify.deal_version( game.id, 1 )
+    response = self.client.get( url, { 'since': -1 } )
+    self.assertEqual( response.content, "|hasn't seen tiles|" + str( version ) )
+    game.player_in_deal( opponent, 1 ).player_is_previewing_hands()
+    response = self.client.get( url, { 'since': version } )
+    self.assertEqual( response.content, "|double-checking...|" + str( PGNotify.deal_version( game.id, 1 ) ) )
+    for since in ( 'soon', '' ):
+      self.assertEqual( self.client.get( url, { 'since': since } ).status_code, 405 )
+      self.assertEqual( self.client.get( '/paigow/data/game/' + str( game.id ) + '/1/snapshot/medium', { 'since': since } ).status_code, 405 )
+
+  def test_long_poll_behind_answers_right_away( self ):
+    import json
+    import time
+    from django.test.utils import override_settings
+    from paigow.pgtestutils import log_in, two_player_game
+    game, player, opponent = two_player_game( "notify behind" )
+    log_in( self.client, player )
+    url = '/paigow/data/game/' + str( game.id ) + '/1/snapshot/medium'
+    version = PGNotify.deal_version( game.id, 1 )
+    started = time.time()
+    response = self.client.get( url, { 'since': version - 1 } )
+    self.assertTrue( time.time() - started < 5 )
+    self.assertEqual( json.loads( response.content )['version'], version )
+
+    # with no room to wait, even an up-to-date request is answered
+    with override_settings( PAIGOW_MAX_LONG_POLLS = 0 ):
+      started = time.time()
+      response = self.client.get( url, { 'since': version } )
+      self.assertTrue( time.time() - started < 5 )
+    self.assertEqual( json.loads( response.content )['version'], version )
+    self.assertEqual( PGNotify.s_waiters, 0 )
+
+  def test_woken_snapshot_is_scored( self ):
+    # whoever a change wakes must read the deal as it is after the
+    # change, scores and all, and the game over if it is
+    from paigow.models.pggame import s_game_goal
+    from paigow.pgsnapshot import deal_snapshot
+    from paigow.pgtestutils import two_player_game
+    game, player, opponent = two_player_game( "notify score", 1 )
+    pgpid = game.player_in_deal( player, 1 )
+    pgpido = game.player_in_deal( opponent, 1 )
+    pgpid.add_to_score( s_game_goal - 1 )
+    pgpido.add_to_score( s_game_goal - 1 )
+    pgpid.player_is_ready( pgpid.set1, pgpid.set2, pgpid.set3 )
+    woken = []
+    changed = PGNotify.__dict__['changed']
+    def record( cls, game_id, deal_number ):
+      woken.append( deal_snapshot( int( game_id ), int( deal_number ), player.id, 'medium' ) )
+    PGNotify.changed = classmethod( record )
+    try:
+      pgpido.player_is_ready( pgpido.set1, pgpido.set2, pgpido.set3 )
+    finally:
+      PGNotify.changed = changed
+    snapshot = deal_snapshot( game.id, 1, player.id, 'medium' )
+    self.assertTrue( woken )
+    for woken_snapshot in woken:
+      self.assertEqual( woken_snapshot, snapshot )
+    self.assertNotEqual( snapshot['score'], str( s_game_goal - 1 ) + " - " + str( s_game_goal - 1 ) )
+    self.assertTrue( snapshot['game_over'] )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,118 @@
+# This file orders a player's three (already set) sets into the 3, 2
+# and 1 point slots by expected points, using the exact win/push/loss
+# counts from the solver (see pgsolver.py) instead of the pairwise
+# first_set_is_better rules.
+#
+# Each set's value is its chance of winning less its chance of losing
+# against a random opponent set, so a slot's expected points (net of
+# what the opponent takes) is its points times the value of the set in
+# it.  We score all six ways of assigning the sets to slots at once and
+# take the best; ties go to the first permutation, which keeps the
+# dealt order.
+#
+# The values are looked up by split key and remembered, so once the
+# table is loaded ordering a deal is a few dictionary lookups and one
+# small array product.
+
+from itertools import permutations
+
+import numpy
+
+from pgpacked import unpack_set
+from pgtrace import PGTrace
+
+# the points for the three slots, best first
+s_slot_points = numpy.array( [ 3.0, 2.0, 1.0 ] )
+
+# every way to assign three sets to the three slots, (6, 3): row p says
+# which set goes in each slot.  The identity comes first.
+s_permutations = numpy.array( list( permutations( range( 3 ) ) ) )
+
+# the value of each set we've looked at, by split key
+s_set_values = {}
+
+# the value (chance of winning less chance of losing) of a packed set,
+# as set: tiles 0/1 and 2/3 as the hands.
+def set_value( packed ):
+  from paigow.pgsolver import split_key, outcome_counts_table, outcome_counts
+  indices = unpack_set( packed )
+  key = split_key( indices )
+  value = s_set_values.get( key )
+  if value is None:
+    counts = outcome_counts_table().get( key )
+    if counts is None:
+      counts = outcome_counts( indices )[0]
+    win, push, loss = counts
+    value = float( win - loss ) / ( win + push + loss )
+    s_set_values[key] = value
+  return value
+
+# the expected points of each of the six slot assignments for sets with
+# these values
+def permutation_points( values ):
+  return numpy.dot( numpy.asarray( values )[s_permutations], s_slot_points )
+
+# the best assignment of sets with these values to slots: a tuple of
+# which set goes in each slot, best slot first.
+def best_permutation( values ):
+  return tuple( s_permutations[ numpy.argmax( permutation_points( values ) ) ] )
+
+# order three packed (already set) sets, best first
+def order_packed( packed_sets ):
+  values = [ set_value( packed ) for packed in packed_sets ]
+  permutation = best_permutation( values )
+  if PGTrace.enabled:
+    from paigow.pgpacked import tile_chars_from_packed
+    PGTrace.event( 'expected_points_order', tuple( [ tile_chars_from_packed( packed ) for packed in packed_sets ] ), tuple( values ), permutation )
+  return [ packed_sets[index] for index in permutation ]
+
+# order three (already set) PGSets, best first
+def order_sets( sets ):
+  values = [ set_value( set.packed() ) for set in sets ]
+  permutation = best_permutation( values )
+  if PGTrace.enabled:
+    PGTrace.event( 'expected_points_order', tuple( [ set.tile_chars() for set in sets ] ), tuple( values ), permutation )
+  return [ sets[index] for index in permutation ]
+
+
+# ----------------------------------------------------
+# Test the ordering
+
+from django.test import TestCase
+
+class PGOrderingTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_permutation_points( self ):
+    points = permutation_points( [ 0.1, 0.5, -0.2 ] )
+    self.assertEqual( len( points ), 6 )
+    self.assertAlmostEqual( points[0], 0.3 + 1.0 - 0.2 )
+    self.assertEqual( best_permutation( [ 0.1, 0.5, -0.2 ] ), ( 1, 0, 2 ) )
+    self.assertEqual( best_permutation( [ 0.0, 0.0, 0.0 ] ), ( 0, 1, 2 ) )
+
+  def test_set_value( self ):
+    from paigow.pgpacked import packed_from_tile_chars
+    from paigow.pgsolver import outcome_probabilities, WIN, LOSS
+    packed = packed_from_tile_chars( "AHbL" )
+    probabilities = outcome_probabilities( packed )[0]
+    self.assertAlmostEqual( set_value( packed ), probabilities[WIN] - probabilities[LOSS] )
+    # the same split in any order has the same value
+    self.assertEqual( set_value( packed_from_tile_chars( "LbHA" ) ), set_value( packed ) )
+    self.assertTrue( set_value( packed_from_tile_chars( "AaLO" ) ) > set_value( packed_from_tile_chars( "HIJK" ) ) )
+
+  def test_order_sets( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgpacked import packed_from_tile_chars, tile_chars_from_packed
+    chars = ( "HIJK", "AaLO", "bBcC" )
+    ordered = order_sets( [ PGSet.create_with_tile_chars( c ) for c in chars ] )
+    packed = order_packed( [ packed_from_tile_chars( c ) for c in chars ] )
+    self.assertEqual( [ set.tile_chars() for set in ordered ], [ tile_chars_from_packed( p ) for p in packed ] )
+    self.assertEqual( ordered[2].tile_chars(), "HIJK" )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,254 @@
+# This file defines a compact, integer-only representation of tiles,
+# sets and deals for the engine, so that bulk work (simulations,
+# tables, benchmarks) doesn't allocate a python object per tile.
+#
+#   tile:  an index 0..31 into s_tile_chars (the order of the tile
+#          table: 'P', 'p', 'A', 'a', ... 'O', 'o').
+#   hand:  two tile indices.
+#   set:   four tile indices packed five bits apiece into an int,
+#          first tile in the low bits.  Like PGSet, tiles 0 and 1 are
+#          one hand and 2 and 3 the other.
+#   deal:  a 32-entry bytearray of tile indices.
+#
+# The tile_chars() strings used everywhere else convert to and from
+# these at the boundaries.
+
+from pgtileregistry import PGTileRegistry
+
+# the tile for each index
+s_tile_chars = "PpAaBbCcDdEeFfGgHhIiJjKkLlMmNnOo"
+s_num_tiles = len( s_tile_chars )
+
+s_index_for_char = dict( ( ch, index ) for index, ch in enumerate( s_tile_chars ) )
+
+# five bits per tile in a packed set
+s_tile_bits = 5
+s_tile_mask = ( 1 << s_tile_bits ) - 1
+
+# per-index tables, filled in from the tile registry on first use:
+# tile rank, and hand strength (see PGHand.hand_strength) for every
+# pair of indices, at [index1 * 32 + index2].
+s_tile_ranks = None
+s_hand_strengths = None
+
+def load_tables():
+  global s_tile_ranks, s_hand_strengths
+  if s_hand_strengths is not None:
+    return
+  from paigow.pghand import PGHand
+  ranks = [ PGTileRegistry.with_char( ch ).tile_rank for ch in s_tile_chars ]
+  strengths = [ 0 ] * ( s_num_tiles * s_num_tiles )
+  for index1 in range( s_num_tiles ):
+    for index2 in range( s_num_tiles ):
+      high_rank = max( ranks[index1], ranks[index2] )
+      low_rank = min( ranks[index1], ranks[index2] )
+      strengths[index1 * s_num_tiles + index2] = PGHand.hand_strength( high_rank, low_rank )
+  s_tile_ranks = ranks
+  s_hand_strengths = strengths
+
+# ----------------------------------------------------
+# conversions
+
+def index_for_char( tile_char ):
+  return s_index_for_char[tile_char]
+
+def char_for_index( index ):
+  return s_tile_chars[index]
+
+def indices_from_tile_chars( tile_chars ):
+  return [ s_index_for_char[ch] for ch in tile_chars ]
+
+def tile_chars_from_indices( indices ):
+  return "".join( [ s_tile_chars[index] for index in indices ] )
+
+def pack_set( indices ):
+  return indices[0] | ( indices[1] << 5 ) | ( indices[2] << 10 ) | ( indices[3] << 15 )
+
+def unpack_set( packed ):
+  return ( packed & s_tile_mask,
+           ( packed >> 5 ) & s_tile_mask,
+           ( packed >> 10 ) & s_tile_mask,
+           ( packed >> 15 ) & s_tile_mask )
+
+def packed_from_tile_chars( tile_chars ):
+  return pack_set( indices_from_tile_chars( tile_chars ) )
+
+def tile_chars_from_packed( packed ):
+  return tile_chars_from_indices( unpack_set( packed ) )
+
+# the 32-bit mask of which tiles are in the set (order doesn't matter)
+def set_mask( packed ):
+  i0, i1, i2, i3 = unpack_set( packed )
+  return ( 1 << i0 ) | ( 1 << i1 ) | ( 1 << i2 ) | ( 1 << i3 )
+
+def deck_from_tile_chars( deck_chars ):
+  return bytearray( indices_from_tile_chars( deck_chars ) )
+
+def tile_chars_from_deck( deck ):
+  return tile_chars_from_indices( deck )
+
+# A deck's rank among all 32! orderings of the tiles (its Lehmer code:
+# each tile's position among the tiles not dealt yet, as the digits of
+# a mixed-radix number), and back.  32! needs 118 bits, so the rank fits
+# in s_compact_deck_bytes bytes; compact_deck writes those bytes in
+# URL-safe base64 without padding (22 chars, vs. 32 for the tile chars).
+s_compact_deck_bytes = 16
+
+def deck_rank( deck ):
+  rank = 0
+  remaining = range( s_num_tiles )
+  for index in deck:
+    position = remaining.index( index )
+    rank = rank * len( remaining ) + position
+    del remaining[position]
+  return rank
+
+def deck_from_rank( rank ):
+  positions = []
+  for base in range( 1, s_num_tiles + 1 ):
+    positions.append( rank % base )
+    rank //= base
+  positions.reverse()
+  remaining = range( s_num_tiles )
+  return bytearray( [ remaining.pop( position ) for position in positions ] )
+
+def compact_deck( deck ):
+  import base64
+  rank = deck_rank( deck )
+  rank_bytes = "".join( [ chr( ( rank >> ( 8 * byte_num ) ) & 0xff ) for byte_num in reversed( range( s_compact_deck_bytes ) ) ] )
+  return base64.urlsafe_b64encode( rank_bytes ).rstrip( "=" )
+
+def deck_from_compact( compact ):
+  import base64
+  rank_bytes = base64.urlsafe_b64decode( str( compact ) + "=" * ( -len( compact ) % 4 ) )
+  rank = 0
+  for ch in rank_bytes:
+    rank = ( rank << 8 ) | ord( ch )
+  return deck_from_rank( rank )
+
+# the packed sets a seat gets from a deal, the same way
+# PGGame.assure_player_in_deal deals them: seats alternate tiles, and
+# each set is every other tile from an eight-tile stretch.
+def sets_from_deck( deck, seat ):
+  sets = []
+  for set_num in range( 3 ):
+    index = seat + set_num * 8
+    sets.append( pack_set( ( deck[index], deck[index + 2], deck[index + 4], deck[index + 6] ) ) )
+  return sets
+
+# ----------------------------------------------------
+# engine
+
+def hand_strength( index1, index2 ):
+  load_tables()
+  return s_hand_strengths[index1 * s_num_tiles + index2]
+
+def hand_beats( hand1, hand2 ):
+  return hand_strength( hand1[0], hand1[1] ) > hand_strength( hand2[0], hand2[1] )
+
+# the strengths of the high and low hands of a packed set
+def set_strengths( packed ):
+  load_tables()
+  i0, i1, i2, i3 = unpack_set( packed )
+  strength1 = s_hand_strengths[i0 * s_num_tiles + i1]
+  strength2 = s_hand_strengths[i2 * s_num_tiles + i3]
+  if strength2 > strength1:
+    return strength2, strength1
+  return strength1, strength2
+
+# compare two packed sets the way PGSet does: 1 if the first set wins
+# (both its hands beat the other's), -1 if it loses, 0 for a push.
+def compare_sets( packed1, packed2 ):
+  high1, low1 = set_strengths( packed1 )
+  high2, low2 = set_strengths( packed2 )
+  if high1 > high2 and low1 > low2:
+    return 1
+  if high2 > high1 and low2 > low1:
+    return -1
+  return 0
+
+# the auto-set table key (see pgautosettable.py) for a packed set
+def table_key( packed ):
+  return "".join( sorted( [ s_tile_chars[index].lower() for index in unpack_set( packed ) ] ) )
+
+# re-arrange a packed set to match an auto-set table arrangement
+def arrange_set( packed, arrangement ):
+  unused = list( unpack_set( packed ) )
+  arranged = []
+  for ch in arrangement:
+    for index in unused:
+      if s_tile_chars[index].lower() == ch:
+        unused.remove( index )
+        arranged.append( index )
+        break
+  return pack_set( arranged )
+
+
+# ----------------------------------------------------
+# Test the packed representation
+
+from django.test import TestCase
+
+class PGPackedTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_chars_match_tiles( self ):
+    self.assertEqual( "".join( [ tile.tile_char for tile in PGTileRegistry.all() ] ), s_tile_chars )
+
+  def test_round_trip( self ):
+    packed = packed_from_tile_chars( "AbLn" )
+    self.assertEqual( tile_chars_from_packed( packed ), "AbLn" )
+    self.assertEqual( set_mask( packed ), set_mask( packed_from_tile_chars( "nLbA" ) ) )
+    deck = deck_from_tile_chars( s_tile_chars[::-1] )
+    self.assertEqual( len( deck ), 32 )
+    self.assertEqual( tile_chars_from_deck( deck ), s_tile_chars[::-1] )
+
+  def test_compact_deck( self ):
+    import random
+    deck = deck_from_tile_chars( s_tile_chars )
+    self.assertEqual( deck_rank( deck ), 0 )
+    self.assertEqual( deck_from_rank( 0 ), deck )
+    self.assertEqual( deck_from_rank( deck_rank( deck[::-1] ) ), deck[::-1] )
+    rng = random.Random( 11 )
+    for i in range( 20 ):
+      rng.shuffle( deck )
+      compact = compact_deck( deck )
+      self.assertEqual( len( compact ), 22 )
+      self.assertEqual( deck_from_compact( compact ), deck )
+
+  def test_hands_match_pghand( self ):
+    from paigow.pghand import PGHand
+    for ch1 in "PAbCdEfGhIjKlMnO":
+      for ch2 in "pBcDeFgHiJkLmNo":
+        hand = PGHand.create_with_tile_chars( ch1, ch2 )
+        self.assertEqual( hand_strength( index_for_char( ch1 ), index_for_char( ch2 ) ), hand.strength() )
+
+  def test_compare_matches_pgset( self ):
+    from paigow.pgset import PGSet
+    import random
+    rng = random.Random( 321 )
+    for i in range( 200 ):
+      chars = list( s_tile_chars )
+      rng.shuffle( chars )
+      set1 = PGSet.create_with_tile_chars( "".join( chars[0:4] ) )
+      set2 = PGSet.create_with_tile_chars( "".join( chars[4:8] ) )
+      expected = 0
+      if set1 > set2:
+        expected = 1
+      elif set1 < set2:
+        expected = -1
+      self.assertEqual( compare_sets( set1.packed(), set2.packed() ), expected )
+
+  def test_sets_from_deck( self ):
+    deck = deck_from_tile_chars( s_tile_chars )
+    sets = sets_from_deck( deck, 1 )
+    self.assertEqual( tile_chars_from_packed( sets[0] ), "pabc" )
+    self.assertEqual( tile_chars_from_packed( sets[2] ), "hijk" )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
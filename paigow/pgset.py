@@ -3,13 +3,11 @@
 # kept in the database because it is transient.
 
 from models.pgtile import PGTile
+from pgtileregistry import PGTileRegistry
 
 # Turn this on for logging
 s_pgset_logging = False
 
-# Different ways we can auto-set
-s_use_numerical_auto_set = False
-
 class PGSet:
   
   # make sure the application name is what we want so any command that
@@ -24,9 +22,7 @@ class PGSet:
     self.tiles = tile_list
   
   def __unicode__( self ):
-    from paigow.pghand import PGHand
-    hand1 = PGHand.create_with_tile_chars( self.tiles[0].char(), self.tiles[1].char() )
-    hand2 = PGHand.create_with_tile_chars( self.tiles[2].char(), self.tiles[3].char() )
+    hand1, hand2 = self.hands()
     return "Set: [" + str( hand1 ) + " ] ... [ " + str( hand2 ) + " ]"
   
   def __str__(self):
@@ -35,10 +31,22 @@ class PGSet:
   def tile_chars( self ):
     return "" + self.tiles[0].char() + self.tiles[1].char() + self.tiles[2].char() + self.tiles[3].char()
   
+  # the packed-int form of this set (see pgpacked.py)
+  def packed( self ):
+    from paigow.pgpacked import packed_from_tile_chars
+    return packed_from_tile_chars( self.tile_chars() )
+  
+  # compare two packed sets without creating them: 1 if the first wins,
+  # -1 if it loses, 0 for a push (same as >, < and == on sets).
+  @classmethod
+  def compare_packed( cls, packed1, packed2 ):
+    from paigow.pgpacked import compare_sets
+    return compare_sets( packed1, packed2 )
+  
   def hands( self ):
     from paigow.pghand import PGHand
-    hand1 = PGHand.create_with_tile_chars( self.tiles[0].char(), self.tiles[1].char() )
-    hand2 = PGHand.create_with_tile_chars( self.tiles[2].char(), self.tiles[3].char() )
+    hand1 = PGHand.create( self.tiles[0], self.tiles[1] )
+    hand2 = PGHand.create( self.tiles[2], self.tiles[3] )
     return hand1, hand2
   
   # return the high and low hands.
@@ -79,9 +87,7 @@ class PGSet:
   
   # return the hand label for the hands, separated by "|"
   def hand_labels( self ):
-    from paigow.pghand import PGHand
-    high_hand = PGHand.create_with_tile_chars( self.tiles[0].char(), self.tiles[1].char() )
-    low_hand = PGHand.create_with_tile_chars( self.tiles[2].char(), self.tiles[3].char() )
+    high_hand, low_hand = self.hands()
     return high_hand.label() + "|" + low_hand.label()
   
   # return win/tie/lose against a second set.  Makes sure the hands are in high/low order,
@@ -240,18 +246,24 @@ class PGSet:
   @classmethod
   def create_with_tile_chars( cls, tile_chars ):
     return PGSet.create( [ 
-                    PGTile.with_char(tile_chars[0]),
-                    PGTile.with_char(tile_chars[1]),
-                    PGTile.with_char(tile_chars[2]),
-                    PGTile.with_char(tile_chars[3]) ] )
+                    PGTileRegistry.with_char(tile_chars[0]),
+                    PGTileRegistry.with_char(tile_chars[1]),
+                    PGTileRegistry.with_char(tile_chars[2]),
+                    PGTileRegistry.with_char(tile_chars[3]) ] )
 
+  # convenience for creation from a packed set (see pgpacked.py)
+  @classmethod
+  def create_with_packed( cls, packed ):
+    from paigow.pgpacked import tile_chars_from_packed
+    return PGSet.create_with_tile_chars( tile_chars_from_packed( packed ) )
+  
   @classmethod
   def create_with_tile_names( cls, tile_names ):
     return PGSet.create( [
-                    PGTile.with_name(tile_names[0]),
-                    PGTile.with_name(tile_names[1]),
-                    PGTile.with_name(tile_names[2]),
-                    PGTile.with_name(tile_names[3]) ] )
+                    PGTileRegistry.with_name(tile_names[0]),
+                    PGTileRegistry.with_name(tile_names[1]),
+                    PGTileRegistry.with_name(tile_names[2]),
+                    PGTileRegistry.with_name(tile_names[3]) ] )
 
 
 # ----------------------------------------------------
@@ -287,6 +299,15 @@ class PGSetTest( TestCase ):
     self.assertFalse( low_hand2.beats( high_hand2 ) )
     self.assertTrue( set1 > set2 )
   
+  def test_packed( self ):
+    set1 = PGSet.create_with_tile_chars( "AbLn" )
+    set2 = PGSet.create_with_packed( set1.packed() )
+    self.assertEqual( set2.tile_chars(), "AbLn" )
+    set3 = PGSet.create_with_tile_chars( "FgOj" )
+    self.assertEqual( PGSet.compare_packed( set1.packed(), set3.packed() ), 1 )
+    self.assertEqual( PGSet.compare_packed( set3.packed(), set1.packed() ), -1 )
+    self.assertEqual( PGSet.compare_packed( set1.packed(), set1.packed() ), 0 )
+  
   def test_analysis( self ):
     set = PGSet.create_with_tile_names( ( "day", "mixed nine", "low ten", "mixed seven" ) )
     self.assertFalse( set.ordering_with_two_pair() )
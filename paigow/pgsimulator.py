@@ -0,0 +1,229 @@
+# This file plays computer-vs-computer games entirely in memory, for
+# checking how strategy changes play out over lots of games.  It deals
+# the way PGGame.deal_tiles / assure_player_in_deal do, sets each seat
+# with its strategy engine (see pgengine.py, on packed sets), scores
+# the deal the way PGPlayerInDeal.record_scores_against does and stops
+# at s_game_goal the way PGGame.check_game_over does -- but without
+# creating any database rows.
+#
+# Games are spread over a pool of processes; each chunk of games gets
+# its own random stream derived from the seed and the chunk number, so
+# a run is reproducible for a given seed and chunk size.
+
+import math
+import random
+import time
+
+from pgpacked import sets_from_deck, compare_sets, s_num_tiles
+from pgengine import engine_named, s_default_engine
+
+# points for the three sets, best first
+s_set_points = ( 3, 2, 1 )
+
+# games per chunk of work handed to a process
+s_games_per_chunk = 50
+
+# the engine names for the two seats, if none are given
+s_default_engines = ( s_default_engine, s_default_engine )
+
+# play one game, each seat using the named engine; return the number of
+# deals, each seat's final score, and per-slot counts of
+# [ seat 0 wins, pushes, seat 1 wins ].
+def play_game( rng, engines = s_default_engines ):
+  from paigow.models.pggame import s_game_goal
+  auto_set0 = engine_named( engines[0] ).auto_set_packed
+  auto_set1 = engine_named( engines[1] ).auto_set_packed
+  scores = [ 0, 0 ]
+  slot_results = [ [ 0, 0, 0 ] for points in s_set_points ]
+  deal_points = []
+  num_deals = 0
+  deck = range( s_num_tiles )
+  while True:
+    rng.shuffle( deck )
+    num_deals += 1
+    sets0 = auto_set0( sets_from_deck( deck, 0 ) )
+    sets1 = auto_set1( sets_from_deck( deck, 1 ) )
+    points0, points1 = 0, 0
+    for slot, points in enumerate( s_set_points ):
+      result = compare_sets( sets0[slot], sets1[slot] )
+      if result > 0:
+        points0 += points
+        slot_results[slot][0] += 1
+      elif result < 0:
+        points1 += points
+        slot_results[slot][2] += 1
+      else:
+        slot_results[slot][1] += 1
+    scores[0] += points0
+    scores[1] += points1
+    deal_points.append( points0 - points1 )
+    if max( scores ) >= s_game_goal and scores[0] != scores[1]:
+      return num_deals, scores, slot_results, deal_points
+
+# the running totals for a bunch of games; merged across processes.
+def empty_totals():
+  return {
+    'games': 0,
+    'deals': 0,
+    'wins': [ 0, 0 ],
+    'points': [ 0, 0 ],
+    'slot_results': [ [ 0, 0, 0 ] for points in s_set_points ],
+    'deal_diff_sum': 0,
+    'deal_diff_sum_sq': 0,
+  }
+
+def add_game_to_totals( totals, game ):
+  num_deals, scores, slot_results, deal_points = game
+  totals['games'] += 1
+  totals['deals'] += num_deals
+  totals['wins'][ 0 if scores[0] > scores[1] else 1 ] += 1
+  totals['points'][0] += scores[0]
+  totals['points'][1] += scores[1]
+  for slot in range( len( s_set_points ) ):
+    for outcome in range( 3 ):
+      totals['slot_results'][slot][outcome] += slot_results[slot][outcome]
+  for diff in deal_points:
+    totals['deal_diff_sum'] += diff
+    totals['deal_diff_sum_sq'] += diff * diff
+
+def merge_totals( totals, other ):
+  for key in ( 'games', 'deals', 'deal_diff_sum', 'deal_diff_sum_sq' ):
+    totals[key] += other[key]
+  for seat in range( 2 ):
+    totals['wins'][seat] += other['wins'][seat]
+    totals['points'][seat] += other['points'][seat]
+  for slot in range( len( s_set_points ) ):
+    for outcome in range( 3 ):
+      totals['slot_results'][slot][outcome] += other['slot_results'][slot][outcome]
+
+# the random stream for a chunk of games
+def rng_for_chunk( seed, chunk ):
+  return random.Random( seed * 1000003 + chunk )
+
+# play a chunk of games; the unit of work for the process pool.
+def play_chunk( args ):
+  seed, chunk, num_games, engines = args
+  rng = rng_for_chunk( seed, chunk )
+  totals = empty_totals()
+  for game in range( num_games ):
+    add_game_to_totals( totals, play_game( rng, engines ) )
+  return totals
+
+# load everything the engine looks up on first use, so forked processes
+# share it rather than each loading it (and touching the database).
+def warm_up():
+  from paigow.pgtileregistry import PGTileRegistry
+  from paigow.pgautosettable import PGAutoSetTable
+  from paigow.pgpacked import load_tables
+  from paigow.pgsolver import outcome_counts_table
+  PGTileRegistry.load()
+  load_tables()
+  PGAutoSetTable.table()
+  outcome_counts_table()
+
+# play num_games games across 'processes' processes (1 means play them
+# here, without a pool); return the totals and the seconds it took.
+def simulate( num_games, seed = 0, processes = None, games_per_chunk = s_games_per_chunk, engines = s_default_engines ):
+  for name in engines:
+    engine_named( name )
+  warm_up()
+  chunks = []
+  games_left = num_games
+  while games_left > 0:
+    chunk_games = min( games_per_chunk, games_left )
+    chunks.append( ( seed, len( chunks ), chunk_games, tuple( engines ) ) )
+    games_left -= chunk_games
+  start = time.time()
+  if processes == 1:
+    results = map( play_chunk, chunks )
+  else:
+    import multiprocessing
+    pool = multiprocessing.Pool( processes )
+    try:
+      results = pool.map( play_chunk, chunks )
+    finally:
+      pool.close()
+      pool.join()
+  totals = empty_totals()
+  for chunk_totals in results:
+    merge_totals( totals, chunk_totals )
+  return totals, time.time() - start
+
+# 95% confidence interval half-width for a proportion
+def proportion_interval( count, total ):
+  if total == 0:
+    return 0.0
+  p = float( count ) / total
+  return 1.96 * math.sqrt( p * ( 1.0 - p ) / total )
+
+# summarize the totals: rates, per-deal points and confidence intervals.
+def report( totals, seconds ):
+  games = totals['games']
+  deals = totals['deals']
+  mean_diff = 0.0
+  diff_interval = 0.0
+  if deals > 1:
+    mean_diff = float( totals['deal_diff_sum'] ) / deals
+    variance = ( totals['deal_diff_sum_sq'] - deals * mean_diff * mean_diff ) / ( deals - 1 )
+    diff_interval = 1.96 * math.sqrt( max( variance, 0.0 ) / deals )
+  slots = []
+  for slot, points in enumerate( s_set_points ):
+    wins0, pushes, wins1 = totals['slot_results'][slot]
+    slots.append( {
+      'points': points,
+      'seat0_win_rate': float( wins0 ) / max( deals, 1 ),
+      'seat0_win_interval': proportion_interval( wins0, deals ),
+      'push_rate': float( pushes ) / max( deals, 1 ),
+      'seat1_win_rate': float( wins1 ) / max( deals, 1 ),
+      'seat1_win_interval': proportion_interval( wins1, deals ),
+    } )
+  return {
+    'games': games,
+    'deals': deals,
+    'seconds': seconds,
+    'games_per_second': games / seconds if seconds > 0 else 0.0,
+    'deals_per_game': float( deals ) / max( games, 1 ),
+    'seat0_game_win_rate': float( totals['wins'][0] ) / max( games, 1 ),
+    'seat0_game_win_interval': proportion_interval( totals['wins'][0], games ),
+    'points_per_deal': [ float( totals['points'][seat] ) / max( deals, 1 ) for seat in range( 2 ) ],
+    'seat0_points_diff_per_deal': mean_diff,
+    'seat0_points_diff_interval': diff_interval,
+    'slots': slots,
+  }
+
+
+# ----------------------------------------------------
+# Test the simulator
+
+from django.test import TestCase
+
+class PGSimulatorTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_play_game( self ):
+    from paigow.models.pggame import s_game_goal
+    num_deals, scores, slot_results, deal_points = play_game( random.Random( 321 ) )
+    self.assertTrue( max( scores ) >= s_game_goal )
+    self.assertNotEqual( scores[0], scores[1] )
+    self.assertEqual( len( deal_points ), num_deals )
+    self.assertEqual( sum( deal_points ), scores[0] - scores[1] )
+    for slot in slot_results:
+      self.assertEqual( sum( slot ), num_deals )
+
+  def test_reproducible( self ):
+    totals1, seconds = simulate( 6, seed = 7, processes = 1, games_per_chunk = 4 )
+    totals2, seconds = simulate( 6, seed = 7, processes = 1, games_per_chunk = 4 )
+    self.assertEqual( totals1, totals2 )
+    self.assertEqual( totals1['games'], 6 )
+    summary = report( totals1, seconds )
+    self.assertEqual( len( summary['slots'] ), 3 )
+    self.assertRaises( ValueError, simulate, 1, engines = ( 'table', 'nonsense' ) )
+    self.assertAlmostEqual( sum( summary['points_per_deal'] ) * summary['deals'], sum( totals1['points'] ) )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,234 @@
+# This file builds the snapshot of a deal that game_play.html keeps
+# itself up to date with: everything the page shows that changes while
+# the deal is played, from the point of view of one player, in one
+# JSON answer -- instead of a request each for the player's state, the
+# opponent's state, the score in the deal, the game score, the
+# opponent's tiles and the labels of each of the opponent's sets.
+#
+#   format                 s_snapshot_format, bumped if this changes
+#   version                the deal's version (PGDeal.version, as in
+#                          the ETag, see pgversion.py); send it back
+#                          as 'since' to wait for the next change (see
+#                          pgnotify.py)
+#   player_state           the states, as PGPlayerInDeal.state_ui
+#   opponent_state           shows them
+#   score                  the game score after this deal, "12 - 9"
+#   game_over              whether the game is over (finishing it if
+#                          it just is, like PGGame.check_game_over)
+#   score_in_deal          "W.L" once both players are set, else null
+#   opponent_tiles         once both players are set: the opponent's
+#                          twelve tile chars, set by set; else null
+#   opponent_sets          once both players are set: the dots of each
+#                          of the opponent's tiles, like
+#                          PGPlayerInDeal.tile_dots; else null.  Left
+#                          null in the compact form, where the page
+#                          expands opponent_tiles itself (see
+#                          tile_dots_json in pgdot.py).
+#   opponent_hand_labels   once both players are set: the labels of
+#                          each of the opponent's sets, "high|low"
+#
+# It takes the same two queries however far the game has gone, unless
+# it's the one to finish the game: the two players in the deal (with
+# the game), and their scores.  What's
+# revealed once both players are set never changes after that, so it's
+# worked out once per ( game, deal, player, tile size ) and kept in an
+# LRU cache, checked against both players' sets in case they change.
+
+import collections
+import json
+import threading
+
+s_snapshot_format = 2
+
+# how many reveals we keep
+s_reveals_size = 512
+
+# ( game id, deal number, player id, tile size ) ->
+#   ( player's tile chars, opponent's tile chars, reveal ),
+# least recently used first
+s_reveals = collections.OrderedDict()
+s_reveals_lock = threading.Lock()
+
+# what the player sees of the opponent's sets once both are set: the
+# snapshot's score_in_deal, opponent_tiles, opponent_sets and
+# opponent_hand_labels, and opponent_sets as JSON (for
+# get_opponent_tile_dots).  Shared: treat it as read-only.  Both
+# players have to be set.
+def cached_reveal( pgpid, pgpido, pgtile_size ):
+  from paigow.models import PGPlayerInDeal
+  if pgpid.state() != PGPlayerInDeal.READY or pgpido.state() != PGPlayerInDeal.READY:
+    raise ValueError
+  key = ( pgpid.game_id, pgpid.deal_number, pgpid.player_id, pgtile_size )
+  tile_chars = ( pgpid.tile_chars(), pgpido.tile_chars() )
+  with s_reveals_lock:
+    entry = s_reveals.get( key )
+    if entry is not None and entry[0:2] == tile_chars:
+      del s_reveals[key]
+      s_reveals[key] = entry
+      return entry[2]
+  opponent_sets = pgpido.tile_dot_dicts( pgtile_size )
+  reveal = {
+    'score_in_deal': pgpid.win_lose_string_against( pgpido ),
+    'opponent_tiles': tile_chars[1],
+    'opponent_sets': opponent_sets,
+    'opponent_sets_json': json.dumps( opponent_sets ),
+    'opponent_hand_labels': [ pgset.hand_labels() for pgset in pgpido.sets() ],
+  }
+  with s_reveals_lock:
+    s_reveals.pop( key, None )
+    s_reveals[key] = tile_chars + ( reveal, )
+    while len( s_reveals ) > s_reveals_size:
+      s_reveals.popitem( last = False )
+  return reveal
+
+def clear_reveals():
+  with s_reveals_lock:
+    s_reveals.clear()
+
+# whether the game is over; for the current deal, the scores after it
+# are the game's scores, so they needn't be looked up again.
+def game_over( game, deal_number, scores ):
+  if deal_number == game.current_deal_number:
+    return game.check_game_over_for_scores( scores )
+  return game.check_game_over()
+
+# the snapshot for this player; None if they're not in the deal.
+def deal_snapshot( game_id, deal_number, player_id, pgtile_size, version = 0, compact = False ):
+  from paigow.models import PGGame, PGPlayerInDeal, PGDealScore
+
+  pgpid = None
+  pgpido = None
+  for seat in PGPlayerInDeal.objects.filter( game = game_id, deal_number = deal_number ).select_related( 'game' ):
+    if seat.player_id == player_id:
+      pgpid = seat
+    else:
+      pgpido = seat
+  if pgpid is None:
+    return None
+  game = pgpid.game
+
+  # the scores after this deal: the last snapshot for each player up to it
+  scores = {}
+  for score_player_id, score in PGDealScore.objects.filter( game = game_id, deal_number__lte = deal_number ).order_by( 'deal_number' ).values_list( 'player', 'score' ):
+    scores[score_player_id] = score
+
+  snapshot = {
+    'format': s_snapshot_format,
+    'version': version,
+    'player_state': PGPlayerInDeal.state_ui( pgpid.state() ),
+    'opponent_state': PGPlayerInDeal.state_ui( pgpido.state() ) if pgpido else "error",
+    'score': str( scores.get( player_id, 0 ) ) + " - " + str( scores.get( pgpido.player_id, 0 ) if pgpido else 0 ),
+    'game_over': game_over( game, deal_number, scores ),
+    'score_in_deal': None,
+    'opponent_tiles': None,
+    'opponent_sets': None,
+    'opponent_hand_labels': None,
+  }
+
+  # the opponent's tiles are only shown once both players are set
+  if pgpido and pgpid.state() == PGPlayerInDeal.READY and pgpido.state() == PGPlayerInDeal.READY:
+    reveal = cached_reveal( pgpid, pgpido, pgtile_size )
+    snapshot['score_in_deal'] = reveal['score_in_deal']
+    snapshot['opponent_tiles'] = reveal['opponent_tiles']
+    if not compact:
+      snapshot['opponent_sets'] = reveal['opponent_sets']
+    snapshot['opponent_hand_labels'] = reveal['opponent_hand_labels']
+  return snapshot
+
+
+# ----------------------------------------------------
+# Test the deal snapshot
+
+from django.test import TestCase
+
+class PGSnapshotTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    from paigow.pgtestutils import two_player_game
+    clear_reveals()
+    self.game, self.player, self.opponent = two_player_game( "snapshot" )
+
+  def set_tiles( self, player ):
+    pgpid = self.game.player_in_deal( player, 1 )
+    pgpid.player_is_ready( pgpid.set1, pgpid.set2, pgpid.set3 )
+    return pgpid
+
+  def test_snapshot( self ):
+    snapshot = deal_snapshot( self.game.id, 1, self.player.id, "medium" )
+    self.assertEqual( snapshot['player_state'], "hasn't seen tiles" )
+    self.assertIsNone( snapshot['opponent_sets'] )
+    self.assertEqual( snapshot['score'], "0 - 0" )
+    self.assertIsNone( deal_snapshot( self.game.id, 1, -1, "medium" ) )
+    pgpid = self.set_tiles( self.player )
+    pgpido = self.set_tiles( self.opponent )
+    with self.assertNumQueries( 2 ):
+      snapshot = deal_snapshot( self.game.id, 1, self.player.id, "medium" )
+    self.assertEqual( snapshot['opponent_state'], "tiles are set" )
+    self.assertEqual( snapshot['score_in_deal'], pgpid.win_lose_string_against( pgpido ) )
+    self.assertEqual( snapshot['opponent_sets'], pgpido.tile_dot_dicts( "medium" ) )
+    self.assertEqual( snapshot['opponent_hand_labels'][2], pgpido.set( 3 ).hand_labels() )
+    self.assertEqual( snapshot['score'], str( self.game.score_for_player( self.player ) ) + " - " + str( self.game.score_for_player( self.opponent ) ) )
+
+  def test_game_over( self ):
+    from paigow.models import PGGame
+    from paigow.models.pggame import s_game_goal
+    self.assertFalse( deal_snapshot( self.game.id, 1, self.player.id, "medium" )['game_over'] )
+    self.game.player_in_deal( self.player, 1 ).add_to_score( s_game_goal )
+    snapshot = deal_snapshot( self.game.id, 1, self.player.id, "medium" )
+    self.assertTrue( snapshot['game_over'] )
+    self.assertEqual( PGGame.objects.get( id = self.game.id ).game_state, PGGame.GAME_OVER )
+
+  def test_compact_reveal( self ):
+    pgpid = self.set_tiles( self.player )
+    pgpido = self.set_tiles( self.opponent )
+    snapshot = deal_snapshot( self.game.id, 1, self.player.id, "small", compact = True )
+    self.assertEqual( snapshot['opponent_tiles'], pgpido.set1 + pgpido.set2 + pgpido.set3 )
+    self.assertIsNone( snapshot['opponent_sets'] )
+    self.assertEqual( snapshot['opponent_hand_labels'], [ pgpido.set( n ).hand_labels() for n in ( 1, 2, 3 ) ] )
+
+    # the reveal is worked out once, and again only if the sets change
+    reveal = cached_reveal( pgpid, pgpido, "small" )
+    self.assertIs( cached_reveal( pgpid, pgpido, "small" ), reveal )
+    self.assertEqual( reveal['opponent_sets'][0][0], pgpido.tile_dot_dicts( "small" )[0][0] )
+    pgpido.set1, pgpido.set2 = pgpido.set2, pgpido.set1
+    self.assertEqual( cached_reveal( pgpid, pgpido, "small" )['opponent_tiles'][0:4], pgpido.set1 )
+
+  def test_snapshot_view( self ):
+    import json
+    from paigow.pgtestutils import log_in
+    log_in( self.client, self.player )
+    response = self.client.get( '/paigow/data/game/' + str( self.game.id ) + '/1/snapshot/medium' )
+    self.assertEqual( response.status_code, 200 )
+    snapshot = json.loads( response.content )
+    self.assertEqual( snapshot['format'], s_snapshot_format )
+    self.assertEqual( snapshot['opponent_state'], "hasn't seen tiles" )
+    self.set_tiles( self.player )
+    pgpido = self.set_tiles( self.opponent )
+    snapshot = json.loads( self.client.get( '/paigow/data/game/' + str( self.game.id ) + '/1/snapshot/medium', { 'compact': 1 } ).content )
+    self.assertEqual( snapshot['opponent_tiles'], pgpido.tile_chars() )
+    self.assertIsNone( snapshot['opponent_sets'] )
+    response = self.client.get( '/paigow/data/game/' + str( self.game.id ) + '/1/opponent_tiles/large' )
+    self.assertEqual( json.loads( response.content ), pgpido.tile_dot_dicts( "large" ) )
+    response = self.client.get( '/paigow/data/game/' + str( self.game.id ) + '/1/opponent_tiles/large', { 'compact': 1 } )
+    self.assertEqual( response.content, pgpido.tile_chars() )
+    response = self.client.get( '/paigow/data/game/' + str( self.game.id + 1 ) + '/1/snapshot/medium' )
+    self.assertEqual( response.status_code, 405 )
+
+  def test_no_reveal_before_both_are_set( self ):
+    from paigow.pgtestutils import log_in
+    pgpid = self.set_tiles( self.player )
+    pgpido = self.game.player_in_deal( self.opponent, 1 )
+    pgpido.tiles_were_requested()
+    self.assertRaises( ValueError, cached_reveal, pgpid, pgpido, "medium" )
+    log_in( self.client, self.player )
+    response = self.client.get( '/paigow/data/game/' + str( self.game.id ) + '/1/opponent_tiles/medium' )
+    self.assertEqual( response.status_code, 405 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
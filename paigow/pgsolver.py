@@ -0,0 +1,230 @@
+# This file works out exactly how well each way of setting a set does
+# against a random opponent.  For each of the three ways to split our
+# four tiles into two hands, we go through every set of four the
+# opponent could have from the other 28 tiles, and every way they could
+# split it, and count how often we win, push and lose by the PGSet
+# rules (both our hands have to beat theirs to win).
+#
+# That's 20475 opponent sets x 3 splits per question, done as NumPy
+# array operations over a table of all 35960 four-tile subsets of the
+# deck that's built once.  The answer only depends on the tile ranks,
+# so results are cached by split (see split_key), and
+# 'manage.py build_set_outcome_table' computes every one of them,
+# spread across processes, and saves them in paigow/tables.
+
+import json
+import os
+
+import numpy
+
+from pgpacked import s_tile_chars, s_num_tiles, unpack_set
+
+s_set_outcome_table_path = os.path.join( os.path.dirname( __file__ ), 'tables', 'set_outcomes.json' )
+
+# the three ways to split four tiles into two hands, by position; the
+# same as orderings 1, 2 and 3 in PGSet.ordering_with.
+s_splits = ( ( 0, 1, 2, 3 ), ( 0, 2, 1, 3 ), ( 0, 3, 1, 2 ) )
+
+# outcomes, as columns in the count arrays
+WIN = 0
+PUSH = 1
+LOSS = 2
+
+# every four-tile subset of the deck: the 32-bit masks, and the high
+# and low hand strengths of each of its splits, shape (35960, 3).  Built
+# on first use.
+s_subset_masks = None
+s_subset_highs = None
+s_subset_lows = None
+
+# the outcome counts we know about, by split key; filled from the table
+# file on first use, and by solving anything that isn't there.
+s_outcome_counts = None
+
+def load_subsets():
+  global s_subset_masks, s_subset_highs, s_subset_lows
+  if s_subset_masks is not None:
+    return
+  from paigow.pgbatch import high_and_low_strengths
+  subsets = []
+  for i0 in range( s_num_tiles ):
+    for i1 in range( i0 + 1, s_num_tiles ):
+      for i2 in range( i1 + 1, s_num_tiles ):
+        for i3 in range( i2 + 1, s_num_tiles ):
+          subsets.append( ( i0, i1, i2, i3 ) )
+  subsets = numpy.array( subsets )
+  masks = numpy.zeros( len( subsets ), dtype = numpy.int64 )
+  for column in range( 4 ):
+    masks |= numpy.left_shift( 1, subsets[:, column].astype( numpy.int64 ) )
+  highs = numpy.zeros( ( len( subsets ), 3 ), dtype = numpy.int16 )
+  lows = numpy.zeros( ( len( subsets ), 3 ), dtype = numpy.int16 )
+  for split_num, split in enumerate( s_splits ):
+    highs[:, split_num], lows[:, split_num] = high_and_low_strengths( subsets[:, split] )
+  s_subset_masks, s_subset_highs, s_subset_lows = masks, highs, lows
+
+# the key for a split: each hand's tile chars lower-cased and sorted,
+# the two hands sorted, e.g. "ah|ep".  Two splits with the same key do
+# exactly as well as each other.
+def split_key( indices ):
+  hand1 = "".join( sorted( [ s_tile_chars[indices[0]].lower(), s_tile_chars[indices[1]].lower() ] ) )
+  hand2 = "".join( sorted( [ s_tile_chars[indices[2]].lower(), s_tile_chars[indices[3]].lower() ] ) )
+  return "|".join( sorted( [ hand1, hand2 ] ) )
+
+# the split keys for the three splits of a set of four tile indices
+def split_keys( indices ):
+  return [ split_key( [ indices[position] for position in split ] ) for split in s_splits ]
+
+# count, for each of the three splits of the set (four tile indices),
+# how many of the opponent's possible (set, split)s it wins, pushes and
+# loses against.  Returns a (3, 3) array: [split][WIN, PUSH, LOSS].
+def solve( indices ):
+  from paigow.pgbatch import high_and_low_strengths
+  load_subsets()
+  mask = 0
+  for index in indices:
+    mask |= 1 << int( index )
+  available = ( s_subset_masks & mask ) == 0
+  opponent_highs = s_subset_highs[available].ravel()
+  opponent_lows = s_subset_lows[available].ravel()
+  splits = numpy.array( [ [ indices[position] for position in split ] for split in s_splits ] )
+  highs, lows = high_and_low_strengths( splits )
+  counts = numpy.zeros( ( 3, 3 ), dtype = numpy.int64 )
+  for split_num in range( 3 ):
+    wins = numpy.count_nonzero( ( highs[split_num] > opponent_highs ) & ( lows[split_num] > opponent_lows ) )
+    losses = numpy.count_nonzero( ( highs[split_num] < opponent_highs ) & ( lows[split_num] < opponent_lows ) )
+    counts[split_num] = ( wins, len( opponent_highs ) - wins - losses, losses )
+  return counts
+
+def load_table( path = s_set_outcome_table_path ):
+  if not os.path.exists( path ):
+    return {}
+  with open( path ) as table_file:
+    return json.load( table_file )
+
+# saved one split per line, so rebuilds diff sensibly
+def save_table( table, path = s_set_outcome_table_path ):
+  lines = [ json.dumps( key ) + ":" + json.dumps( table[key], separators = ( ',', ':' ) ) for key in sorted( table ) ]
+  with open( path, 'w' ) as table_file:
+    table_file.write( "{\n" + ",\n".join( lines ) + "\n}\n" )
+
+def outcome_counts_table():
+  global s_outcome_counts
+  if s_outcome_counts is None:
+    s_outcome_counts = load_table()
+  return s_outcome_counts
+
+# the outcome counts for the three splits of a set (four tile indices or
+# a packed set), from the cache if we have them.
+def outcome_counts( set ):
+  if isinstance( set, ( int, long ) ):
+    set = unpack_set( set )
+  table = outcome_counts_table()
+  keys = split_keys( set )
+  if not all( [ key in table for key in keys ] ):
+    counts = solve( set )
+    for key, split_counts in zip( keys, counts ):
+      table[key] = [ int( count ) for count in split_counts ]
+  return numpy.array( [ table[key] for key in keys ] )
+
+# the same, as win/push/loss probabilities
+def outcome_probabilities( set ):
+  counts = outcome_counts( set ).astype( numpy.float64 )
+  return counts / counts.sum( axis = 1 )[:, numpy.newaxis]
+
+# the probabilities for one particular split: tiles 0/1 and 2/3 as the
+# hands, as in PGSet.
+def split_probabilities( set ):
+  return outcome_probabilities( set )[0]
+
+# the expected value of each split, per point at stake: the chance of
+# winning less the chance of losing.
+def expected_values( set ):
+  probabilities = outcome_probabilities( set )
+  return probabilities[:, WIN] - probabilities[:, LOSS]
+
+# the split (0, 1 or 2, in s_splits) with the best expected value
+def best_split( set ):
+  return int( numpy.argmax( expected_values( set ) ) )
+
+# solve one distinct set (by auto-set table key); the unit of work for
+# the process pool when building the table.
+def solve_key( key ):
+  from paigow.pgautosettable import PGAutoSetTable
+  from paigow.pgpacked import index_for_char
+  indices = [ index_for_char( tile.tile_char ) for tile in PGAutoSetTable.tiles_for_key( key ) ]
+  counts = solve( indices )
+  return [ ( split_key, [ int( count ) for count in split_counts ] )
+           for split_key, split_counts in zip( split_keys( indices ), counts ) ]
+
+# solve every distinct set; returns the table of counts by split key.
+def build_table( processes = None ):
+  from paigow.pgautosettable import PGAutoSetTable
+  from paigow.pgtileregistry import PGTileRegistry
+  from paigow.pgbatch import load_tables
+  PGTileRegistry.load()
+  load_tables()
+  load_subsets()
+  keys = PGAutoSetTable.all_keys()
+  if processes == 1:
+    results = map( solve_key, keys )
+  else:
+    import multiprocessing
+    pool = multiprocessing.Pool( processes )
+    try:
+      results = pool.map( solve_key, keys, chunksize = 20 )
+    finally:
+      pool.close()
+      pool.join()
+  table = {}
+  for key_results in results:
+    for split_key, counts in key_results:
+      table[split_key] = counts
+  return table
+
+
+# ----------------------------------------------------
+# Test the solver
+
+from django.test import TestCase
+
+class PGSolverTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_solve_matches_compare_sets( self ):
+    # count the first split's outcomes one comparison at a time
+    from itertools import combinations
+    from paigow.pgpacked import indices_from_tile_chars, pack_set, compare_sets
+    indices = indices_from_tile_chars( "AHbL" )
+    counts = solve( indices )
+    self.assertEqual( counts.sum( axis = 1 ).tolist(), [ 20475 * 3 ] * 3 )
+    ours = pack_set( indices )
+    others = [ index for index in range( s_num_tiles ) if index not in indices ]
+    expected = [ 0, 0, 0 ]
+    for opponent in combinations( others, 4 ):
+      for split in s_splits:
+        result = compare_sets( ours, pack_set( [ opponent[position] for position in split ] ) )
+        expected[ { 1: WIN, 0: PUSH, -1: LOSS }[result] ] += 1
+    self.assertEqual( counts[0].tolist(), expected )
+
+  def test_split_keys( self ):
+    from paigow.pgpacked import indices_from_tile_chars
+    self.assertEqual( split_keys( indices_from_tile_chars( "AHbL" ) ), [ "ah|bl", "ab|hl", "al|bh" ] )
+    self.assertEqual( split_keys( indices_from_tile_chars( "aHBl" ) ), [ "ah|bl", "ab|hl", "al|bh" ] )
+
+  def test_outcomes_are_cached_by_split( self ):
+    from paigow.pgpacked import indices_from_tile_chars, packed_from_tile_chars
+    counts1 = outcome_counts( indices_from_tile_chars( "AHbL" ) )
+    counts2 = outcome_counts( packed_from_tile_chars( "HbAL" ) )
+    self.assertEqual( counts2.tolist(), counts1[ [ 2, 0, 1 ] ].tolist() )
+    self.assertEqual( counts1.tolist(), solve( indices_from_tile_chars( "AHbL" ) ).tolist() )
+    probabilities = outcome_probabilities( indices_from_tile_chars( "AHbL" ) )
+    self.assertAlmostEqual( probabilities[1].sum(), 1.0 )
+    self.assertEqual( best_split( indices_from_tile_chars( "AHbL" ) ), 2 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -1,15 +1,9 @@
 # This class implements the strategy for setting tiles and ordering sets.
 # It has a bunch of class methods for figuring this out.
 
-# logging.  This must be within a class; when it's a free-standing variable.
-# for some reasons setting it to True within the testing class doesn't cause
-# it to be true for the calls outside that class.
-class PGStrategyLogging:
-  logging = False
-
-
-# Different ways we can auto-set
-s_use_numerical_auto_set = False
+# the decisions below are traced with PGTrace (see pgtrace.py); each
+# call is guarded by PGTrace.enabled so it costs nothing when it's off.
+from paigow.pgtrace import PGTrace
 
 from paigow.pgset import PGSet
 
@@ -63,23 +57,23 @@ def last_two_tiles_are_in( set, values ):
 
 # take care of special hands
 def ordering_for_special_hands( set ):
-  if PGStrategyLogging.logging:
-    print "\norder for set " + str(set)
+  if PGTrace.enabled:
+    PGTrace.event( 'special_hands', set.tile_chars() )
 
   # we'll be moving tiles around; create a temp set.
   loc_set = PGSet.create( set.tiles )
   
   # always use two pairs
   ordering = loc_set.ordering_with_two_pair()
-  if PGStrategyLogging.logging:
-    print "   order for two pairs " + str(ordering)
+  if PGTrace.enabled:
+    PGTrace.event( 'two_pair_ordering', ordering )
   if ordering:
     return ordering
   
   # if we have a pair, there are exceptions
   ordering = loc_set.ordering_with_pair()
-  if PGStrategyLogging.logging:
-    print "   order for one pairs " + str(ordering)
+  if PGTrace.enabled:
+    PGTrace.event( 'pair_ordering', ordering )
   if ordering:
     switch_it = False
 
@@ -133,6 +127,8 @@ def ordering_for_special_hands( set ):
         ordering = 2
       else:
         ordering = 1
+    if PGTrace.enabled:
+      PGTrace.event( 'pair_split', pair_tile.tile_char, switch_it, ordering )
   
   return ordering
   
@@ -140,37 +136,15 @@ def ordering_for_special_hands( set ):
 # and the other doesn't (or has a later-occuring one).  This assumes that
 # we have already tested and there isn't an only-way.
 def which_has_special_hands( set1, set2 ):
-  if PGStrategyLogging.logging:
-    print "testing for pairs..."
-  ordering = which_set_has_it( set1, set2, PGSet.has_pair )
-  if ordering:
-    if PGStrategyLogging.logging:
-      print "one pair has it: set" + str(ordering)
-    return ordering
-  
-  if PGStrategyLogging.logging:
-    print "testing for wong..."
-  ordering = which_set_has_it( set1, set2, PGSet.has_wong )
-  if ordering:
-    if PGStrategyLogging.logging:
-      print "one pair has it: set" + str(ordering)
-    return ordering
-
-  if PGStrategyLogging.logging:
-    print "testing for gong..."
-  ordering = which_set_has_it( set1, set2, PGSet.has_gong )
-  if ordering:
-    if PGStrategyLogging.logging:
-      print "one pair has it: set" + str(ordering)
-    return ordering
-
-  if PGStrategyLogging.logging:
-    print "testing for high nine..."
-  ordering = which_set_has_it( set1, set2, PGSet.has_high_nine )
-  if ordering:
-    if PGStrategyLogging.logging:
-      print "one pair has it: set" + str(ordering)
-    return ordering
+  for name, tst in ( ( 'pair', PGSet.has_pair ),
+                     ( 'wong', PGSet.has_wong ),
+                     ( 'gong', PGSet.has_gong ),
+                     ( 'high_nine', PGSet.has_high_nine ) ):
+    ordering = which_set_has_it( set1, set2, tst )
+    if ordering:
+      if PGTrace.enabled:
+        PGTrace.event( 'special_hand', name, ordering )
+      return ordering
   
   return None
   
@@ -180,33 +154,25 @@ def first_set_is_better( set1, set2 ):
   from paigow.pghand import PGHand
   
   # check for only way between these two sets
-  if PGStrategyLogging.logging:
-    print "\nTesting set " + str(set1) + " against "
-    print "        set " + str(set2)
-    
   if set1 > set2:
-    if PGStrategyLogging.logging:
-      print " ... set1 is only way"
+    if PGTrace.enabled:
+      PGTrace.event( 'only_way', set1.tile_chars(), set2.tile_chars(), 1 )
     return True
   elif set2 > set1:
-    if PGStrategyLogging.logging:
-      print " ... set2 is only way"
+    if PGTrace.enabled:
+      PGTrace.event( 'only_way', set1.tile_chars(), set2.tile_chars(), 2 )
     return False
   
-  if PGStrategyLogging.logging:
-    print " ... no only way, using heuristics"
-  
   ordering = which_has_special_hands( set1, set2 )
   if ordering:
-    if PGStrategyLogging.logging:
-      print "one pair has it: set" + str(ordering)
+    if PGTrace.enabled:
+      PGTrace.event( 'better_by_special_hand', set1.tile_chars(), set2.tile_chars(), ordering )
     return ordering == 1
 
-  sum1, diff1 = set1.sum_and_diff()
-  sum2, diff2 = set2.sum_and_diff()
-  if PGStrategyLogging.logging:
-    print " ...sum and diff1: " + str(sum1) + "  " + str(diff1)
-    print " ...sum and diff2: " + str(sum2) + "  " + str(diff2)  
+  if PGTrace.enabled:
+    sum1, diff1 = set1.sum_and_diff()
+    sum2, diff2 = set2.sum_and_diff()
+    PGTrace.event( 'better_by_sum', set1.tile_chars(), set2.tile_chars(), sum1, diff1, sum2, diff2 )
   
   # no only way: check for diffs
   #return set1.is_more_even_than( set2 )
@@ -223,16 +189,13 @@ def auto_set_heuristic( set ):
 def auto_set_numerical( set ):
   from paigow.pghand import PGHand
   
-  if PGStrategyLogging.logging:
-    print "\nauto_set_numerical BEGIN"
-  
   picked_ordering = None
   
   # create sets with the three possible combinations.  We'll be re-arranging
   # one of these to create sets so make them editable lists.
   tiles = set.tiles
-  if PGStrategyLogging.logging:
-    print " ... tiles: [ " + tiles[0].name + ", " + tiles[1].name + ", " + tiles[2].name + ", " + tiles[3].name + " ]"
+  if PGTrace.enabled:
+    PGTrace.event( 'numerical', set.tile_chars() )
   tiles1 = [ tiles[0], tiles[1], tiles[2], tiles[3] ]
   tiles2 = [ tiles[0], tiles[2], tiles[1], tiles[3] ]
   tiles3 = [ tiles[0], tiles[3], tiles[1], tiles[2] ]
@@ -247,12 +210,53 @@ def auto_set_numerical( set ):
   
   return ordering
 
+# set the tiles using the precomputed table of what the strategy picks
+# for every distinct set (see pgautosettable.py); if the set isn't in
+# the table for some reason, run the strategy.
+def auto_set_from_table( set, numerical = False ):
+  from paigow.pgautosettable import PGAutoSetTable, HEURISTIC, NUMERICAL
+  if numerical:
+    strategy_name = NUMERICAL
+  else:
+    strategy_name = HEURISTIC
+  arrangement = PGAutoSetTable.arrangement_for_set( set, strategy_name )
+  if arrangement:
+    if PGTrace.enabled:
+      PGTrace.event( 'table', strategy_name, set.tile_chars(), arrangement )
+    ordering = PGAutoSetTable.apply_arrangement( set, arrangement )
+    if ordering:
+      return ordering
+  if PGTrace.enabled:
+    PGTrace.event( 'not_in_table', strategy_name, set.tile_chars() )
+  if numerical:
+    return auto_set_numerical( set )
+  else:
+    return auto_set_heuristic( set )
+
+# auto_set_from_table for a packed set (see pgpacked.py): return the
+# packed set with the tiles re-arranged.  Only goes through PGSet if
+# the set isn't in the table.
+def auto_set_packed( packed, numerical = False ):
+  from paigow.pgautosettable import PGAutoSetTable, HEURISTIC, NUMERICAL
+  from paigow.pgpacked import table_key, arrange_set
+  if numerical:
+    strategy_name = NUMERICAL
+  else:
+    strategy_name = HEURISTIC
+  arrangements = PGAutoSetTable.table().get( strategy_name, {} )
+  arrangement = arrangements.get( table_key( packed ) )
+  if arrangement:
+    if PGTrace.enabled:
+      from paigow.pgpacked import tile_chars_from_packed
+      PGTrace.event( 'table', strategy_name, tile_chars_from_packed( packed ), arrangement )
+    return arrange_set( packed, arrangement )
+  set = PGSet.create_with_packed( packed )
+  auto_set_from_table( set, numerical )
+  return set.packed()
+
 def picked_ordering_for_sets( sets ):
-  if PGStrategyLogging.logging:
-    print "\npicked_ordering_for_sets BEGIN..."
-    print "set 1: " + str(sets[1])
-    print "set 2: " + str(sets[2])
-    print "set 3: " + str(sets[3])
+  if PGTrace.enabled:
+    PGTrace.event( 'pick_ordering', sets[1].tile_chars(), sets[2].tile_chars(), sets[3].tile_chars() )
   
   picked_ordering = None
   
@@ -287,10 +291,8 @@ def picked_ordering_for_sets( sets ):
     ignore2 = s1beats2 or s3beats2
     ignore3 = s2beats3 or s1beats3
     
-    if PGStrategyLogging.logging:
-      print "    ignore1: " + str(ignore1)
-      print "    ignore2: " + str(ignore2)
-      print "    ignore3: " + str(ignore3)
+    if PGTrace.enabled:
+      PGTrace.event( 'ignore', ignore1, ignore2, ignore3 )
     
     if ignore1:
       if first_set_is_better( sets[2], sets[3] ):
@@ -322,8 +324,8 @@ def picked_ordering_for_sets( sets ):
       elif diff3 < diff1 and diff3 < diff2:
         picked_ordering = 3
       else:
-        if PGStrategyLogging.logging:
-          print " no diff winner, will ordering one or two."
+        if PGTrace.enabled:
+          PGTrace.event( 'diff_tie', diff1, diff2, diff3 )
         
         # double-bleah: there was evidently a diff tie.
         # We can't then go to the largest sum because two with a diff
@@ -336,8 +338,8 @@ def picked_ordering_for_sets( sets ):
         else:
           picked_ordering = 2
   
-  if PGStrategyLogging.logging:
-    print "picked_ordering_for_sets END returns " + str(picked_ordering) + "\n"
+  if PGTrace.enabled:
+    PGTrace.event( 'picked_ordering', picked_ordering )
   return picked_ordering
 
 class PGStrategy:
@@ -348,12 +350,19 @@ class PGStrategy:
   @classmethod
   def auto_set( cls, sets ):
     for set in sets:
-      if s_use_numerical_auto_set:
-        auto_set_numerical( set )
-      else:
-        auto_set_heuristic( set )
-    
-    # order the sets
+      auto_set_from_table( set )
+    return cls.order_sets( sets )
+  
+  # order the (already set) sets, best first, by expected points (see
+  # pgordering.py)
+  @classmethod
+  def order_sets( cls, sets ):
+    from paigow.pgordering import order_sets
+    return order_sets( sets )
+  
+  # order the sets with picked_ordering_for_sets and first_set_is_better
+  @classmethod
+  def order_sets_by_rules( cls, sets ):
     ordering_sets = [ None ]
     ordering_sets.extend( sets )
     ordering = picked_ordering_for_sets( ordering_sets )
@@ -376,6 +385,13 @@ class PGStrategy:
       else:
         sets = [ sets[2], sets[1], sets[0] ]
     return sets
+  
+  # auto_set for packed sets (see pgpacked.py): set each one, then order
+  # them.
+  @classmethod
+  def auto_set_packed( cls, packed_sets ):
+    from paigow.pgordering import order_packed
+    return order_packed( [ auto_set_packed( packed ) for packed in packed_sets ] )
 
 # ----------------------------------------------------
 # Test PGStrategy class
@@ -388,7 +404,6 @@ class PGStrategyTest( TestCase ):
   fixtures = [ 'pgtile.json' ]
   
   def test_auto_set( self ):
-    #PGStrategyLogging.logging = True
     set = PGSet.create_with_tile_names( ( "day", "low ten", "mixed five", "eleven" ) )
     self.assertEqual( auto_set_numerical( set ), 2 )
     set = PGSet.create_with_tile_names( ( "low four", "low ten", "eleven", "low six" ) )
@@ -402,6 +417,28 @@ class PGStrategyTest( TestCase ):
     set = PGSet.create_with_tile_names( ( "low ten", "mixed nine", "day", "high ten" ) )
     self.assertEqual( auto_set_numerical( set ), 3 )
   
+  def test_auto_set_from_table( self ):
+    from paigow.pgautosettable import PGAutoSetTable
+    # split the pair of teens into wong and gong
+    set = PGSet.create_with_tile_names( ( "mixed nine", "high eight", "teen", "teen" ) )
+    self.assertEqual( auto_set_from_table( set, False ), 2 )
+    self.assertEqual( set.hand_labels(), "wong|gong" )
+    # same tiles, different order, same hands
+    set = PGSet.create_with_tile_names( ( "teen", "mixed nine", "teen", "high eight" ) )
+    auto_set_from_table( set, False )
+    self.assertEqual( set.hand_labels(), "wong|gong" )
+    set = PGSet.create_with_tile_names( ( "day", "low ten", "mixed five", "eleven" ) )
+    self.assertEqual( auto_set_from_table( set, True ), 2 )
+  
+  def test_auto_set_packed( self ):
+    from paigow.pgpacked import packed_from_tile_chars, tile_chars_from_packed
+    packed = auto_set_packed( packed_from_tile_chars( "LCAa" ), False )
+    self.assertEqual( PGSet.create_with_packed( packed ).hand_labels(), "wong|gong" )
+    chars = ( "LCAa", "bdPp", "HhEe" )
+    sets = PGStrategy.auto_set( [ PGSet.create_with_tile_chars( c ) for c in chars ] )
+    packed_sets = PGStrategy.auto_set_packed( [ packed_from_tile_chars( c ) for c in chars ] )
+    self.assertEqual( [ tile_chars_from_packed( p ) for p in packed_sets ], [ set.tile_chars() for set in sets ] )
+  
   def test_x321_set_ordering( self ):
     set1 = PGSet.create_with_tile_names( ( "low ten", "mixed nine", "harmony four", "low four" ) )
     set2 = PGSet.create_with_tile_names( ( "low six", "low six", "low ten", "high seven" ) )
@@ -0,0 +1,132 @@
+# This file gathers everything the home page shows about a player's
+# games -- each opponent with the record against them, and each game
+# with its score -- in a fixed number of queries, however many games
+# the player has played.  The show_opponent_summary and
+# show_game_summary template tags just render what's here.
+#
+# The summary is a list, one entry per opponent in the order they were
+# first played, of dicts:
+#
+#   { 'opponent': PGPlayer, 'record_against_opponent': "3 - 1",
+#     'games': [ game summary, ... ] }
+#
+# and each game summary is:
+#
+#   { 'game': PGGame, 'opponent': PGPlayer, 'score': "12 - 21",
+#     'score_class': "score-lose" }
+
+# the css class for a game's score, from the player's point of view
+def score_class( game, player_score, opponent_score ):
+  from paigow.models import PGGame
+  if game.game_state != PGGame.GAME_OVER:
+    return "score-in-progress"
+  elif player_score > opponent_score:
+    return "score-win"
+  return "score-lose"
+
+def opponent_summaries( player ):
+  from paigow.models import PGPlayerInDeal, PGGameScore, PGHeadToHead
+
+  # the player's games, by start date (one query)
+  seats = PGPlayerInDeal.objects.filter( player = player, deal_number = 1 ).select_related( 'game' ).order_by( 'game__start_date' )
+  games = [ seat.game for seat in seats ]
+  game_ids = PGPlayerInDeal.objects.filter( player = player, deal_number = 1 ).values( 'game' )
+
+  # the opponent in each of them (one query)
+  opponents = {}
+  for seat in PGPlayerInDeal.objects.filter( game__in = game_ids, deal_number = 1 ).exclude( player = player ).select_related( 'player' ):
+    opponents[seat.game_id] = seat.player
+
+  # everybody's scores in them (one query)
+  scores = dict( ( ( game_id, player_id ), score ) for game_id, player_id, score in
+                 PGGameScore.objects.filter( game__in = game_ids ).values_list( 'game', 'player', 'score' ) )
+
+  # the opponents and the records against them (one query)
+  summaries = []
+  summaries_by_opponent = {}
+  for record in PGHeadToHead.objects.filter( player = player ).select_related( 'opponent' ).order_by( 'id' ):
+    summary = {
+      'opponent': record.opponent,
+      'record_against_opponent': str( record.wins ) + " - " + str( record.losses ),
+      'games': [],
+    }
+    summaries.append( summary )
+    summaries_by_opponent[record.opponent_id] = summary
+
+  for game in games:
+    opponent = opponents.get( game.id )
+    if opponent is None or opponent.id not in summaries_by_opponent:
+      continue
+    player_score = scores.get( ( game.id, player.id ), 0 )
+    opponent_score = scores.get( ( game.id, opponent.id ), 0 )
+    summaries_by_opponent[opponent.id]['games'].append( {
+      'game': game,
+      'opponent': opponent,
+      'score': str( player_score ) + " - " + str( opponent_score ),
+      'score_class': score_class( game, player_score, opponent_score ),
+    } )
+  return summaries
+
+
+# ----------------------------------------------------
+# Test the home page summaries
+
+from django.test import TestCase
+
+class PGSummaryTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    from paigow.models import PGPlayer
+    self.player = PGPlayer.create( "summary", "a@b.com", "xxx" )
+    self.player.save()
+    self.opponents = []
+    for name in ( "summary1", "summary2" ):
+      opponent = PGPlayer.create( name, "c@d.com", "xxx" )
+      opponent.save()
+      self.opponents.append( opponent )
+
+  def add_games( self, count ):
+    from paigow.models import PGGame
+    from paigow.models.pggame import s_game_goal
+    for n in range( count ):
+      game = PGGame.create( "summary game " + str( n ) )
+      game.save()
+      game.add_player( self.player )
+      game.add_player( self.opponents[n % 2] )
+      if n % 3 == 0:
+        game.player_in_deal( self.opponents[n % 2], 1 ).add_to_score( s_game_goal )
+        game.check_game_over()
+
+  def test_summaries( self ):
+    self.add_games( 4 )
+    summaries = opponent_summaries( self.player )
+    self.assertEqual( [ summary['opponent'] for summary in summaries ], self.opponents )
+    self.assertEqual( summaries[0]['record_against_opponent'], "0 - 1" )
+    self.assertEqual( [ game['score'] for game in summaries[0]['games'] ], [ "0 - 21", "0 - 0" ] )
+    self.assertEqual( [ game['score_class'] for game in summaries[1]['games'] ], [ "score-in-progress", "score-lose" ] )
+
+  # log the player in and count the queries the home page makes
+  def home_queries( self ):
+    from paigow import pgmetrics
+    from paigow.pgtestutils import log_in
+    log_in( self.client, self.player )
+    pgmetrics.reset()
+    response = self.client.get( '/paigow/home', HTTP_USER_AGENT = 'test' )
+    self.assertEqual( response.status_code, 200 )
+    self.assertIn( "summary game 1", response.content )
+    return pgmetrics.s_histograms[( 'paigow_view_queries', 'paigow.views.home' )][-1]
+
+  def test_home_queries_dont_grow( self ):
+    self.add_games( 2 )
+    queries = self.home_queries()
+    self.add_games( 6 )
+    self.assertEqual( self.home_queries(), queries )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
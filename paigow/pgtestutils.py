@@ -0,0 +1,30 @@
+# This file has what the view tests share: logging a player in on the
+# test client, and a game with two players in its first deal.  Only the
+# tests import it.
+
+# log the player in on the test client, the way the login view leaves
+# the session
+def log_in( client, player ):
+  from django.conf import settings
+  from django.utils.importlib import import_module
+  store = import_module( settings.SESSION_ENGINE ).SessionStore()
+  store['player_id'] = player.id
+  store.save()
+  client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+
+# a game named 'name' with two new players, '<name>1' and '<name>2', in
+# its first deal; returns ( game, player, opponent ).  With a deal
+# seed, the deals are always the same ones (see pgdealer.py).
+def two_player_game( name, deal_seed = None ):
+  from paigow.models import PGGame, PGPlayer
+  game = PGGame.create( name )
+  if deal_seed is not None:
+    game.deal_seed = deal_seed
+  game.save()
+  player = PGPlayer.create( name + "1", "a@b.com", "xxx" )
+  player.save()
+  opponent = PGPlayer.create( name + "2", "c@d.com", "xxx" )
+  opponent.save()
+  game.add_player( player )
+  game.add_player( opponent )
+  return game, player, opponent
@@ -0,0 +1,180 @@
+# This file defines the PGTileRegistry python class.  The 32 tiles
+# never change, so rather than asking the database every time we need
+# a tile (which happens a *lot*: every hand and set is built from tile
+# chars), we load them all once per process and keep them in memory,
+# indexed by char, name and rank.
+#
+# The tiles come from the PGTile table if it's there and complete;
+# otherwise (e.g. running the engine outside of a configured database)
+# they come from the 'pgtile.json' fixture.  Either way they are real
+# PGTile instances with their database ids, so they compare equal to
+# anything fetched from the database.
+#
+# Treat the tiles as read-only: they are shared by everybody.
+
+import json
+import os
+
+from models.pgtile import PGTile
+
+# the fixture we fall back on when the table isn't available
+s_tile_fixture_path = os.path.join( os.path.dirname( __file__ ), 'fixtures', 'pgtile.json' )
+
+# there are two of each of sixteen tiles
+s_num_tiles = 32
+
+class PGTileRegistry:
+
+  # all the tiles, in database id order, and the indexes into them.
+  # These are None until the first call that needs them.
+  s_tiles = None
+  s_tiles_by_char = None
+  s_tiles_by_name = None
+  s_tiles_by_rank = None
+
+  # load the tiles from the database table; return None if the table
+  # is missing or doesn't have the whole deck.
+  @classmethod
+  def tiles_from_table( cls ):
+    from django.db import DatabaseError
+    try:
+      tiles = list( PGTile.objects.all().order_by( 'id' ) )
+    except DatabaseError:
+      return None
+    if len( tiles ) != s_num_tiles:
+      return None
+    return tiles
+
+  # load the tiles from the fixture; they are not saved anywhere but
+  # they keep the fixture's primary keys.
+  @classmethod
+  def tiles_from_fixture( cls ):
+    tiles = []
+    with open( s_tile_fixture_path ) as fixture_file:
+      for entry in json.load( fixture_file ):
+        tiles.append( PGTile( pk = entry['pk'], **entry['fields'] ) )
+    tiles.sort( key = lambda tile: tile.pk )
+    return tiles
+
+  # make sure the tiles are loaded and indexed.
+  @classmethod
+  def load( cls ):
+    if cls.s_tiles is not None:
+      return
+    tiles = cls.tiles_from_table()
+    if not tiles:
+      tiles = cls.tiles_from_fixture()
+    by_char = {}
+    by_name = {}
+    by_rank = {}
+    for tile in tiles:
+      by_char[tile.tile_char] = tile
+      by_name.setdefault( tile.name.lower(), [] ).append( tile )
+      by_rank.setdefault( tile.tile_rank, [] ).append( tile )
+    cls.s_tiles_by_char = by_char
+    cls.s_tiles_by_name = dict( ( name, tuple( pair ) ) for name, pair in by_name.items() )
+    cls.s_tiles_by_rank = dict( ( rank, tuple( pair ) ) for rank, pair in by_rank.items() )
+    cls.s_tiles = tuple( tiles )
+
+  # forget the tiles so the next call re-loads them (for tests, or if
+  # someone has really changed the tile table).
+  @classmethod
+  def reset( cls ):
+    cls.s_tiles = None
+    cls.s_tiles_by_char = None
+    cls.s_tiles_by_name = None
+    cls.s_tiles_by_rank = None
+
+  # all 32 tiles, in database id order
+  @classmethod
+  def all( cls ):
+    cls.load()
+    return cls.s_tiles
+
+  # internal: there are two of every tile, client can specify which.
+  @classmethod
+  def one_of( cls, pair, is_first ):
+    if not pair or len( pair ) != 2:
+      return None
+    if is_first:
+      return pair[0]
+    else:
+      return pair[1]
+
+  # return the tile with the given char; like the database lookup this
+  # raises PGTile.DoesNotExist if there isn't one.
+  @classmethod
+  def with_char( cls, tile_char ):
+    cls.load()
+    try:
+      return cls.s_tiles_by_char[tile_char]
+    except KeyError:
+      raise PGTile.DoesNotExist( "No tile with char '" + str( tile_char ) + "'" )
+
+  # return the tile with the given name (case-insensitive)
+  @classmethod
+  def with_name( cls, name, is_first = True ):
+    cls.load()
+    return cls.one_of( cls.s_tiles_by_name.get( name.lower() ), is_first )
+
+  # return the tile with the given rank
+  @classmethod
+  def with_rank( cls, rank, is_first = True ):
+    cls.load()
+    return cls.one_of( cls.s_tiles_by_rank.get( rank ), is_first )
+
+
+# ----------------------------------------------------
+# Test PGTileRegistry class
+
+from django.test import TestCase
+
+class PGTileRegistryTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    PGTileRegistry.reset()
+
+  def test_all( self ):
+    self.assertEqual( len( PGTileRegistry.all() ), 32 )
+
+  def test_matches_database( self ):
+    for tile in PGTile.objects.all():
+      self.assertEqual( PGTileRegistry.with_char( tile.tile_char ), tile )
+      self.assertEqual( PGTileRegistry.with_char( tile.tile_char ).tile_rank, tile.tile_rank )
+
+  def test_fixture_matches_table( self ):
+    from_table = PGTileRegistry.tiles_from_table()
+    from_fixture = PGTileRegistry.tiles_from_fixture()
+    self.assertEqual( from_table, from_fixture )
+    for table_tile, fixture_tile in zip( from_table, from_fixture ):
+      self.assertEqual( table_tile.tile_char, fixture_tile.tile_char )
+      self.assertEqual( table_tile.tile_rank, fixture_tile.tile_rank )
+      self.assertEqual( table_tile.tile_value, fixture_tile.tile_value )
+
+  def test_lookups( self ):
+    self.assertEqual( PGTileRegistry.with_name( "Teen", True ).tile_char, "A" )
+    self.assertEqual( PGTileRegistry.with_name( "teen", False ).tile_char, "a" )
+    self.assertEqual( PGTileRegistry.with_rank( 0 ).name, "gee joon" )
+    self.assertIsNone( PGTileRegistry.with_name( "whatever" ) )
+    self.assertIsNone( PGTileRegistry.with_rank( -1 ) )
+    self.assertRaises( PGTile.DoesNotExist, PGTileRegistry.with_char, "z" )
+
+  def test_no_queries( self ):
+    from paigow.pgset import PGSet
+    PGTileRegistry.load()
+    set = PGSet.create_with_tile_chars( "AbLn" )
+    other = PGSet.create_with_tile_chars( "FgOj" )
+    with self.assertNumQueries( 0 ):
+      high_hand, low_hand = set.high_and_low_hands()
+      high_hand.label()
+      set.sum_and_diff()
+      self.assertTrue( set > other )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
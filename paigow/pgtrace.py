@@ -0,0 +1,221 @@
+# This file defines the PGTrace python class, which records the steps
+# the strategy takes when it sets and orders the computer's tiles, for
+# figuring out afterwards why it did what it did.
+#
+# Each step is a compact event -- the step's name and a tuple of plain
+# values (tile chars, orderings, sums and diffs), never PGSets -- kept
+# in a fixed-size ring buffer along with the game and deal it was for.
+# Every call site is guarded by a plain class attribute check:
+#
+#   if PGTrace.enabled:
+#     PGTrace.event( 'pair', set.tile_chars(), ordering )
+#
+# so when tracing is off nothing gets built and the cost is the same as
+# the old logging check.  When it's on, only a sample of deals are
+# recorded (s_sample_rate); the choice is made from the game and deal
+# number, so every process agrees on it.
+#
+# Tracing is turned on with settings.PAIGOW_STRATEGY_TRACE, and the
+# sample rate set with settings.PAIGOW_STRATEGY_TRACE_SAMPLE_RATE.  A
+# deal's events are at /paigow/data/game/<game>/<deal>/strategy_trace,
+# for the same addresses that may see the metrics (see pgmetrics.py).
+#
+# What gets recorded depends on the computer's engine (see pgengine.py):
+#
+#   table       'table' for each set found in the auto-set table, and
+#               'expected_points_order' for the ordering.  Only a set
+#               missing from the table ('not_in_table') goes through
+#               the rules below.
+#   solver      'expected_points_order' only; the solver's splits
+#               aren't traced.
+#   heuristic   every step of the rules: 'special_hands' and the pair
+#               orderings, then as numerical.
+#   numerical   'numerical', 'pick_ordering', the first_set_is_better
+#               steps ('only_way', 'better_by_special_hand',
+#               'better_by_sum'), 'ignore', 'diff_tie' and
+#               'picked_ordering', for setting each set and for
+#               ordering them (order_sets_by_rules).
+#   search      nothing; the deals it samples for the opponent aren't
+#               recorded either.
+
+import collections
+import threading
+import zlib
+
+class PGTrace:
+
+  # tracing is off unless this is set (see configure)
+  enabled = False
+
+  # the fraction of deals that are traced
+  s_sample_rate = 1.0
+
+  # how many events we keep, across all games
+  s_ring_size = 10000
+
+  # the events: ( game id, deal number, step, values )
+  s_events = collections.deque( maxlen = s_ring_size )
+
+  # the deal this thread is working on, and whether it's being traced
+  s_context = threading.local()
+
+  # turn tracing on or off, and set the sample rate, from the settings
+  @classmethod
+  def configure( cls ):
+    from django.conf import settings
+    cls.enabled = bool( getattr( settings, 'PAIGOW_STRATEGY_TRACE', False ) )
+    cls.s_sample_rate = float( getattr( settings, 'PAIGOW_STRATEGY_TRACE_SAMPLE_RATE', 1.0 ) )
+
+  # whether to trace this deal; the same answer every time, in every process.
+  @classmethod
+  def is_sampled( cls, game_id, deal_number ):
+    if cls.s_sample_rate >= 1.0:
+      return True
+    bucket = zlib.crc32( str( game_id ) + "/" + str( deal_number ) ) & 0xffff
+    return bucket < cls.s_sample_rate * 0x10000
+
+  # the events that follow are for this deal
+  @classmethod
+  def begin_deal( cls, game_id, deal_number ):
+    cls.s_context.deal = ( game_id, deal_number )
+    cls.s_context.sampled = cls.is_sampled( game_id, deal_number )
+
+  @classmethod
+  def end_deal( cls ):
+    cls.s_context.deal = None
+    cls.s_context.sampled = True
+
+  # stop recording on this thread for a while, e.g. while an engine
+  # sets deals of its own; returns what to pass to resume.
+  @classmethod
+  def pause( cls ):
+    sampled = getattr( cls.s_context, 'sampled', True )
+    cls.s_context.sampled = False
+    return sampled
+
+  @classmethod
+  def resume( cls, sampled ):
+    cls.s_context.sampled = sampled
+
+  # record one step; values should be plain, cheap-to-keep values.
+  # Outside of any deal, events are kept with no game or deal.
+  @classmethod
+  def event( cls, step, *values ):
+    if not getattr( cls.s_context, 'sampled', True ):
+      return
+    game_id, deal_number = getattr( cls.s_context, 'deal', None ) or ( None, None )
+    event = ( game_id, deal_number, step, values )
+    cls.s_events.append( event )
+
+  @classmethod
+  def events_for_game( cls, game_id ):
+    return [ event for event in list( cls.s_events ) if event[0] == game_id ]
+
+  @classmethod
+  def events_for_deal( cls, game_id, deal_number ):
+    return [ event for event in list( cls.s_events ) if event[0] == game_id and event[1] == deal_number ]
+
+  @classmethod
+  def clear( cls ):
+    cls.s_events.clear()
+
+  # a readable line for an event
+  @classmethod
+  def format_event( cls, event ):
+    game_id, deal_number, step, values = event
+    return str( game_id ) + "/" + str( deal_number ) + " " + step + " " + " ".join( [ str( value ) for value in values ] )
+
+  @classmethod
+  def format_events( cls, events ):
+    return "\n".join( [ cls.format_event( event ) for event in events ] )
+
+PGTrace.configure()
+
+
+# ----------------------------------------------------
+# Test PGTrace class
+
+from django.test import TestCase
+
+class PGTraceTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    PGTrace.clear()
+    PGTrace.enabled = True
+
+  def tearDown( self ):
+    PGTrace.enabled = False
+    PGTrace.s_sample_rate = 1.0
+    PGTrace.end_deal()
+    PGTrace.clear()
+
+  def test_events_by_deal( self ):
+    PGTrace.begin_deal( 7, 1 )
+    PGTrace.event( 'step', "AbLn", 2 )
+    PGTrace.begin_deal( 7, 2 )
+    PGTrace.event( 'other', 1 )
+    PGTrace.begin_deal( 8, 1 )
+    PGTrace.event( 'step', "FgOj", 3 )
+    PGTrace.end_deal()
+    self.assertEqual( PGTrace.events_for_deal( 7, 1 ), [ ( 7, 1, 'step', ( "AbLn", 2 ) ) ] )
+    self.assertEqual( len( PGTrace.events_for_game( 7 ) ), 2 )
+    self.assertEqual( PGTrace.format_events( PGTrace.events_for_deal( 8, 1 ) ), "8/1 step FgOj 3" )
+
+  def test_sampling( self ):
+    PGTrace.s_sample_rate = 0.5
+    sampled = [ deal_number for deal_number in range( 200 ) if PGTrace.is_sampled( 3, deal_number ) ]
+    self.assertTrue( 50 < len( sampled ) < 150 )
+    self.assertEqual( sampled, [ deal_number for deal_number in range( 200 ) if PGTrace.is_sampled( 3, deal_number ) ] )
+    PGTrace.s_sample_rate = 0.0
+    PGTrace.begin_deal( 3, 1 )
+    PGTrace.event( 'step' )
+    self.assertEqual( PGTrace.events_for_deal( 3, 1 ), [] )
+
+  def test_configure( self ):
+    from django.test.utils import override_settings
+    with override_settings( PAIGOW_STRATEGY_TRACE = True, PAIGOW_STRATEGY_TRACE_SAMPLE_RATE = 0.25 ):
+      PGTrace.configure()
+      self.assertTrue( PGTrace.enabled )
+      self.assertEqual( PGTrace.s_sample_rate, 0.25 )
+    PGTrace.configure()
+    self.assertFalse( PGTrace.enabled )
+    self.assertEqual( PGTrace.s_sample_rate, 1.0 )
+
+  def test_table_engine_is_traced( self ):
+    from paigow.pgengine import engine_named
+    from paigow.pgpacked import packed_from_tile_chars
+    PGTrace.begin_deal( 6, 1 )
+    engine_named( 'table' ).auto_set_packed( [ packed_from_tile_chars( chars ) for chars in ( "AHbL", "aBcC", "dDeE" ) ] )
+    PGTrace.end_deal()
+    steps = [ event[2] for event in PGTrace.events_for_deal( 6, 1 ) ]
+    self.assertEqual( steps, [ 'table', 'table', 'table', 'expected_points_order' ] )
+
+  def test_search_samples_not_traced( self ):
+    from paigow.pgengine import engine_named
+    from paigow.pgpacked import packed_from_tile_chars
+    PGTrace.begin_deal( 7, 1 )
+    engine_named( 'search' ).auto_set_packed( [ packed_from_tile_chars( chars ) for chars in ( "AHbL", "aBcC", "dDeE" ) ] )
+    PGTrace.event( 'after' )
+    PGTrace.end_deal()
+    self.assertEqual( [ event[2] for event in PGTrace.events_for_deal( 7, 1 ) ], [ 'after' ] )
+
+  def test_strategy_is_traced( self ):
+    from paigow.pgset import PGSet
+    from paigow.pgstrategy import PGStrategy
+    sets = [ PGSet.create_with_tile_chars( chars ) for chars in ( "AHbL", "aBcC", "dDeE" ) ]
+    PGTrace.begin_deal( 5, 1 )
+    PGStrategy.auto_set( sets )
+    PGTrace.end_deal()
+    self.assertTrue( len( PGTrace.events_for_deal( 5, 1 ) ) > 0 )
+    PGTrace.enabled = False
+    PGStrategy.auto_set( sets )
+    self.assertEqual( len( PGTrace.events_for_deal( None, None ) ), 0 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,128 @@
+# This file brings a database made before the engines, seeds, running
+# scores, records and versions up to date with the models.  'manage.py
+# syncdb' makes the tables that are missing, but it never changes a
+# table that's already there, so the columns added since have to be
+# added by hand:
+#
+#   PGGame.strategy_engine, PGGame.deal_seed, PGGame.version
+#   PGPlayer.strategy_engine
+#   PGDeal.version
+#
+# and the tables that are new (PGGameScore, PGDealScore, PGPlayerStats,
+# PGHeadToHead) have to be filled in from the games already played.
+# 'manage.py upgrade_database' does all of it; run it once after
+# deploying, before the site serves any requests, e.g. on heroku:
+#
+#   heroku run python manage.py upgrade_database
+#
+# It only does what's missing, so running it again does nothing.  With
+# --sql, it prints the ALTER TABLE statements for the missing columns
+# instead, for running by hand.
+
+from django.db import connection, transaction
+
+from paigow.models import PGGame, PGPlayer, PGDeal
+from paigow.models import PGGameScore, PGDealScore, PGPlayerStats, PGHeadToHead
+
+# the columns added to tables that were already there, as ( model, field name )
+s_new_columns = (
+  ( PGGame, 'strategy_engine' ),
+  ( PGGame, 'deal_seed' ),
+  ( PGGame, 'version' ),
+  ( PGPlayer, 'strategy_engine' ),
+  ( PGDeal, 'version' ),
+)
+
+# the models with tables of their own that are new
+s_score_models = ( PGGameScore, PGDealScore )
+s_stats_models = ( PGPlayerStats, PGHeadToHead )
+
+# the models from s_new_columns whose column isn't in the database
+def missing_columns():
+  cursor = connection.cursor()
+  tables = connection.introspection.table_names()
+  missing = []
+  for model, field_name in s_new_columns:
+    table = model._meta.db_table
+    if table not in tables:
+      continue
+    columns = [ column[0] for column in connection.introspection.get_table_description( cursor, table ) ]
+    if model._meta.get_field( field_name ).column not in columns:
+      missing.append( ( model, field_name ) )
+  return missing
+
+# the models whose table isn't in the database
+def missing_tables( models ):
+  tables = connection.introspection.table_names()
+  return [ model for model in models if model._meta.db_table not in tables ]
+
+# the statement that adds the field's column to the model's table (or
+# to another table, for testing), with the field's default for the rows
+# already there.
+def add_column_sql( model, field_name, table = None ):
+  qn = connection.ops.quote_name
+  field = model._meta.get_field( field_name )
+  sql = "ALTER TABLE " + qn( table or model._meta.db_table ) + " ADD COLUMN " + qn( field.column ) + " " + field.db_type( connection = connection )
+  if not field.null:
+    default = field.get_default()
+    if isinstance( default, basestring ):
+      default = "'" + default.replace( "'", "''" ) + "'"
+    sql += " NOT NULL DEFAULT " + str( default )
+  return sql + ";"
+
+# add the missing columns; return the statements
+def add_missing_columns():
+  statements = [ add_column_sql( model, field_name ) for model, field_name in missing_columns() ]
+  if statements:
+    with transaction.commit_on_success():
+      cursor = connection.cursor()
+      for statement in statements:
+        cursor.execute( statement )
+  return statements
+
+# the computer player from before there were engines sets its tiles
+# with the table engine, like the one paigow/models/sql/pgplayer.sql
+# makes; return how many were changed.
+def set_computer_engines():
+  with transaction.commit_on_success():
+    return PGPlayer.objects.filter( name = "computer", strategy_engine = '' ).update( strategy_engine = 'table' )
+
+
+# ----------------------------------------------------
+# Test the upgrade
+
+from django.test import TestCase
+
+class PGUpgradeTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def test_nothing_missing( self ):
+    self.assertEqual( missing_columns(), [] )
+    self.assertEqual( missing_tables( s_score_models + s_stats_models ), [] )
+    self.assertEqual( add_missing_columns(), [] )
+
+  def test_add_column( self ):
+    cursor = connection.cursor()
+    cursor.execute( "CREATE TABLE pgupgrade_test ( id integer )" )
+    cursor.execute( "INSERT INTO pgupgrade_test ( id ) VALUES ( 1 )" )
+    for model, field_name in s_new_columns:
+      if model is not PGGame:
+        continue
+      cursor.execute( add_column_sql( model, field_name, "pgupgrade_test" ) )
+    cursor.execute( "SELECT strategy_engine, deal_seed, version FROM pgupgrade_test" )
+    self.assertEqual( list( cursor.fetchall()[0] ), [ '', None, 0 ] )
+
+  def test_computer_engine( self ):
+    computer = PGPlayer.create( "computer", "computer@null.com", "xxx" )
+    computer.save()
+    self.assertEqual( set_computer_engines(), 1 )
+    self.assertEqual( PGPlayer.objects.get( id = computer.id ).strategy_engine, 'table' )
+    self.assertEqual( set_computer_engines(), 0 )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
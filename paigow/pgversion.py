@@ -0,0 +1,137 @@
+# This file answers the polling views' conditional GETs.  Everything
+# those views show about a deal -- both players' states, the scores, the
+# opponent's tiles -- only changes when a player's state or score
+# changes or the game finishes, and each of those bumps the game's
+# version and the deal's (see PGGame.version and PGDeal.version).  So the two versions,
+# and who's asking, make an ETag: if the browser already has the answer
+# for them, it gets a 304 after one indexed lookup, without working out
+# any sets or scores again.
+#
+# Decorate a view that takes ( request, game_id, deal_number, ... ) with
+# @deal_versioned.  Long-polls (a 'since' of 0 or more, see pgnotify.py)
+# are never answered with a 304, since they're waiting for a change.
+
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import available_attrs
+from django.views.decorators.http import condition
+from functools import wraps
+
+# the deal version a long-poll asks to wait past: -1 if it didn't say,
+# None if it's not a number.
+def since_version( request ):
+  try:
+    return int( request.GET.get( 'since', -1 ) )
+  except ValueError:
+    return None
+
+def deal_etag( request, game_id, deal_number, *args ):
+  from paigow.models import PGDeal
+  since = since_version( request )
+  if since is None or since >= 0:
+    return None
+  versions = PGDeal.versions( game_id, deal_number )
+  if versions is None:
+    return None
+  # the view answers with the same version (see etag_deal_version)
+  request.pg_deal_versions = versions
+  return str( request.session.get( 'player_id' ) ) + "." + str( versions[0] ) + "." + str( versions[1] )
+
+# the deal version deal_etag made the request's ETag from, or None if
+# it didn't make one
+def etag_deal_version( request ):
+  versions = getattr( request, 'pg_deal_versions', None )
+  if versions is None:
+    return None
+  return versions[1]
+
+# answer with a 304 if the deal hasn't changed since the browser's copy,
+# and have the browser check with us before using its copy.
+def deal_versioned( view ):
+  @condition( etag_func = deal_etag )
+  @wraps( view, assigned = available_attrs( view ) )
+  def versioned_view( request, *args, **kwargs ):
+    response = view( request, *args, **kwargs )
+    patch_cache_control( response, private = True, no_cache = True )
+    return response
+  return versioned_view
+
+
+# ----------------------------------------------------
+# Test the conditional GETs
+
+from django.test import TestCase
+
+class PGVersionTest( TestCase ):
+
+  fixtures = [ 'pgtile.json' ]
+
+  def setUp( self ):
+    from paigow.pgtestutils import log_in, two_player_game
+    self.game, self.player, self.opponent = two_player_game( "version" )
+    log_in( self.client, self.player )
+
+  def versions( self ):
+    from paigow.models import PGDeal
+    return PGDeal.versions( self.game.id, 1 )
+
+  def test_versions_go_up( self ):
+    from paigow.models import PGDeal, PGGame
+    versions = self.versions()
+    pgpid = self.game.player_in_deal( self.opponent, 1 )
+    pgpid.player_is_previewing_hands()
+    self.assertTrue( self.versions()[0] > versions[0] and self.versions()[1] > versions[1] )
+
+    # saving isn't a change, and saving a stale copy doesn't take the
+    # version back
+    stale = PGGame.objects.get( id = self.game.id )
+    pgpid.player_has_unpreviewed_hands()
+    versions = self.versions()
+    stale.save()
+    pgpid.save()
+    PGDeal.objects.get( game = self.game, deal_number = 1 ).save()
+    self.assertEqual( self.versions(), versions )
+
+    # scoring is
+    pgpid.add_to_score( 1 )
+    self.assertTrue( self.versions()[0] > versions[0] and self.versions()[1] > versions[1] )
+
+  def test_not_modified( self ):
+    url = '/paigow/data/game/' + str( self.game.id ) + '/1/opponent_state/'
+    response = self.client.get( url )
+    self.assertEqual( response.content, "|hasn't seen tiles" )
+    etag = response['ETag']
+
+    # one query for the session, one for the versions
+    with self.assertNumQueries( 2 ):
+      response = self.client.get( url, HTTP_IF_NONE_MATCH = etag )
+    self.assertEqual( response.status_code, 304 )
+
+    self.game.player_in_deal( self.opponent, 1 ).player_is_previewing_hands()
+    response = self.client.get( url, HTTP_IF_NONE_MATCH = etag )
+    self.assertEqual( response.status_code, 200 )
+    self.assertEqual( response.content, "|double-checking..." )
+    self.assertNotEqual( response['ETag'], etag )
+
+  def test_snapshot_version_is_etag_version( self ):
+    import json
+    url = '/paigow/data/game/' + str( self.game.id ) + '/1/snapshot/medium'
+    for n in range( 2 ):
+      response = self.client.get( url )
+      self.assertEqual( response['ETag'].strip( '"' ).split( '.' )[2], str( json.loads( response.content )['version'] ) )
+      self.game.player_in_deal( self.opponent, 1 ).player_is_previewing_hands()
+
+  def test_long_poll_is_not_conditional( self ):
+    url = '/paigow/data/game/' + str( self.game.id ) + '/1/snapshot/medium'
+    etag = self.client.get( url )['ETag']
+    self.assertEqual( self.client.get( url, HTTP_IF_NONE_MATCH = etag ).status_code, 304 )
+    self.game.player_in_deal( self.opponent, 1 ).player_is_previewing_hands()
+    response = self.client.get( url, { 'since': 0 }, HTTP_IF_NONE_MATCH = etag )
+    self.assertEqual( response.status_code, 200 )
+    self.assertFalse( response.has_header( 'ETag' ) )
+
+
+# run the test when invoked as a test (this is boilerplate
+# code at the bottom of every python file that has unit
+# tests in it).
+if __name__ == '__main__':
+  unittest.main()
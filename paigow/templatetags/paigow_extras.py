@@ -15,31 +15,21 @@ def tile_size( context ):
 def title():
   return "Pai Gow"
 
+# these render the summaries home() builds (see pgsummary.py), so they
+# don't go to the database for each opponent and game.
 @register.inclusion_tag( "opponent_summary.html", takes_context=True )
-def show_opponent_summary( context, opponent ):
-  player = session_player( context['request'] )  
-  context['opponent'] = opponent
-  context['games'] = player.games_against_opponent( opponent )
-  wins, losses, in_progress = player.record_against_opponent( opponent )
-  context['record_against_opponent'] = str( wins ) + " - " + str( losses )
+def show_opponent_summary( context, opponent_summary ):
+  context['opponent'] = opponent_summary['opponent']
+  context['games'] = opponent_summary['games']
+  context['record_against_opponent'] = opponent_summary['record_against_opponent']
   return context
 
 @register.inclusion_tag( "game_summary.html", takes_context=True )
-def show_game_summary( context, game ):
-  from paigow.models.pggame import PGGame
-  player = session_player( context['request'] )  
-  opponent = player.opponent_for_game( game )
-  context['game'] = game
-  context['opponent'] = opponent
-  player_score = game.score_for_player( player )
-  opponent_score = game.score_for_player( opponent )
-  context['score'] = str(player_score) + " - " + str(opponent_score)
-  if game.game_state != PGGame.GAME_OVER:
-    context['score_class'] = "score-in-progress"
-  elif player_score > opponent_score:
-    context['score_class'] = "score-win"
-  else:
-    context['score_class'] = "score-lose"
+def show_game_summary( context, game_summary ):
+  context['game'] = game_summary['game']
+  context['opponent'] = game_summary['opponent']
+  context['score'] = game_summary['score']
+  context['score_class'] = game_summary['score_class']
   return context
 
 @register.inclusion_tag( "pgdeal.html", takes_context=True )
@@ -85,10 +75,10 @@ def tile_image( context, tile, opponent ):
     # context['background_position_css_value'] = "0px 0px"
     context['dots'] = []
   else:
-    from paigow.pgdot import PGDot
+    from paigow.pgdot import dot_placements
     context['pgtile'] = tile
     # context['background_position_css_value'] = tile.background_position_css_value( context['pgtile_size'] )
-    context['dots'] = PGDot.all_dots( tile.dot_sequence )
+    context['dots'] = dot_placements( tile.dot_sequence, tile_size( context ) )
   return context
 
 @register.simple_tag( takes_context=True )
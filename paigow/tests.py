@@ -6,3 +6,21 @@ from pghand import PGHandTest
 from pgset import PGSetTest
 from pgstrategy import PGStrategyTest
 from pgdot import PGDotTest
+from pgtileregistry import PGTileRegistryTest
+from pgautosettable import PGAutoSetTableTest
+from pgpacked import PGPackedTest
+from pgbatch import PGBatchTest
+from pgsimulator import PGSimulatorTest
+from pgsolver import PGSolverTest
+from pgordering import PGOrderingTest
+from pgbenchmark import PGBenchmarkTest
+from pgmetrics import PGMetricsTest
+from pgtrace import PGTraceTest
+from pgengine import PGEngineTest
+from pgdealer import PGDealerTest
+from pgsummary import PGSummaryTest
+from pgnotify import PGNotifyTest
+from pgsnapshot import PGSnapshotTest
+from pghandlabels import PGHandLabelsTest
+from pgversion import PGVersionTest
+from pgupgrade import PGUpgradeTest
@@ -44,10 +44,16 @@ urlpatterns = patterns('',
   # given the game, return the state of the
   # opponent as a string that is shown, preceded by a
   # vertical bar (to distinguish from errors of some sort).
-  # first param: game ID; player ID is in request session.
+  # first param: game ID; player ID is in request session.  The
+  # 'wait' version long-polls, answering when the state changes.
+  url(r'^data/game/([0-9]+)/([0-9]+)/opponent_state/wait$', 'paigow.views.data_opponent_state_wait' ),
   url(r'^data/game/([0-9]+)/([0-9]+)/opponent_state/', 'paigow.views.data_opponent_state' ),
   url(r'^data/game/([0-9]+)/([0-9]+)/player_state/', 'paigow.views.data_player_state' ),
   
+  # everything about the deal the page needs, as JSON, waiting for
+  # the next change if asked (see pgsnapshot.py)
+  url(r'^data/game/([0-9]+)/([0-9]+)/snapshot/(small|medium|large)$', 'paigow.views.data_deal_snapshot' ),
+  
   # given the game, mark the player as having set
   # their hands and are ready to compare.
   url(r'^data/game/([0-9]+)/([0-9]+)/tiles_are_set', 'paigow.views.tiles_are_set' ),
@@ -71,6 +77,12 @@ urlpatterns = patterns('',
   # get the score of the game (not just the deal)
   url(r'^data/game/([0-9]+)/([0-9]+)/score$', 'paigow.views.game_score' ),
   
+  # the strategy's trace for the computer's setting in a deal (debugging only)
+  url(r'^data/game/([0-9]+)/([0-9]+)/strategy_trace$', 'paigow.views.strategy_trace' ),
+  
+  # per-view request metrics, in Prometheus text format
+  url(r'^metrics$', 'paigow.views.metrics' ),
+  
   # /tile or /tiles/ : show all the tiles
   url(r'^tiles[/]*$',
     ListView.as_view(
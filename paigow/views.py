@@ -13,6 +13,7 @@ from models.pgplayer import PGPlayer
 from models.pgplayerindeal import PGPlayerInDeal
 from paigow.pgset import PGSet
 
+from paigow.pgversion import deal_versioned, since_version, etag_deal_version
 from paigow.session_utils import session_player, session_opponent, opponent_in_session_deal, player_in_session_deal
 
 # put this at the beginning of any function to start debugging it, if we have a local django server
@@ -92,9 +93,10 @@ def home( request, params = {} ):
   if not player:
     return render_to_response( 'user_login.html', request_context( request, params ) )
   
-  params['games'] = session_player( request ).games()
-  params['all_opponents_in_all_games'] = session_player( request ).all_opponents_in_all_games()
-  wins, losses = session_player( request ).overall_record()
+  # everything about the player's games, in a fixed number of queries
+  from paigow.pgsummary import opponent_summaries
+  params['opponent_summaries'] = opponent_summaries( player )
+  wins, losses = player.overall_record()
   params['overall_record'] = str(wins) + " - " + str(losses)
   return render_to_response( 'home.html', request_context( request, params ) )
 
@@ -295,6 +297,15 @@ def play_game( request, game_id, deal_number_str, params = {} ):
   params['pgtile_size'] = "medium"
   params['current_player_state'] = PGPlayerInDeal.state_ui( pid.state() )
   
+  # the static script with every hand's label (see pghandlabels.py)
+  from paigow.pghandlabels import script_name
+  params['hand_labels_script'] = script_name()
+  
+  # the dots of every tile, to show the opponent's tiles from their
+  # tile chars at the reveal (see pgdot.py)
+  from paigow.pgdot import tile_dots_json
+  params['tile_dots_json'] = tile_dots_json( params['pgtile_size'] )
+  
   return render_to_response( 'game_play.html', request_context( request, params ) )
 
 #-------------------------------------------------------------------
@@ -326,15 +337,16 @@ def next_deal( request, game_id, deal_number_str, params = {} ):
 #-------------------------------------------------------------------
 # AJAX response for the label for a hand
 def data_hand_label( request, params = {} ):
-  hand_chars = request.GET['hand']
-  pghand = PGHand.create( PGTile.objects.get( tile_char = hand_chars[0] ), PGTile.objects.get( tile_char = hand_chars[1] ) )
-  label = pghand.label()
-  pghand = PGHand.create( PGTile.objects.get( tile_char = hand_chars[2] ), PGTile.objects.get( tile_char = hand_chars[3] ) )
-  label = label + "|" + pghand.label()
-  return HttpResponse( label )
+  from paigow.pghandlabels import labels_for_tile_chars
+  hand_chars = request.GET.get( 'hand', '' )
+  try:
+    return HttpResponse( labels_for_tile_chars( hand_chars ) )
+  except KeyError:
+    return HttpResponseNotAllowed( "Bad Request" )
 
 #-------------------------------------------------------------------
 # AJAX response for the opponent state
+@deal_versioned
 def data_opponent_state( request, game_id, deal_number ):
   game = PGGame.objects.get( id = game_id )
   player = session_player( request )
@@ -346,8 +358,55 @@ def data_opponent_state( request, game_id, deal_number ):
     status += "error"
   return HttpResponse( status )
 
+#-------------------------------------------------------------------
+# AJAX long-poll for the opponent state: answers as soon as a player's
+# state in the deal changes past the version the browser last saw
+# (see pgnotify.py), or after a while anyway.  The answer is the state
+# and the new version: "|<state>|<version>".
+def data_opponent_state_wait( request, game_id, deal_number ):
+  from paigow.pgnotify import PGNotify
+  since = since_version( request )
+  if since is None:
+    return HttpResponseNotAllowed( "Bad Request" )
+  version = PGNotify.wait( game_id, deal_number, since )
+  if version is None:
+    return HttpResponseNotAllowed( "Bad Request" )
+  game = PGGame.objects.get( id = game_id )
+  opponent = session_player( request ).opponent_for_deal( game, deal_number )
+  if ( opponent ):
+    state = game.state_for_player( opponent, deal_number )
+  else:
+    state = "error"
+  return HttpResponse( "|" + state + "|" + str( version ) )
+
+#-------------------------------------------------------------------
+# AJAX response with everything about the deal the page needs, as JSON
+# (see pgsnapshot.py).  With 'since', it waits for the deal to change
+# past that version first (see pgnotify.py); without, the snapshot has
+# the version of its ETag.  With 'compact', the opponent's tiles come
+# as tile chars only.
+@deal_versioned
+def data_deal_snapshot( request, game_id, deal_number, pgtile_size ):
+  import json
+  from paigow.pgnotify import PGNotify
+  from paigow.pgsnapshot import deal_snapshot
+  since = since_version( request )
+  if since is None:
+    return HttpResponseNotAllowed( "Bad Request" )
+  version = etag_deal_version( request )
+  if version is None:
+    version = PGNotify.wait( game_id, deal_number, since )
+  if version is None:
+    return HttpResponseNotAllowed( "Bad Request" )
+  compact = bool( request.GET.get( 'compact' ) )
+  snapshot = deal_snapshot( int( game_id ), int( deal_number ), request.session.get( 'player_id' ), pgtile_size, version, compact )
+  if snapshot is None:
+    return HttpResponseNotAllowed( "Bad Request" )
+  return HttpResponse( json.dumps( snapshot ), content_type = 'application/json' )
+
 #-------------------------------------------------------------------
 # AJAX response for the opponent state
+@deal_versioned
 def data_player_state( request, game_id, deal_number ):
   game = PGGame.objects.get( id = game_id )
   player = session_player( request )
@@ -386,16 +445,29 @@ def unpreview_hands( request, game_id, deal_number ):
 
 #-------------------------------------------------------------------
 # AJAX response for previewing the opponents tiles when both players
-# have finished setting the tiles.
+# have finished setting the tiles: the dots of each tile, or with
+# 'compact', just the twelve tile chars (see pgsnapshot.py).
+@deal_versioned
 def get_opponent_tile_dots( request, game_id, deal_number, pgtile_size ):
-   pigo = opponent_in_session_deal( request, game_id, deal_number )
-   if not pigo:
-     return HttpResponseNotAllowed( "Bad Request" )
-   return HttpResponse( pigo.tile_dots( pgtile_size ) )
+  from paigow.pgdot import s_tile_size_scales
+  from paigow.pgsnapshot import cached_reveal
+  if pgtile_size not in s_tile_size_scales:
+    return HttpResponseNotAllowed( "Bad Request" )
+  pigo = opponent_in_session_deal( request, game_id, deal_number )
+  if not pigo or pigo.state() != PGPlayerInDeal.READY:
+    return HttpResponseNotAllowed( "Bad Request" )
+  pgpid = player_in_session_deal( request, game_id, deal_number )
+  if not pgpid:
+    return HttpResponseNotAllowed( "Bad Request" )
+  reveal = cached_reveal( pgpid, pigo, pgtile_size )
+  if request.GET.get( 'compact' ):
+    return HttpResponse( reveal['opponent_tiles'] )
+  return HttpResponse( reveal['opponent_sets_json'], content_type = 'application/json' )
 
 #-------------------------------------------------------------------
 # AJAX response for previewing the opponents tiles when both players
 # have finished setting the tiles.
+@deal_versioned
 def data_opponent_hand_label( request, game_id, deal_number, set_num ):
   pigo = opponent_in_session_deal( request, game_id, deal_number )
   if not pigo:
@@ -404,6 +476,7 @@ def data_opponent_hand_label( request, game_id, deal_number, set_num ):
 
 #-------------------------------------------------------------------
 # AJAX response for result of the three hands
+@deal_versioned
 def score_in_deal( request, game_id, deal_number ):
   
   # get the player-in-game so we can get their hands.  Note that if
@@ -422,6 +495,7 @@ def score_in_deal( request, game_id, deal_number ):
 
 #-------------------------------------------------------------------
 # AJAX response for the score of the game
+@deal_versioned
 def game_score( request, game_id, deal_number_str ):
   deal_number = int( deal_number_str )
   game = PGGame.with_id( game_id )
@@ -436,3 +510,24 @@ def game_score( request, game_id, deal_number_str ):
     ret_val = "!" + ret_val
   print "Score returning: " + ret_val
   return HttpResponse( ret_val )
+
+#-------------------------------------------------------------------
+# per-view request metrics (see pgmetrics.py), for Prometheus to scrape
+def metrics( request ):
+  from django.http import HttpResponseForbidden
+  from paigow.pgmetrics import prometheus_text, metrics_allowed
+  if not metrics_allowed( request ):
+    return HttpResponseForbidden( "Forbidden" )
+  return HttpResponse( prometheus_text(), content_type = 'text/plain; version=0.0.4; charset=utf-8' )
+
+#-------------------------------------------------------------------
+# the strategy trace (see pgtrace.py) for the computer's setting in a
+# deal, as text.  Only for the addresses that may see the metrics.
+def strategy_trace( request, game_id, deal_number ):
+  from django.http import Http404
+  from paigow.pgtrace import PGTrace
+  from paigow.pgmetrics import metrics_allowed
+  if not metrics_allowed( request ):
+    raise Http404
+  events = PGTrace.events_for_deal( int( game_id ), int( deal_number ) )
+  return HttpResponse( PGTrace.format_events( events ), content_type = 'text/plain' )